@@ -0,0 +1,94 @@
+"""
+Blacklisted word matching in ModeratorCog.on_message before (`word in content` per word) and after
+(one pass of the compiled automaton).
+
+Run from the repository root:
+    python benchmarks/blacklist_matcher_bench.py [words] [messages]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cogs.ext.utils.utils as utils
+from cogs.ext.blacklist_matcher import BlacklistMatcher
+
+SYLLABLES = ["ka", "zu", "mi", "tor", "ex", "qu", "lan", "vy", "dro", "pex", "shi", "gor", "bel", "nu", "xa"]
+CHAT = ["hey", "anyone", "up", "for", "a", "game", "tonight", "lol", "gg", "that", "was", "close", "nice", "one",
+        "did", "you", "see", "the", "patch", "notes", "i", "think", "ranked", "is", "broken", "again", "brb",
+        "dinner", "check", "this", "out", "https://example.com/clip/123", "<@123456789012345678>", ":smile:",
+        "what", "time", "server", "restart", "thanks", "mods", "welcome", "new", "people", "rules", "channel"]
+
+
+class Legacy:
+    # the loop on_message ran before the matcher, kept only for comparison
+    @staticmethod
+    def search(words: list, content: str):
+        for word in words:
+            if word in content:
+                return word
+        return None
+
+
+def makeWords(rnd: random.Random, count: int) -> list:
+    words = set()
+    while len(words) < count:
+        words.add("".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))))
+    return sorted(words)
+
+
+def makeMessages(rnd: random.Random, count: int, words: list) -> list:
+    messages = []
+    for i in range(count):
+        text = " ".join(rnd.choice(CHAT) for _ in range(rnd.randint(3, 40)))
+        # about one message in fifty hits the blacklist, somewhere in the middle
+        if i % 50 == 0:
+            parts = text.split(" ")
+            parts.insert(len(parts) // 2, rnd.choice(words))
+            text = " ".join(parts)
+        messages.append(text)
+    return messages
+
+
+def timed(function) -> tuple:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    wordCount = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    messageCount = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    rnd = random.Random(1)
+    words = makeWords(rnd, wordCount)
+    messages = makeMessages(rnd, messageCount, words)
+    characters = sum(len(message) for message in messages)
+
+    buildTime, matcher = timed(lambda: BlacklistMatcher(words))
+    print(f"{wordCount} words, {messageCount} messages ({characters / messageCount:.0f} characters on average)")
+    print(f"automaton build: {buildTime * 1000:.1f} ms ({matcher.getStats()})")
+
+    beforeTime, expected = timed(lambda: [Legacy.search(words, message) is not None for message in messages])
+    afterTime, result = timed(lambda: [matcher.search(message) is not None for message in messages])
+    assert expected == result, "matched messages differ"
+    print(f"{'':<24}{'loop ms':>10}{'automaton ms':>14}{'speedup':>10}{'msg/s':>12}")
+    print(f"{'exact':<24}{beforeTime * 1000:>10.1f}{afterTime * 1000:>14.1f}{beforeTime / afterTime:>9.0f}x"
+          f"{messageCount / afterTime:>12.0f}")
+
+    normalized = BlacklistMatcher(words, casefold=True, confusables=True, whitespace=True)
+    normalizedTime, _ = timed(lambda: [normalized.search(message) for message in messages])
+    print(f"{'all normalizations':<24}{'':>10}{normalizedTime * 1000:>14.1f}{'':>10}"
+          f"{messageCount / normalizedTime:>12.0f}")
+
+    # what the normalizations are for: case, look-alike letters, accents and zero width characters
+    word = words[0]
+    disguised = "hey " + word.upper().translate(str.maketrans("AEOB", "АЕΟВ")) + "​!"
+    assert Legacy.search(words, disguised) is None and normalized.search(disguised) == word
+    print(f"{disguised!r} matched {word!r} with normalization")
+
+
+if __name__ == "__main__":
+    main()
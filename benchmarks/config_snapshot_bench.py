@@ -0,0 +1,137 @@
+"""
+Getter throughput of ConfigManager before (walking the raw JSON) and after (compiled snapshot).
+
+Run from the repository root:
+    python benchmarks/config_snapshot_bench.py [messages] [views]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cogs.ext.utils.utils  # noqa: F401  (resolves the cogs.ext.imports cycle the same way main.py does)
+from cogs.ext.config_manager import ConfigManager
+
+
+def handleMaps(res) -> dict:
+    if not isinstance(res, dict):
+        return dict()
+    return res
+
+
+class LegacyGetters:
+    # getters as they were before the snapshot, kept here only for comparison
+    def __init__(self, configData: dict, messagesData: dict):
+        self.configData = configData
+        self.messagesData = messagesData
+
+    def getActions(self, combined: str) -> list:
+        comb = combined.split(" ")
+        res = handleMaps(self.messagesData.get("views", {}))
+        res = handleMaps(res.get(comb[0], {}))
+        res = handleMaps(res.get(comb[1], {})).get("actions", [])
+        if not isinstance(res, list):
+            return []
+        return list(res)
+
+    def getButtonCustomID(self, combined: str) -> str:
+        comb = combined.split(" ")
+        res = handleMaps(self.messagesData.get("views", {}))
+        res = handleMaps(res.get(comb[0], {}))
+        res = handleMaps(res.get(comb[1], {}))
+        return str(res.get("custom_id", str(random.randint(1, 1000))))
+
+    def getMessagesByChannel(self, name: str) -> list:
+        res = handleMaps(self.messagesData.get("channel_messages", {}))
+        res = handleMaps(res.get(name, {}))
+        res = res.get("messages", [])
+        if not isinstance(res, list):
+            return []
+        return res
+
+    def getDMEmbeds(self, message) -> list:
+        res = handleMaps(self.messagesData.get("dm", {}))
+        res = handleMaps(res.get(message, {})).get("embeds", [])
+        if not isinstance(res, list):
+            return []
+        return res
+
+    def getCommandEmbeds(self, command: str, message: str) -> dict | None:
+        res = handleMaps(self.messagesData.get("embed_format", {}))
+        res = handleMaps(res.get(message, {}))
+        if len(res.keys()) > 0:
+            return res
+        return None
+
+    def getActionData(self, action: str) -> dict:
+        return handleMaps(handleMaps(self.configData.get("actions", {})).get(action, {}))
+
+
+def buildConfigs(messageCount: int, viewCount: int) -> tuple:
+    messagesData = {"views": {}, "embed_format": {}, "messages": {}, "channel_messages": {}, "dm": {}}
+    configData = {"actions": {}, "channels": {}}
+    for i in range(viewCount):
+        view = {"timeout": 60}
+        for b in range(5):
+            view[f"button{b}"] = {"style": "grey", "custom_id": f"{i}-{b}", "actions": [f"action{i}"]}
+        messagesData["views"][f"view{i}"] = view
+        configData["actions"][f"action{i}"] = {"messages": [f"msg{i}"]}
+    for i in range(messageCount):
+        messagesData["messages"][f"msg{i}"] = [f"line /username/ {i}"]
+        messagesData["embed_format"][f"msg{i}"] = {"title": f"title {i}"}
+        messagesData["channel_messages"][f"msg{i}"] = {"messages": [f"msg{i}"], "embeds": [], "views": []}
+        messagesData["dm"][f"msg{i}"] = {"messages": [], "embeds": [f"msg{i}"], "views": []}
+        configData["channels"][f"msg{i}"] = 1000 + i
+    return configData, messagesData
+
+
+def main():
+    messageCount = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    viewCount = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    configData, messagesData = buildConfigs(messageCount, viewCount)
+
+    with tempfile.TemporaryDirectory() as folder:
+        for name, data in (("config", configData), ("messages", messagesData)):
+            with open(os.path.join(folder, name + ".json"), "w") as jsonfile:
+                json.dump(data, jsonfile)
+        manager = ConfigManager(os.path.join(folder, "config"), os.path.join(folder, "messages"),
+                                os.path.join(folder, "warnings"), os.path.join(folder, "commands"))
+        compileTime = timeit.timeit(manager.compileSnapshot, number=5) / 5
+
+    legacy = LegacyGetters(configData, messagesData)
+    rnd = random.Random(1)
+    buttonKeys = [f"view{rnd.randrange(viewCount)} button{rnd.randrange(5)}" for _ in range(1000)]
+    messageNames = [f"msg{rnd.randrange(messageCount)}" for _ in range(1000)]
+    actionNames = [f"action{rnd.randrange(viewCount)}" for _ in range(1000)]
+
+    cases = [
+        ("getActions", buttonKeys), ("getButtonCustomID", buttonKeys),
+        ("getMessagesByChannel", messageNames), ("getDMEmbeds", messageNames),
+        ("getActionData", actionNames),
+    ]
+    print(f"{messageCount} messages, {viewCount} views, snapshot compile {compileTime * 1000:.1f} ms")
+    print(f"{'getter':<24}{'before ops/s':>16}{'after ops/s':>16}{'speedup':>10}")
+    for getter, keys in cases:
+        before = getattr(legacy, getter)
+        after = getattr(manager, getter)
+        beforeTime = min(timeit.repeat(lambda: [before(k) for k in keys], number=20, repeat=3))
+        afterTime = min(timeit.repeat(lambda: [after(k) for k in keys], number=20, repeat=3))
+        ops = len(keys) * 20
+        print(f"{getter:<24}{ops / beforeTime:>16,.0f}{ops / afterTime:>16,.0f}{beforeTime / afterTime:>9.1f}x")
+
+    before = legacy.getCommandEmbeds
+    after = manager.getCommandEmbeds
+    beforeTime = min(timeit.repeat(lambda: [before("", k) for k in messageNames], number=20, repeat=3))
+    afterTime = min(timeit.repeat(lambda: [after("", k) for k in messageNames], number=20, repeat=3))
+    ops = len(messageNames) * 20
+    print(f"{'getCommandEmbeds':<24}{ops / beforeTime:>16,.0f}{ops / afterTime:>16,.0f}"
+          f"{beforeTime / afterTime:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Member, role, channel and category lookups before (scanning the guild per id/name) and after (per-guild indexes).
+
+Run from the repository root:
+    python benchmarks/guild_index_bench.py [members] [channels] [lookups]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cogs.ext.utils.utils as utils
+from cogs.ext.guild_index import guildIndexes
+
+
+class FakeObject:
+    def __init__(self, objId: int, name: str, guild=None, type: str = "text", category=None):
+        self.id = objId
+        self.name = name
+        self.guild = guild
+        self.type = type
+        self.category = category
+
+    def is_default(self):
+        return self.id == self.guild.id
+
+
+class FakeGuild:
+    def __init__(self, memberCount: int, channelCount: int, roleCount: int = 250, categoryCount: int = 100):
+        self.id = 1
+        self.roles = [FakeObject(self.id, "@everyone", self)] + \
+            [FakeObject(10_000_000 + i, "role" + str(i), self) for i in range(roleCount)]
+        self.categories = [FakeObject(20_000_000 + i, "category" + str(i), self, "category")
+                           for i in range(categoryCount)]
+        self.members = [FakeObject(30_000_000 + i, "member" + str(i), self) for i in range(memberCount)]
+        self.channels = self.categories + [FakeObject(40_000_000 + i, "channel" + str(i), self,
+                                                      category=self.categories[i % categoryCount])
+                                           for i in range(channelCount)]
+        self._members = {member.id: member for member in self.members}
+        self._roles = {role.id: role for role in self.roles}
+        self._channels = {channel.id: channel for channel in self.channels}
+
+    def get_member(self, memberId):
+        return self._members.get(memberId)
+
+    def get_role(self, roleId):
+        return self._roles.get(roleId)
+
+    def get_channel(self, channelId):
+        return self._channels.get(channelId)
+
+
+class Legacy:
+    # the resolvers as they were before the indexes, kept only for comparison
+    @staticmethod
+    def getMembers(names: list, guild: FakeGuild) -> list:
+        members = []
+        for name in names:
+            member = next((m for m in guild.members if m.name == name), None)
+            if member is not None:
+                members.append(member)
+        return members
+
+    @staticmethod
+    def getRoles(roleName: str, guild: FakeGuild) -> list:
+        return list({r for r in guild.roles if r.name != "@everyone" and r.name == roleName})
+
+    @staticmethod
+    def getChannels(names: list, guild: FakeGuild) -> list:
+        channels = []
+        for name in names:
+            for cha in guild.channels:
+                if cha.name == name:
+                    channels.append(cha)
+        return channels
+
+    @staticmethod
+    def getCategories(names: list, guild: FakeGuild) -> list:
+        categories = []
+        for name in names:
+            for cat in guild.categories:
+                if cat.name == name:
+                    categories.append(cat)
+        return categories
+
+
+def ids(found: list) -> list:
+    # getRoles returns a list built from a set, compare those unordered
+    return [sorted(o.id for o in item) if isinstance(item, list) else item.id for item in found]
+
+
+def timed(function) -> tuple:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    memberCount = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    channelCount = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    lookups = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    rnd = random.Random(1)
+    guild = FakeGuild(memberCount, channelCount)
+
+    memberNames = ["member" + str(rnd.randrange(memberCount)) for _ in range(lookups)]
+    roleNames = ["role" + str(rnd.randrange(len(guild.roles) - 1)) for _ in range(lookups)]
+    channelNames = ["channel" + str(rnd.randrange(channelCount)) for _ in range(lookups)]
+    categoryNames = [rnd.choice(guild.categories).name for _ in range(lookups)]
+
+    # started so the indexes are cached, the listeners are only attached to this stand-in
+    guildIndexes.start(type("Bot", (), {"add_listener": lambda self, listener, event: None})())
+    buildTime, index = timed(lambda: guildIndexes.get(guild))
+
+    cases = [
+        ("members by name", lambda: Legacy.getMembers(memberNames, guild),
+         lambda: utils.getMembers({"user_name": memberNames}, guild)),
+        ("roles by name", lambda: [Legacy.getRoles(name, guild) for name in roleNames],
+         lambda: [utils.getRoles({"role_name": name}, guild) for name in roleNames]),
+        ("channels by name", lambda: Legacy.getChannels(channelNames, guild),
+         lambda: utils.getChannels({"channel_name": channelNames}, guild)),
+        ("categories by name", lambda: Legacy.getCategories(categoryNames, guild),
+         lambda: utils.getCategories({"category_name": categoryNames}, guild)),
+    ]
+
+    print(f"{memberCount} members, {channelCount} channels, {len(guild.roles)} roles, "
+          f"{len(guild.categories)} categories, {lookups} lookups per case")
+    print(f"index build: {buildTime * 1000:.1f} ms ({index.getStats()})")
+    print(f"{'':<20}{'scan ms':>10}{'index ms':>10}{'speedup':>10}")
+    for name, before, after in cases:
+        beforeTime, expected = timed(before)
+        afterTime, result = timed(after)
+        assert ids(expected) == ids(result), name + " results differ"
+        print(f"{name:<20}{beforeTime * 1000:>10.1f}{afterTime * 1000:>10.2f}{beforeTime / afterTime:>9.0f}x")
+
+    # gateway updates keep the index current
+    member = guild.members[0]
+    renamed = FakeObject(member.id, "renamed", guild)
+    asyncio.run(guildIndexes.onMemberUpdate(member, renamed))
+    assert utils.getMembers({"user_name": "renamed"}, guild)[0] is renamed
+    assert len(utils.getMembers({"user_name": member.name}, guild)) == 0
+    print("member rename applied from on_member_update")
+
+
+if __name__ == "__main__":
+    main()
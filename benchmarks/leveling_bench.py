@@ -0,0 +1,108 @@
+"""
+XP per message before (a naive store writing every message to SQLite) and after (LevelingStore, in memory and
+flushed in batches), with the event loop's worst delay while the messages are handled.
+
+Run from the repository root:
+    python benchmarks/leveling_bench.py [messages] [members] [guilds]
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cogs.ext.utils.utils as utils
+from cogs.ext.leveling import LevelingStore, SCHEMA, UPSERT, levelForXP
+
+
+class Legacy:
+    # what a leveling handler writing on every message would do, kept only for comparison
+    def __init__(self, databasePath: str):
+        self.connection = sqlite3.connect(databasePath)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    async def award(self, guildId: int, memberId: int):
+        row = self.connection.execute("SELECT xp FROM levels WHERE guild_id = ? AND member_id = ?",
+                                      (guildId, memberId)).fetchone()
+        xp = (row[0] if row is not None else 0) + random.randint(15, 25)
+        with self.connection:
+            self.connection.execute(UPSERT, (guildId, memberId, xp, levelForXP(xp), time.time()))
+
+    def close(self):
+        self.connection.close()
+
+
+async def measure(award, events: list) -> tuple:
+    """(seconds, median and worst event loop delay in ms) for handling every event"""
+    delays = [0.0]
+    running = True
+
+    async def ticker():
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            delays.append(time.perf_counter() - start - 0.001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    # messages come in batches like gateway events do, the ticker gets the loop between them
+    for offset in range(0, len(events), 100):
+        for guildId, memberId in events[offset:offset + 100]:
+            await award(guildId, memberId)
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    running = False
+    await task
+    delays.sort()
+    return elapsed, delays[len(delays) // 2] * 1000, delays[-1] * 1000
+
+
+async def main():
+    messageCount = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    memberCount = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    guildCount = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    rnd = random.Random(1)
+    events = [(rnd.randrange(guildCount) + 1, rnd.randrange(memberCount) + 1) for _ in range(messageCount)]
+    folder = tempfile.mkdtemp()
+
+    legacy = Legacy(os.path.join(folder, "legacy.db"))
+    legacyCount = min(messageCount, 5_000)
+    beforeTime, beforeMedian, beforeWorst = await measure(legacy.award, events[:legacyCount])
+    legacy.close()
+
+    # no cooldown so every message changes XP, the worst case for the store
+    store = LevelingStore(os.path.join(folder, "leveling.db"), cooldown=0, flushInterval=0.5)
+    store.start()
+    afterTime, afterMedian, afterWorst = await measure(store.award, events)
+    flushStart = time.perf_counter()
+    written = await store.flush()
+    flushTime = time.perf_counter() - flushStart
+
+    print(f"{messageCount} messages from {memberCount} members in {guildCount} guilds (no cooldown)")
+    # the worst delays of both are mostly the garbage collector going through every object of the process
+    print(f"{'':<22}{'msg/s':>12}{'median loop delay ms':>22}{'worst ms':>10}")
+    print(f"{'write per message':<22}{legacyCount / beforeTime:>12.0f}{beforeMedian:>22.1f}{beforeWorst:>10.1f}"
+          f"  ({legacyCount} messages)")
+    print(f"{'write behind':<22}{messageCount / afterTime:>12.0f}{afterMedian:>22.1f}{afterWorst:>10.1f}")
+    print(f"final flush: {written} rows in {flushTime * 1000:.1f} ms, {store.getStats()}")
+
+    expected = {(guildId, memberId): (member.xp, member.level)
+                for guildId, members in store.guilds.items() for memberId, member in members.items()}
+    store.close()
+    connection = sqlite3.connect(os.path.join(folder, "leveling.db"))
+    stored = {(row[0], row[1]): (row[2], row[3])
+              for row in connection.execute("SELECT guild_id, member_id, xp, level FROM levels")}
+    connection.close()
+    assert stored == expected, "stored levels differ from memory"
+    print(f"{len(stored)} stored rows match memory after close")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
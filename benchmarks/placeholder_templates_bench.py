@@ -0,0 +1,83 @@
+"""
+Placeholder rendering before (one str.replace pass per placeholder) and after (compiled single pass templates).
+
+Run from the repository root:
+    python benchmarks/placeholder_templates_bench.py [templates] [placeholders]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cogs.ext.utils.utils  # noqa: F401  (resolves the cogs.ext.imports cycle the same way main.py does)
+from cogs.ext.templates import TemplateEngine
+
+
+class LegacyPlaceholders:
+    # usePlaceholders and isActivePlaceholder as they were before the template engine, kept only for comparison
+    def __init__(self, activated: list):
+        self.configData = {"activated_placeholders": activated}
+
+    def isActivePlaceholder(self, placeholder: str):
+        return placeholder in self.configData.get("activated_placeholders")
+
+    def usePlaceholders(self, msg: str, placeholders: dict) -> str:
+        for placeholder, v in placeholders.items():
+            if self.isActivePlaceholder(placeholder):
+                msg = msg.replace(str(placeholder), str(v))
+        return msg
+
+
+def buildTemplates(templateCount: int, placeholderCount: int, rnd: random.Random) -> tuple:
+    names = ["/placeholder_" + str(i) + "/" for i in range(placeholderCount)]
+    templates = []
+    for i in range(templateCount):
+        parts = ["Message " + str(i)]
+        for name in rnd.sample(names, k=max(1, placeholderCount // 2)):
+            parts.append("some text around " + name)
+        templates.append(" ".join(parts))
+    values = {name: "value " + str(i) for i, name in enumerate(names)}
+    return names, templates, values
+
+
+def measure(render, templates: list, values: dict, repeat: int = 3) -> tuple:
+    best = None
+    out = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = [render(t, values) for t in templates]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+def main():
+    templateCount = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    placeholderCount = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    names, templates, values = buildTemplates(templateCount, placeholderCount, random.Random(1))
+
+    legacy = LegacyPlaceholders(list(names))
+    engine = TemplateEngine(names, maxSize=templateCount)
+
+    beforeTime, before = measure(legacy.usePlaceholders, templates, values)
+    engine.invalidate()
+    start = time.perf_counter()
+    [engine.render(t, values) for t in templates]
+    coldTime = time.perf_counter() - start
+    afterTime, after = measure(engine.render, templates, values)
+    assert before == after, "rendered output differs"
+
+    print(f"{templateCount} templates, {placeholderCount} activated placeholders, "
+          f"{len(values)} values per render")
+    print(f"{'':<28}{'ms':>10}{'renders/s':>14}")
+    print(f"{'str.replace per placeholder':<28}{beforeTime * 1000:>10.1f}{templateCount / beforeTime:>14,.0f}")
+    print(f"{'compiled, first render':<28}{coldTime * 1000:>10.1f}{templateCount / coldTime:>14,.0f}")
+    print(f"{'compiled, cached':<28}{afterTime * 1000:>10.1f}{templateCount / afterTime:>14,.0f}")
+    print(f"speedup {beforeTime / afterTime:.1f}x (cached), {beforeTime / coldTime:.1f}x (first render)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Applying an action to many members before (one awaited REST call after the other) and after
+(TargetExecutor with a bounded number of calls in flight).
+
+REST calls are simulated with asyncio.sleep, so the numbers show how much latency is overlapped,
+not Discord's rate limits.
+
+Run from the repository root:
+    python benchmarks/target_executor_bench.py [members] [latency_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cogs.ext.utils.utils  # noqa: F401  (resolves the cogs.ext.imports cycle the same way main.py does)
+from cogs.ext.target_executor import TargetExecutor
+
+
+class FakeMember:
+    def __init__(self, memberID: int, latency: float, fails: bool = False):
+        self.id = memberID
+        self.name = "member" + str(memberID)
+        self.latency = latency
+        self.fails = fails
+        self.kicked = False
+
+    async def kick(self, reason: str = ""):
+        await asyncio.sleep(self.latency)
+        if self.fails:
+            raise RuntimeError("Missing permissions")
+        self.kicked = True
+
+
+async def legacyKick(members: list) -> list:
+    # the handleUser loop as it was before the executor, kept only for comparison
+    kicked = []
+    for member in members:
+        try:
+            await member.kick(reason="bench")
+        except Exception:
+            break
+        else:
+            kicked.append(member)
+    return kicked
+
+
+async def main():
+    memberCount = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+
+    members = [FakeMember(i, latency) for i in range(memberCount)]
+    start = time.perf_counter()
+    kicked = await legacyKick(members)
+    serialTime = time.perf_counter() - start
+    assert len(kicked) == memberCount
+
+    print(f"{memberCount} members, {latency * 1000:.0f} ms per call")
+    print(f"{'':<20}{'ms':>10}{'calls/s':>12}{'speedup':>10}")
+    print(f"{'serial loop':<20}{serialTime * 1000:>10.1f}{memberCount / serialTime:>12,.0f}{1:>9.1f}x")
+    for limit in (1, 8, 16, 32):
+        executor = TargetExecutor(limit)
+        members = [FakeMember(i, latency) for i in range(memberCount)]
+        start = time.perf_counter()
+        result = await executor.run(members, lambda member: member.kick(reason="bench"))
+        elapsed = time.perf_counter() - start
+        assert len(result.succeeded) == memberCount and all(member.kicked for member in members)
+        print(f"{'executor, limit ' + str(limit):<20}{elapsed * 1000:>10.1f}{memberCount / elapsed:>12,.0f}"
+              f"{serialTime / elapsed:>9.1f}x")
+
+    # a failing member no longer stops the members after it
+    members = [FakeMember(i, latency / 10, fails=i == 0) for i in range(memberCount)]
+    result = await TargetExecutor(16).run(members, lambda member: member.kick(reason="bench"))
+    print(f"first member failing: serial loop kicks {len(await legacyKick(members))}, "
+          f"executor kicks {len(result.succeeded)} ({len(result.failed)} failed)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
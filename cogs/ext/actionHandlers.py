@@ -4,6 +4,8 @@ import discord
 
 from cogs.ext.imports import *
 from cogs.ext.utils import utils
+from cogs.ext.role_planner import RolePlanner
+from cogs.ext.target_executor import targetExecutor
 
 
 async def actionBanUsers(members: List[discord.Member], reason: str):
@@ -17,15 +19,19 @@ async def actionUnbanUsers(members: List[discord.Member], reason: str):
 
 
 async def actionRemoveUserRoles(roles: Dict[discord.Role, List[discord.Member]], reason: str):
-    for role, members in roles.items():
-        for member in members:
-            await utils.removeRole(member, role, reason=reason)
+    planner = RolePlanner()
+    planner.removeAll(roles)
+    result = await planner.apply(reason=reason, executor=targetExecutor,
+                                 limit=utils.configManager.getMaxConcurrentActions())
+    result.raiseFirstFailure()
 
 
 async def actionAddUserRoles(roles: Dict[discord.Role, List[discord.Member]], reason: str):
-    for role, members in roles.items():
-        for member in members:
-            await utils.addRole(member, role, reason=reason)
+    planner = RolePlanner()
+    planner.addAll(roles)
+    result = await planner.apply(reason=reason, executor=targetExecutor,
+                                 limit=utils.configManager.getMaxConcurrentActions())
+    result.raiseFirstFailure()
 
 
 async def actionRemoveUserTimeout(timeoutMembers: List[discord.Member], reason: str):
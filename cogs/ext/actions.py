@@ -1,6 +1,9 @@
 import discord
 
 from cogs.ext.imports import *
+from cogs.ext import messages, buttons
+from cogs.ext.role_planner import RolePlanner
+from cogs.ext.target_executor import targetExecutor
 
 async def handleActionMessages(bot: commands.Bot, messages_names: list, commandName: str,
                                executionPath: str, placeholders: dict, interaction: discord.Interaction | None = None,
@@ -21,13 +24,11 @@ async def handleCogCommandExecution(bot: commands.Bot, cog: commands.Cog,
                                     executionPath: str, placeholders: dict,
                                     interaction: discord.Interaction | None = None,
                                     ctx: discord.ext.commands.context.Context | None = None):
-    for co in cog.get_app_commands():
-        if co.name == command.name:
-            try:
-                await command.callback(cog, interaction if interaction is not None else ctx, *finalArgs)
-            except Exception as e:
-                await messages.handleError(bot, command.name, executionPath, e, placeholders=placeholders,
-                                           ctx=ctx, interaction=interaction)
+    try:
+        await command.callback(cog, interaction if interaction is not None else ctx, *finalArgs)
+    except Exception as e:
+        await messages.handleError(bot, command.name, executionPath, e, placeholders=placeholders,
+                                   ctx=ctx, interaction=interaction)
 
 
 async def handleActionCommands(bot: commands.Bot, commandsData: list, executedPath: str,
@@ -42,50 +43,103 @@ async def handleActionCommands(bot: commands.Bot, commandsData: list, executedPa
             break
         command = str(singleCommandData.get("command"))
         isCommandApp = str(singleCommandData.get("type", "")) == "app"
-        comm = bot.tree.get_command(command) if isCommandApp else bot.get_command(command)
-        if comm is not None:
+        registered = utils.configManager.commandRegistry.get(bot, command, isCommandApp)
+        if registered is not None:
+            cog, comm = registered
+            # a copy, the placeholders must not be replaced in the config data itself
             args = singleCommandData.get("args", [])
-            if not isinstance(args, list):
-                args = []
+            args = list(args) if isinstance(args, list) else []
 
             for placeholder in placeholders.keys():
                 if placeholder in args:
                     ind = args.index(placeholder)
                     args.pop(ind)
-                    args.insert(ind, placeholders.get(placeholder))
-
-            executed = False
-            for name, file_name in utils.configManager.getCogData().items():
-                cog: commands.Cog = bot.get_cog(name)
-                for cogCommand in cog.get_app_commands() if isCommandApp else cog.get_commands():
-                    if cogCommand.name == comm.name:
-                        try:
-                            await bot.load_extension(f"cogs.{file_name}")
-                        except commands.ExtensionAlreadyLoaded:
-                            await handleCogCommandExecution(bot, cog, comm, args, executedPath, placeholders,
-                                                            interaction=interaction, ctx=ctx)
-                            executed = True
-                        else:
-                            await bot.unload_extension(f"cogs.{file_name}")
-                        break
-                if executed:
-                    break
-
-
-def startBackgroundTask(taskArgs: dict, function = None, functionArgs = None):
-    taskArgs["function"] = function
-    taskArgs["functionArgs"] = functionArgs
-    async def wait(tasks: dict):
-        try:
-            await asyncio.sleep(tasks["duration"])
-            await tasks["function"](*tasks["functionArgs"])
-        except Exception as e:
-            await messages.handleError(tasks["bot"], tasks["commandName"], tasks["executedPath"], e,
-                                       placeholders=tasks["placeholders"], interaction=tasks["interaction"],
-                                       ctx=tasks["ctx"])
-
-    threading.Thread(target=utils.separateThread, args=(asyncio.get_running_loop(), wait, taskArgs),
-                     daemon=True).start()
+                    args.insert(ind, placeholders_utils.resolveValue(placeholders.get(placeholder)))
+
+            await handleCogCommandExecution(bot, cog, comm, args, executedPath, placeholders,
+                                            interaction=interaction, ctx=ctx)
+
+
+def scheduledErrorHandler(taskArgs: dict):
+    async def onError(e: Exception):
+        await messages.handleError(taskArgs["bot"], taskArgs["commandName"], taskArgs["executedPath"], e,
+                                   placeholders=taskArgs.get("placeholders", dict()),
+                                   interaction=taskArgs["interaction"], ctx=taskArgs["ctx"])
+    return onError
+
+
+async def startBackgroundTask(taskArgs: dict, function = None, functionArgs = None):
+    # guild objects and their previous data can't be stored, these reversals only live until a restart
+    await utils.configManager.scheduler.schedule(taskArgs["duration"], getattr(function, "__name__", "callback"),
+                                                 guildId=getattr(taskArgs.get("guild", None), "id", None),
+                                                 description="from " + str(taskArgs["commandName"]),
+                                                 callback=lambda: function(*functionArgs),
+                                                 onError=scheduledErrorHandler(taskArgs))
+
+
+# reversal kind -> action run on the members still in the guild when the job is due
+MEMBER_REVERSALS = {"timeout_remove": actionRemoveUserTimeout, "deafen": actionUserDeafen,
+                    "deafen_remove": actionRemoveUserDeafen, "mute": actionUserMute,
+                    "mute_remove": actionRemoveUserMute}
+REVERSAL_KINDS = ("ban", "unban", "role_add", "role_remove") + tuple(MEMBER_REVERSALS.keys())
+
+
+async def scheduleReversal(duration: int, kind: str, guild: discord.Guild, targets, reason: str,
+                           description: str = "", onError=None):
+    """
+    Stores a reversal that runs `kind` after `duration` seconds, also after a restart.
+    `targets` are members, or {role: [members]} for role_add and role_remove; only their ids are kept.
+    """
+    if isinstance(targets, dict):
+        payload = {"roles": {str(role.id): [member.id for member in members] for role, members in targets.items()}}
+        count = len({member.id for members in targets.values() for member in members})
+    else:
+        payload = {"members": [member.id for member in targets]}
+        count = len(targets)
+    payload["reason"] = reason
+    return await utils.configManager.scheduler.schedule(duration, kind, payload, guildId=guild.id,
+                                                        description=(f"{kind} {count} member(s)" +
+                                                                     (" " + description if description else "")),
+                                                        onError=onError)
+
+
+async def runReversal(bot: commands.Bot, job):
+    guild = bot.get_guild(job.guildId) if job.guildId is not None else None
+    if guild is None:
+        raise Exception(f"Couldn't find guild {job.guildId} for the scheduled {job.kind}")
+    reason = str(job.payload.get("reason", ""))
+    if job.kind == "role_add" or job.kind == "role_remove":
+        roles: dict = dict()
+        for roleId, memberIds in dict(job.payload.get("roles", {})).items():
+            role = guild.get_role(int(roleId))
+            members = [member for member in (guild.get_member(memberId) for memberId in memberIds)
+                       if member is not None]
+            if role is not None and len(members) > 0:
+                roles[role] = members
+        if job.kind == "role_add":
+            await actionAddUserRoles(roles, reason)
+        else:
+            await actionRemoveUserRoles(roles, reason)
+    elif job.kind == "ban" or job.kind == "unban":
+        # banned users aren't members anymore, the guild calls only need their id
+        users = [discord.Object(id=memberId) for memberId in job.payload.get("members", [])]
+        operation = guild.ban if job.kind == "ban" else guild.unban
+        result = await targetExecutor.run(users, lambda user: operation(user, reason=reason),
+                                          limit=utils.configManager.getMaxConcurrentActions())
+        if len(result.failed) > 0:
+            # the retry only goes through the users that failed
+            job.payload["members"] = [user.id for user, error in result.failed]
+        result.raiseFirstFailure()
+    else:
+        members = [member for member in (guild.get_member(memberId) for memberId in job.payload.get("members", []))
+                   if member is not None]
+        await MEMBER_REVERSALS[job.kind](members, reason)
+
+
+async def startScheduler(bot: commands.Bot):
+    for kind in REVERSAL_KINDS:
+        utils.configManager.scheduler.register(kind, lambda job: runReversal(bot, job))
+    await utils.configManager.scheduler.start()
 
 
 def checkIFAnyValuableData(listData: list) -> str:
@@ -95,6 +149,21 @@ def checkIFAnyValuableData(listData: list) -> str:
     return ""
 
 
+async def __runForTargets(targets: list, operation, describe, bot: commands.Bot, commandName: str,
+                          executedPath: str, placeholders: dict, interaction: discord.Interaction | None = None,
+                          ctx: discord.ext.commands.context.Context | None = None) -> list:
+    result = await targetExecutor.run(targets, operation, limit=utils.configManager.getMaxConcurrentActions())
+    if len(result.failed) > 0:
+        # one report per action, not one per member
+        target, e = result.failed[0]
+        message = describe(target)
+        if len(result.failed) > 1:
+            message += f" (and {len(result.failed) - 1} more)"
+        await messages.handleError(bot, commandName, executedPath, {"error": e, "message": message},
+                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
+    return result.succeeded
+
+
 async def handleUser(userData: dict, bot: commands.Bot, commandName: str,
                      executedPath: str, placeholders: dict, interaction: discord.Interaction | None = None,
                      ctx: discord.ext.commands.context.Context | None = None):
@@ -114,388 +183,134 @@ async def handleUser(userData: dict, bot: commands.Bot, commandName: str,
                                        placeholders=placeholders, interaction=interaction, ctx=ctx)
             break
         user = interaction.user if interaction is not None else ctx.author
-        defaultArguments = {"bot": bot, "interaction": interaction, "duration": -1, "commandName": commandName,
-                            "executedPath": executedPath, "ctx": ctx}
         if userDo not in ["ban", "unban", "kick", "role_add", "role_remove",
                           "timeout", "deafen", "deafen_remove", "mute", "mute_remove"]:
             continue
 
         executedPath = await handleExecutionPathFormat(executedPath, userDo)
+        errorArguments = {"bot": bot, "commandName": commandName, "executedPath": executedPath,
+                          "placeholders": placeholders, "interaction": interaction, "ctx": ctx}
+        onReversalError = scheduledErrorHandler(errorArguments)
 
         guild = interaction.guild if interaction is not None else ctx.guild
-        if userDo == "ban":
-            for i in range(len(userDoDataList)):
-                userDoData = userDoDataList[i]
-                reason = str(userDoData.get("reason", ""))
-
-                usersBanned: list = []
-                if bool(userDoData.get("interact_both", True)):
-                    try:
-                        await utils.banUser(user, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath, {"error": e,
-                                 "message": f"Couldn't ban user {user.name} : {user.id} for reason {reason}"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                    else:
-                        usersBanned.append(user)
-
-                for userToBan in utils.getMembers(userDoData, guild):
-                    try:
-                        await utils.banUser(userToBan, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath, {"error": e,
-                                                                                    "message": f"Couldn't ban user {userToBan.name} : {userToBan.id} for reason {reason}"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                        break
-                    else:
-                        usersBanned.append(userToBan)
-
-                duration: int = int(userDoData.get("duration", -1))
+        for userDoData in userDoDataList:
+            duration: int = int(userDoData.get("duration", -1))
+            reason = str(userDoData.get("reason", ""))
+            targets: list = [user] if bool(userDoData.get("interact_both", True)) else []
+            if userDo == "unban":
+                targets = await utils.getBannedMembers(userDoData, guild)
+            else:
+                targets += utils.getMembers(userDoData, guild)
+
+            if userDo == "ban":
+                usersBanned = await __runForTargets(
+                    targets, lambda member: utils.banUser(member, reason=reason),
+                    lambda member: f"Couldn't ban user {member.name} : {member.id} for reason {reason}",
+                    **errorArguments)
                 if duration > 0 and len(usersBanned) > 0:
-                    defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionUnbanUsers,
-                                        functionArgs=[usersBanned, str(userDoData.get("unban_reason", ""))])
-        elif userDo == "unban":
-            for i in range(len(userDoDataList)):
-                userDoData = userDoDataList[i]
-                duration: int = int(userDoData.get("duration", -1))
-                reason = str(userDoData.get("reason", ""))
-
-                usersUnbanned: list = []
-                for resUser in utils.getBannedMembers(userDoData, guild):
-                    try:
-                        await utils.unbanUser(resUser, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"error": e,
-                                                    "message":
-                                                        f"Couldn't unban user "+
-                                                        f"{resUser.name} : {resUser.id} for reason {reason}"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                        break
-                    else:
-                        usersUnbanned.append(user)
-
+                    await scheduleReversal(duration, "unban", guild, usersBanned,
+                                           str(userDoData.get("unban_reason", "")), onError=onReversalError)
+            elif userDo == "unban":
+                usersUnbanned = await __runForTargets(
+                    targets, lambda member: utils.unbanUser(member, reason=reason, guild=guild),
+                    lambda member: f"Couldn't unban user {member.name} : {member.id} for reason {reason}",
+                    **errorArguments)
                 if duration > 0 and len(usersUnbanned) > 0:
-                    defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionBanUsers,
-                                        functionArgs=[usersUnbanned, str(userDoData.get("unban_reason", ""))])
-        elif userDo == "kick":
-            for i in range(len(userDoDataList)):
-                userDoData = userDoDataList[i]
-                users: list = utils.getMembers(userDoData, guild)
-                reason = str(userDoData.get("reason", ""))
-                if bool(userDoData.get("interact_both", True)):
-                    try:
-                        await utils.kickUser(user, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"error": e,
-                                                    "message":
-                                                        f"Couldn't kick user {user.name} : {user.id} for reason {reason}"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-
-                for resUser in users:
-                    try:
-                        await utils.kickUser(resUser, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"error": e,
-                                                    "message":
-                                                        f"Couldn't kick user {resUser.name} : {resUser.id} for reason {reason}"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                        break
-        elif userDo == "role_add":
-            for i in range(len(userDoDataList)):
-                userDoData = userDoDataList[i]
-                duration: int = int(userDoData.get("duration", -1))
-                users: list = utils.getMembers(userDoData, guild)
-                reason = str(userDoData.get("reason", ""))
-
-                roleAdded: dict = dict()
-                for role in utils.getRoles(userDoData, guild):
-                    roleAdded[role] = []
-                    if bool(userDoData.get("interact_both", True)):
-                        try:
-                            await utils.addRole(user, role, reason=reason)
-                        except Exception as e:
-                            await messages.handleError(bot, commandName, executedPath,
-                                                       {"error": e, "message":
-                    f"Couldn't add role {role.name} : {role.id} to user {user.name} : {user.id} for reason {reason}"},
-                                                       placeholders=placeholders, interaction=interaction, ctx=ctx)
+                    await scheduleReversal(duration, "ban", guild, usersUnbanned,
+                                           str(userDoData.get("unban_reason", "")), onError=onReversalError)
+            elif userDo == "kick":
+                await __runForTargets(
+                    targets, lambda member: utils.kickUser(member, reason=reason),
+                    lambda member: f"Couldn't kick user {member.name} : {member.id} for reason {reason}",
+                    **errorArguments)
+            elif userDo == "role_add" or userDo == "role_remove":
+                isAdd = userDo == "role_add"
+                roles = utils.getRoles(userDoData, guild)
+                planner = RolePlanner()
+                for member in targets:
+                    for role in roles:
+                        if isAdd:
+                            planner.add(member, role)
                         else:
-                            roleAdded[role].append(user)
-
-                    for resUser in users:
-                        try:
-                            await utils.addRole(resUser, role, reason=reason)
-                        except Exception as e:
-                            await messages.handleError(bot, commandName, executedPath,
-                                                       {"error": e,
-                                                        "message":
-                                                            f"Couldn't add role {role.name} : {role.id} to user {resUser.name} : {resUser.id} for reason {reason}"},
-                                                       placeholders=placeholders, interaction=interaction, ctx=ctx)
-                            break
-                        else:
-                            roleAdded[role].append(resUser)
-                hasData = False
-                for itemK, itemV in roleAdded.items():
-                    if len(itemV) > 0:
-                        hasData = True
-                        break
-                if duration > 0 and hasData:
-                    defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionRemoveUserRoles,
-                                        functionArgs=[roleAdded, str(userDoData.get("role_remove_reason", ""))])
-        elif userDo == "role_remove":
-            for i in range(len(userDoDataList)):
-                userDoData = userDoDataList[i]
-                duration: int = int(userDoData.get("duration", -1))
-                users: list = utils.getMembers(userDoData, guild)
-                reason = str(userDoData.get("reason", ""))
-
-                roleRemoved: dict = dict()
-                for role in utils.getRoles(userDoData, guild):
-                    roleRemoved[role] = []
-                    if bool(userDoData.get("interact_both", True)):
-                        try:
-                            await utils.removeRole(user, role, reason=reason)
-                        except Exception as e:
-                            await messages.handleError(bot, commandName, executedPath,
-                                                       {"error": e, "message":
-                                                           f"Couldn't remove role " +
-                                                           f"{role.name} : {role.id} to user " +
-                                                           f"{user.name} : {user.id} for reason {reason}"},
-                                                       placeholders=placeholders, interaction=interaction, ctx=ctx)
-                        else:
-                            roleRemoved[role].append(user)
-                    for resUser in users:
-                        try:
-                            await utils.removeRole(resUser, role, reason=reason)
-                        except Exception as e:
-                            await messages.handleError(bot, commandName, executedPath,
-                                                       {"error": e, "message":
-                                                           f"Couldn't remove role " +
-                                                           f"{role.name} : {role.id} to user " +
-                                                           f"{resUser.name} : {resUser.id} for reason {reason}"},
-                                                       placeholders=placeholders, interaction=interaction, ctx=ctx)
-                            break
-                        else:
-                            roleRemoved[role].append(resUser)
-                hasData = False
-                for itemK, itemV in roleRemoved.items():
-                    if len(itemV) > 0:
-                        hasData = True
-                        break
-                if duration > 0 and hasData:
-                    defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionAddUserRoles,
-                                        functionArgs=[roleRemoved, str(userDoData.get("role_add_reason", ""))])
-        elif userDo == "timeout":
-            for i in range(len(userDoDataList)):
-                userDoData = userDoDataList[i]
-                duration: int = int(userDoData.get("duration", -1))
-                reason = str(userDoData.get("reason", ""))
+                            planner.remove(member, role)
+                # only what really changed, so restoring never touches roles the member had before
+                plannedMembers = planner.getMembers()
+                plannedChanges = {member.id: planner.getChanges(member)[0 if isAdd else 1]
+                                  for member in plannedMembers}
+                changedMembers = await __runForTargets(
+                    plannedMembers, lambda member: planner.applyTo(member, reason=reason),
+                    lambda member: (f"Couldn't {'add' if isAdd else 'remove'} roles " +
+                                    ", ".join(f"{role.name} : {role.id}" for role in plannedChanges[member.id]) +
+                                    f" {'to' if isAdd else 'from'} user {member.name} : {member.id} " +
+                                    f"for reason {reason}"),
+                    **errorArguments)
+                roleChanged: dict = dict()
+                for member in changedMembers:
+                    for role in plannedChanges[member.id]:
+                        roleChanged.setdefault(role, []).append(member)
+                if duration > 0 and len(roleChanged) > 0:
+                    if isAdd:
+                        await scheduleReversal(duration, "role_remove", guild, roleChanged,
+                                               str(userDoData.get("role_remove_reason", "")), onError=onReversalError)
+                    else:
+                        await scheduleReversal(duration, "role_add", guild, roleChanged,
+                                               str(userDoData.get("role_add_reason", "")), onError=onReversalError)
+            elif userDo == "timeout":
                 if "until" not in userDoData.keys():
                     await messages.handleError(bot, commandName, executedPath,
                                                "Until data is invalid! Format expected: " +
                                                "YEAR-MOUNT-DAYTHOURS:MINS:SECONDS Like: 2024-06-09T04:12:52",
                                                placeholders=placeholders, interaction=interaction, ctx=ctx)
                     break
-                else:
-                    try:
-                        until_datetime = datetime.strptime(str(userDoData.get("until")),
-                                                           "YYYY-MM-DDTHH:MM:SS")
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"error": e, "message":
-                                                       "Until data is invalid! Format expected: " +
-                                                       "YEAR-MOUNT-DAYTHOURS:MINS:SECONDS Like: 2024-06-09T04:12:52"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                        break
+                try:
+                    until_datetime = datetime.strptime(str(userDoData.get("until")),
+                                                       "YYYY-MM-DDTHH:MM:SS")
+                except Exception as e:
+                    await messages.handleError(bot, commandName, executedPath,
+                                               {"error": e, "message":
+                                                   "Until data is invalid! Format expected: " +
+                                                   "YEAR-MOUNT-DAYTHOURS:MINS:SECONDS Like: 2024-06-09T04:12:52"},
+                                               placeholders=placeholders, interaction=interaction, ctx=ctx)
+                    break
                 timeout_datetime = datetime.now() + timedelta(
                     days=until_datetime.year * 365 + until_datetime.month * 30 +
                          until_datetime.day, hours=until_datetime.hour,
                     minutes=until_datetime.minute, seconds=until_datetime.second)
-                timeoutedMembers: list = []
-                if bool(userDoData.get("interact_both", True)):
-                    try:
-                        await utils.timeoutUser(user, datetime.now().strptime, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"error": e, "message":
-                                                       f"Couldn't timeout user {user.name} : {user.id} to date " +
-                                                       f"{timeout_datetime}"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-
-                    else:
-                        timeoutedMembers.append(user)
-                for resUser in utils.getMembers(userDoData, guild):
-                    try:
-                        await utils.timeoutUser(resUser, timeout_datetime, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"error": e, "message":
-                                                       f"Couldn't timeout user " +
-                                                       f"{resUser.name} : {resUser.id} to date {timeout_datetime}"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                        break
-                    else:
-                        timeoutedMembers.append(resUser)
+                timeoutedMembers = await __runForTargets(
+                    targets, lambda member: utils.timeoutUser(member, timeout_datetime, reason=reason),
+                    lambda member: f"Couldn't timeout user {member.name} : {member.id} to date {timeout_datetime}",
+                    **errorArguments)
                 if duration > 0 and len(timeoutedMembers) > 0:
-                    defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionRemoveUserTimeout,
-                                        functionArgs=[timeoutedMembers,
-                                                      str(userDoData.get("timeout_remove_reason", ""))])
-        elif userDo == "deafen":
-            for i in range(len(userDoDataList)):
-                userDoData = userDoDataList[i]
-                duration: int = int(userDoData.get("duration", -1))
-                reason = str(userDoData.get("reason", ""))
-
-                deafenMembers: list = []
-                if bool(userDoData.get("interact_both", True)):
-                    try:
-                        await utils.userDeafen(user, True, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"message":
-                                                        f"Couldn't deafen user " +
-                                                        f"{user.name} : {user.id} for reason {reason}",
-                                                    "error": e},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                    else:
-                        deafenMembers.append(user)
-                for resUser in utils.getMembers(userDoData, guild):
-                    try:
-                        await utils.userDeafen(resUser, True, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"message":
-                                                        f"Couldn't deafen user " +
-                                                        f"{resUser.name} : {resUser.id} for reason {reason}",
-                                                    "error": e},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                        break
-                    else:
-                        deafenMembers.append(resUser)
-
-                if duration > 0 and len(deafenMembers) > 0:
-                    defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionRemoveUserDeafen,
-                                        functionArgs=[deafenMembers, str(userDoData.get("deafen_remove_reason", ""))])
-        elif userDo == "deafen_remove":
-            for i in range(len(userDoDataList)):
-                userDoData = userDoDataList[i]
-                duration: int = int(userDoData.get("duration", -1))
-                users: list = utils.getMembers(userDoData, guild)
-                reason = str(userDoData.get("reason", ""))
-
-                removeDeafenMembers: list = []
-                if bool(userDoData.get("interact_both", True)):
-                    try:
-                        await utils.userDeafen(user, False, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"message":
-                                                        f"Couldn't undeafen user " +
-                                                        f"{user.name} : {user.id} for reason {reason}",
-                                                    "error": e},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                    else:
-                        removeDeafenMembers.append(user)
-                for resUser in users:
-                    try:
-                        await utils.userDeafen(resUser, False, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"error": e, "message":
-                                                       f"Couldn't undeafen user " +
-                                                       f"{resUser.name} : {resUser.id} for reason {reason}"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                        break
+                    await scheduleReversal(duration, "timeout_remove", guild, timeoutedMembers,
+                                           str(userDoData.get("timeout_remove_reason", "")), onError=onReversalError)
+            elif userDo == "deafen" or userDo == "deafen_remove":
+                isDeafen = userDo == "deafen"
+                changedMembers = await __runForTargets(
+                    targets, lambda member: utils.userDeafen(member, isDeafen, reason=reason),
+                    lambda member: (f"Couldn't {'deafen' if isDeafen else 'undeafen'} user " +
+                                    f"{member.name} : {member.id} for reason {reason}"),
+                    **errorArguments)
+                if duration > 0 and len(changedMembers) > 0:
+                    if isDeafen:
+                        await scheduleReversal(duration, "deafen_remove", guild, changedMembers,
+                                               str(userDoData.get("deafen_remove_reason", "")), onError=onReversalError)
                     else:
-                        removeDeafenMembers.append(resUser)
-
-                if duration > 0 and len(removeDeafenMembers) > 0:
-                    defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionUserDeafen,
-                                        functionArgs=[removeDeafenMembers, str(userDoData.get("deafen_reason", ""))])
-        elif userDo == "mute":
-            for i in range(len(userDoDataList)):
-                userDoData = userDoDataList[i]
-                duration: int = int(userDoData.get("duration", -1))
-                users: list = utils.getMembers(userDoData, guild)
-                reason = str(userDoData.get("reason", ""))
-                removeMutedMembers: list = []
-
-                if bool(userDoData.get("interact_both", True)):
-                    try:
-                        await utils.userMute(user, True, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"message":
-                                                        f"Couldn't muted user " +
-                                                        f"{user.name} : {user.id} for reason {reason}",
-                                                    "error": e},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                    else:
-                        removeMutedMembers.append(user)
-                for resUser in users:
-                    try:
-                        await utils.userMute(resUser, True, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"message":
-                                                        f"Couldn't muted user " +
-                                                        f"{resUser.name} : {resUser.id} for reason {reason}",
-                                                    "error": e},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                        break
-                    else:
-                        removeMutedMembers.append(resUser)
-
-                if duration > 0 and len(removeMutedMembers) > 0:
-                    defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionRemoveUserMute,
-                                        functionArgs=[removeMutedMembers,
-                                                      str(userDoData.get("mute_remove_reason", ""))])
-        elif userDo == "mute_remove":
-            for i in range(len(userDoDataList)):
-                userDoData = userDoDataList[i]
-                duration: int = int(userDoData.get("duration", -1))
-                users: list = utils.getMembers(userDoData, guild)
-                reason = str(userDoData.get("reason", ""))
-                removeMutedMembers: list = []
-                if bool(userDoData.get("interact_both", True)):
-                    try:
-                        await utils.userMute(user, False, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"error": e,
-                                                    "message": f"Couldn't unmute user " +
-                                                               f"{user.name} : {user.id} for reason {reason}"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
+                        await scheduleReversal(duration, "deafen", guild, changedMembers,
+                                               str(userDoData.get("deafen_reason", "")), onError=onReversalError)
+            elif userDo == "mute" or userDo == "mute_remove":
+                isMute = userDo == "mute"
+                changedMembers = await __runForTargets(
+                    targets, lambda member: utils.userMute(member, isMute, reason=reason),
+                    lambda member: (f"Couldn't {'muted' if isMute else 'unmute'} user " +
+                                    f"{member.name} : {member.id} for reason {reason}"),
+                    **errorArguments)
+                if duration > 0 and len(changedMembers) > 0:
+                    if isMute:
+                        await scheduleReversal(duration, "mute_remove", guild, changedMembers,
+                                               str(userDoData.get("mute_remove_reason", "")), onError=onReversalError)
                     else:
-                        removeMutedMembers.append(user)
-
-                for resUser in users:
-                    try:
-                        await utils.userMute(resUser, False, reason=reason)
-                    except Exception as e:
-                        await messages.handleError(bot, commandName, executedPath,
-                                                   {"error": e,
-                                                    "message": f"Couldn't unmute user " +
-                                                               f"{resUser.name} : {resUser.id} for reason {reason}"},
-                                                   placeholders=placeholders, interaction=interaction, ctx=ctx)
-                        break
-                    else:
-                        removeMutedMembers.append(resUser)
-
-                if duration > 0 and len(removeMutedMembers) > 0:
-                    defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionUserMute,
-                                        functionArgs=[removeMutedMembers, str(userDoData.get("mute_reason", ""))])
+                        await scheduleReversal(duration, "mute", guild, changedMembers,
+                                               str(userDoData.get("mute_reason", "")), onError=onReversalError)
 
 
 async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
@@ -503,7 +318,7 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                       ctx: discord.ext.commands.context.Context | None = None):
     guild = interaction.guild if interaction is not None else ctx.guild
     defaultArguments = {"bot": bot, "interaction": interaction, "duration": -1, "commandName": commandName,
-                        "executedPath": executedPath, "ctx": ctx}
+                        "executedPath": executedPath, "ctx": ctx, "guild": guild, "placeholders": placeholders}
     for guildToDo in guildData.keys():
         listData = guildData.get(guildToDo, [])
         if not isinstance(listData, list):
@@ -546,8 +361,8 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(rolesData.get("duration", -1))
                 if duration > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=utils.deleteRole,
-                                        functionArgs=[role, str(rolesData.get("role_delete_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=utils.deleteRole,
+                                              functionArgs=[role, str(rolesData.get("role_delete_reason", ""))])
         elif guildToDo == "role_delete":
             for i in range(len(listData)):
                 rolesData = listData[i]
@@ -568,10 +383,10 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(rolesData.get("duration", -1))
                 if duration > 0 and len(roles) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionCreateRole,
-                                        functionArgs=[roles, str(rolesData.get("role_create_reason", "")),
-                                                      bool(rolesData.get("give_back_roles_to_users", False)),
-                                                      str(rolesData.get("give_back_reason", "")), guild])
+                    await startBackgroundTask(defaultArguments, function=actionCreateRole,
+                                              functionArgs=[roles, str(rolesData.get("role_create_reason", "")),
+                                                            bool(rolesData.get("give_back_roles_to_users", False)),
+                                                            str(rolesData.get("give_back_reason", "")), guild])
         elif guildToDo == "role_edit":
             for i in range(len(listData)):
                 rolesData = listData[i]
@@ -593,8 +408,8 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(rolesData.get("duration", -1))
                 if duration > 0 and len(edited) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionRoleEdit,
-                                        functionArgs=[edited, str(rolesData.get("role_edit_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=actionRoleEdit,
+                                              functionArgs=[edited, str(rolesData.get("role_edit_reason", ""))])
         elif guildToDo == "overview":
             for i in range(len(listData)):
                 overviewData = listData[i]
@@ -618,8 +433,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(overviewData.get("duration", -1))
                 if duration > 0 and len(prevData) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=utils.editGuild,
-                                        functionArgs=[prevData, guild, str(overviewData.get("guild_edit_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=utils.editGuild,
+                                              functionArgs=[prevData, guild,
+                                                            str(overviewData.get("guild_edit_reason", ""))])
         elif guildToDo == "category_create":
             for i in range(len(listData)):
                 categoryData = listData[i]
@@ -636,8 +452,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(categoryData.get("duration", -1))
                 if duration > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=utils.deleteCategory,
-                                        functionArgs=[category, str(categoryData.get("category_delete_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=utils.deleteCategory,
+                                              functionArgs=[category,
+                                                            str(categoryData.get("category_delete_reason", ""))])
         elif guildToDo == "category_delete":
             for i in range(len(listData)):
                 categoryData = listData[i]
@@ -662,9 +479,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(categoryData.get("duration", -1))
                 if duration > 0 and len(deletedCategories) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionCategoryCreate,
-                                        functionArgs=[deletedCategories,
-                                                      str(categoryData.get("category_delete_reason", "")), guild])
+                    await startBackgroundTask(defaultArguments, function=actionCategoryCreate,
+                                              functionArgs=[deletedCategories,
+                                                            str(categoryData.get("category_delete_reason", "")), guild])
         elif guildToDo == "category_edit":
             for i in range(len(listData)):
                 categoryData = listData[i]
@@ -689,9 +506,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(categoryData.get("duration", -1))
                 if duration > 0 and len(editedCategories) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionCategoryEdit,
-                                        functionArgs=[editedCategories,
-                                                      str(categoryData.get("category_edit_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=actionCategoryEdit,
+                                              functionArgs=[editedCategories,
+                                                            str(categoryData.get("category_edit_reason", ""))])
         elif guildToDo == "channel_create":
             for i in range(len(listData)):
                 channelData = listData[i]
@@ -709,9 +526,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(channelData.get("duration", -1))
                 if duration > 0 and len(channels) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionChannelDelete,
-                                        functionArgs=[channels,
-                                                      str(channelData.get("channel_delete_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=actionChannelDelete,
+                                              functionArgs=[channels,
+                                                            str(channelData.get("channel_delete_reason", ""))])
         elif guildToDo == "channel_delete":
             for i in range(len(listData)):
                 channelData = listData[i]
@@ -733,9 +550,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(channelData.get("duration", -1))
                 if duration > 0 and len(deletedChannels) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionChannelCreate,
-                                        functionArgs=[deletedChannels,
-                                                      str(channelData.get("channel_create_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=actionChannelCreate,
+                                              functionArgs=[deletedChannels,
+                                                            str(channelData.get("channel_create_reason", ""))])
         elif guildToDo == "channel_edit":
             for i in range(len(listData)):
                 channelData = listData[i]
@@ -760,9 +577,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(channelData.get("duration", -1))
                 if duration > 0 and len(editedChannels) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionChannelEdit,
-                                        functionArgs=[editedChannels,
-                                                      str(channelData.get("channel_edit_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=actionChannelEdit,
+                                              functionArgs=[editedChannels,
+                                                            str(channelData.get("channel_edit_reason", ""))])
         elif guildToDo == "emoji_create":
             for i in range(len(listData)):
                 stickerData = listData[i]
@@ -779,8 +596,8 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(stickerData.get("duration", -1))
                 if duration > 0 and len(stickerData) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=utils.deleteEmoji,
-                                        functionArgs=[emoji, str(stickerData.get("emoji_delete_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=utils.deleteEmoji,
+                                              functionArgs=[emoji, str(stickerData.get("emoji_delete_reason", ""))])
         elif guildToDo == "emoji_delete":
             for i in range(len(listData)):
                 stickerData = listData[i]
@@ -803,8 +620,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(stickerData.get("duration", -1))
                 if duration > 0 and len(stickerData) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionCreateEmojis,
-                                        functionArgs=[deletedEmojis, str(stickerData.get("emoji_create_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=actionCreateEmojis,
+                                              functionArgs=[deletedEmojis,
+                                                            str(stickerData.get("emoji_create_reason", ""))])
         elif guildToDo == "emoji_edit":
             for i in range(len(listData)):
                 stickerData = listData[i]
@@ -827,8 +645,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(stickerData.get("duration", -1))
                 if duration > 0 and len(stickerData) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionEditEmojis,
-                                        functionArgs=[editedStickers, str(stickerData.get("emoji_edit_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=actionEditEmojis,
+                                              functionArgs=[editedStickers,
+                                                            str(stickerData.get("emoji_edit_reason", ""))])
         elif guildToDo == "sticker_create":
             for i in range(len(listData)):
                 stickerData = listData[i]
@@ -845,8 +664,8 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(stickerData.get("duration", -1))
                 if duration > 0 and len(stickerData) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=utils.deleteSticker,
-                                        functionArgs=[sticker, str(stickerData.get("sticker_delete_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=utils.deleteSticker,
+                                              functionArgs=[sticker, str(stickerData.get("sticker_delete_reason", ""))])
         elif guildToDo == "sticker_delete":
             for i in range(len(listData)):
                 stickerData = listData[i]
@@ -869,9 +688,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(stickerData.get("duration", -1))
                 if duration > 0 and len(stickerData) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionCreateStickers,
-                                        functionArgs=[deletedSticker,
-                                                      str(stickerData.get("sticker_create_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=actionCreateStickers,
+                                              functionArgs=[deletedSticker,
+                                                            str(stickerData.get("sticker_create_reason", ""))])
         elif guildToDo == "sticker_edit":
             for i in range(len(listData)):
                 stickerData = listData[i]
@@ -894,8 +713,9 @@ async def handleGuild(guildData: dict, bot: commands.Bot, commandName: str,
                 duration: int = int(stickerData.get("duration", -1))
                 if duration > 0 and len(stickerData) > 0:
                     defaultArguments["duration"] = duration
-                    startBackgroundTask(defaultArguments, function=actionEditStickers,
-                                        functionArgs=[editedStickers, str(stickerData.get("sticker_edit_reason", ""))])
+                    await startBackgroundTask(defaultArguments, function=actionEditStickers,
+                                              functionArgs=[editedStickers,
+                                                            str(stickerData.get("sticker_edit_reason", ""))])
 
 
 async def handleExecutionPathFormat(executedPath, guildToDo):
@@ -933,6 +753,16 @@ async def handleAllActions(bot: commands.Bot, actionData: dict, interaction: dis
                                   executionPath, placeholders, interaction=interaction, ctx=ctx)
 
 
+async def handleAutomodActions(bot: commands.Bot, message: discord.Message, violation):
+    # a context for the offending message, so the actions act on its author and channel
+    ctx = await bot.get_context(message)
+    actionData: dict = dict()
+    for action in violation.rule.actions:
+        actionData[action] = utils.configManager.getActionData(action).copy()
+    await handleAllActions(bot, actionData, ctx=ctx,
+                           placeholders={utils.configManager.getReasonPlaceholder(): violation.rule.reason})
+
+
 async def handleErrorActions(bot: commands.Bot, errorPath: str, interaction: discord.Interaction | None = None,
                              ctx: discord.ext.commands.context.Context | None = None,
                              placeholders: dict = dict()):
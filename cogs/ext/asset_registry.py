@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import *
+
+from cogs.ext.guild_index import NameIndex
+
+
+class AssetIndex:
+    """A guild's emojis or stickers by id and name"""
+
+    def __init__(self, guild, items: Iterable):
+        self.guild = guild
+        items = list(items)
+        self.byId: Dict[int, Any] = {item.id: item for item in items}
+        self.names = NameIndex(items)
+        # ids and names a fetch didn't find either, they don't trigger another fetch until the next update
+        self.missing: Set = set()
+
+    def find(self, ids: list, names: list) -> tuple:
+        """(found items without duplicates, ids and names that weren't found)"""
+        found = dict()
+        missing = []
+        for itemId in ids:
+            item = self.byId.get(itemId, None)
+            if item is not None:
+                found[item.id] = item
+            elif itemId not in self.missing:
+                missing.append(itemId)
+        for name in names:
+            items = self.names.get(name)
+            for item in items:
+                found[item.id] = item
+            if len(items) == 0 and name not in self.missing:
+                missing.append(name)
+        return list(found.values()), missing
+
+    def __len__(self):
+        return len(self.byId)
+
+
+class AssetRegistry:
+    """
+    Per-guild emoji or sticker index seeded from the gateway cache (guild.emojis / guild.stickers) and
+    replaced from the on_guild_emojis_update / on_guild_stickers_update events.
+    The HTTP fetch only runs when an id or name is not in the index (a cold miss).
+    """
+
+    def __init__(self, cacheAttribute: str, fetchMethod: str, updateEvent: str):
+        self.cacheAttribute = cacheAttribute
+        self.fetchMethod = fetchMethod
+        self.updateEvent = updateEvent
+        self.bot = None
+        self.indexes: Dict[int, AssetIndex] = dict()
+        self.hits = 0
+        self.fetches = 0
+
+    def start(self, bot):
+        if self.bot is bot:
+            return
+        self.bot = bot
+        self.indexes.clear()
+        bot.add_listener(self.onUpdate, self.updateEvent)
+        bot.add_listener(self.onGuildRemove, "on_guild_remove")
+        bot.add_listener(self.onReady, "on_ready")
+
+    def get(self, guild) -> AssetIndex:
+        index = self.indexes.get(guild.id, None)
+        if index is None or index.guild is not guild:
+            # without the update listener the gateway cache is the only current source, index it every time
+            index = AssetIndex(guild, getattr(guild, self.cacheAttribute, ()))
+            if self.bot is not None:
+                self.indexes[guild.id] = index
+        return index
+
+    async def find(self, guild, ids: list, names: list) -> list:
+        index = self.get(guild)
+        found, missing = index.find(ids, names)
+        if len(missing) == 0:
+            self.hits += 1
+            return found
+
+        self.fetches += 1
+        index = AssetIndex(guild, await getattr(guild, self.fetchMethod)())
+        if self.bot is not None:
+            self.indexes[guild.id] = index
+        found, missing = index.find(ids, names)
+        index.missing.update(missing)
+        return found
+
+    def invalidate(self, guildId: int | None = None) -> int:
+        if guildId is None:
+            dropped = len(self.indexes)
+            self.indexes.clear()
+            return dropped
+        return 1 if self.indexes.pop(guildId, None) is not None else 0
+
+    async def onUpdate(self, guild, before, after):
+        self.indexes[guild.id] = AssetIndex(guild, after)
+
+    async def onGuildRemove(self, guild):
+        self.invalidate(guild.id)
+
+    async def onReady(self):
+        self.invalidate()
+
+    def getStats(self) -> dict:
+        return {"guilds": len(self.indexes), "items": sum(len(index) for index in self.indexes.values()),
+                "hits": self.hits, "fetches": self.fetches}
+
+
+emojiRegistry = AssetRegistry("emojis", "fetch_emojis", "on_guild_emojis_update")
+stickerRegistry = AssetRegistry("stickers", "fetch_stickers", "on_guild_stickers_update")
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from typing import *
+
+# also mirrored into the native AutoMod rules, the syntax has to work for Python's and Discord's (Rust) regex
+INVITE_PATTERN = r"(?i)(?:discord(?:app)?\.com/invite|discord\.gg|discord\.me)/[\w-]+"
+INVITE = re.compile(INVITE_PATTERN)
+LINK = re.compile(r"https?://([^\s/:?#<>]+)", re.IGNORECASE)
+
+# stages in the order a message goes through them, the first violation ends the pass
+STAGES = ("blacklist", "invites", "links", "mentions", "caps", "duplicates", "user_rate", "channel_rate")
+# only the blacklist was checked before the pipeline existed, the other stages are opt-in
+ENABLED_BY_DEFAULT = {"blacklist"}
+# the most messages a single channel.delete_messages call accepts
+BULK_DELETE_LIMIT = 100
+
+
+class RingBuffer:
+    """Fixed-size buffer of (time, content key, message), the oldest entry is overwritten when it is full"""
+    __slots__ = ("entries", "head", "size")
+
+    def __init__(self, capacity: int):
+        self.entries: List[tuple | None] = [None] * max(1, capacity)
+        self.head = 0
+        self.size = 0
+
+    def push(self, entry: tuple):
+        self.entries[self.head] = entry
+        self.head = (self.head + 1) % len(self.entries)
+        self.size = min(self.size + 1, len(self.entries))
+
+    def since(self, start: float) -> list:
+        """The entries newer than start, oldest first"""
+        capacity = len(self.entries)
+        found = []
+        for offset in range(self.size):
+            entry = self.entries[(self.head - self.size + offset) % capacity]
+            if entry[0] >= start:
+                found.append(entry)
+        return found
+
+    def last(self) -> float:
+        return self.entries[(self.head - 1) % len(self.entries)][0] if self.size > 0 else 0.0
+
+
+class AutomodRule:
+    __slots__ = ("name", "enabled", "delete", "actions", "reason", "cooldown", "data")
+
+    def __init__(self, name: str, data: dict):
+        self.name = name
+        self.data = data
+        self.enabled = bool(data.get("enabled", name in ENABLED_BY_DEFAULT))
+        self.delete = bool(data.get("delete", True))
+        actionList = data.get("actions", [])
+        self.actions: tuple = tuple(actionList) if isinstance(actionList, list) else ()
+        self.reason = str(data.get("reason", name))
+        # seconds before the same member triggers this rule's actions again, the messages are still deleted
+        self.cooldown = self.getNumber("cooldown", 30)
+
+    def getNumber(self, key: str, default: float) -> float:
+        value = self.data.get(key, default)
+        return value if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+class Violation:
+    __slots__ = ("rule", "messages", "runActions")
+
+    def __init__(self, rule: AutomodRule, messages: list, runActions: bool):
+        self.rule = rule
+        # the offending message first, then the earlier ones of a flood
+        self.messages = messages
+        self.runActions = runActions
+
+
+class Automod:
+    """
+    The "automod" section of config.json compiled into ordered stages that each message goes through once.
+
+    Member and channel message rates are kept in RingBuffers of "buffer_size" entries. Messages of a
+    violation are queued per channel and removed with one channel.delete_messages call per
+    "delete_delay" seconds instead of one message.delete each. The section is recompiled when it is
+    reloaded.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.rules: Dict[str, AutomodRule] | None = None
+        self.users: Dict[tuple, RingBuffer] = dict()
+        self.channels: Dict[int, RingBuffer] = dict()
+        # (guild id, member id, rule name) -> when its actions last ran
+        self.cooldowns: Dict[tuple, float] = dict()
+        # channel id -> (channel, {message id: message}) waiting for the next bulk delete
+        self.pending: Dict[int, tuple] = dict()
+        # ids already sent to a delete, a flood's earlier messages are part of several violations
+        self.deletedIds: Dict[int, None] = dict()
+        self.checked = 0
+        self.violations = 0
+        self.bulkDeletes = 0
+        self.deleted = 0
+
+    def getSection(self) -> dict:
+        section = self.config.configData.get("automod", {})
+        return section if isinstance(section, dict) else dict()
+
+    def getRules(self) -> Dict[str, AutomodRule]:
+        if self.rules is None:
+            rules = self.getSection().get("rules", {})
+            rules = rules if isinstance(rules, dict) else dict()
+            self.rules = {name: AutomodRule(name, rules.get(name) if isinstance(rules.get(name), dict) else dict())
+                          for name in STAGES}
+        return self.rules
+
+    def getNumber(self, key: str, default: float) -> float:
+        value = self.getSection().get(key, default)
+        return value if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0 else default
+
+    def isExempt(self, message) -> bool:
+        section = self.getSection()
+        if message.channel.id in section.get("exempt_channels_id", []):
+            return True
+        exemptRoles = section.get("exempt_roles_id", [])
+        return len(exemptRoles) > 0 and any(role.id in exemptRoles for role in getattr(message.author, "roles", []))
+
+    def _buffer(self, buffers: dict, key) -> RingBuffer:
+        buffer = buffers.get(key, None)
+        if buffer is None:
+            if len(buffers) >= int(self.getNumber("max_tracked", 10_000)):
+                self._prune(buffers)
+            buffer = RingBuffer(int(self.getNumber("buffer_size", 10)))
+            buffers[key] = buffer
+        return buffer
+
+    def _prune(self, buffers: dict):
+        # buffers nobody wrote to in the longest window can't take part in a violation anymore
+        rules = self.getRules()
+        window = max(rules[name].getNumber("seconds", 5) for name in ("duplicates", "user_rate", "channel_rate"))
+        cutoff = time.monotonic() - window
+        for key in [key for key, buffer in buffers.items() if buffer.last() < cutoff]:
+            del buffers[key]
+        now = time.monotonic()
+        for key in [key for key, until in self.cooldowns.items() if until < now]:
+            del self.cooldowns[key]
+
+    def check(self, message) -> Violation | None:
+        if message.guild is None or self.isExempt(message):
+            return None
+        self.checked += 1
+        rules = self.getRules()
+        now = time.monotonic()
+        content = message.content
+        contentKey = " ".join(content.casefold().split())
+        # recorded before the checks so the rates count every message
+        userBuffer = self._buffer(self.users, (message.guild.id, message.author.id))
+        userBuffer.push((now, contentKey, message))
+        channelBuffer = self._buffer(self.channels, message.channel.id)
+        channelBuffer.push((now, contentKey, message))
+
+        for name in STAGES:
+            rule = rules[name]
+            if not rule.enabled:
+                continue
+            offending = self._runStage(rule, message, content, contentKey, now, userBuffer, channelBuffer)
+            if offending is not None:
+                self.violations += 1
+                return Violation(rule, offending, self._startCooldown(rule, message, now))
+        return None
+
+    def _runStage(self, rule: AutomodRule, message, content: str, contentKey: str, now: float,
+                  userBuffer: RingBuffer, channelBuffer: RingBuffer) -> list | None:
+        name = rule.name
+        if name == "blacklist":
+            # in a guild synced to native AutoMod only the words it couldn't take are left to check
+            matcher = self.config.nativeAutomod.getMatcher(message.guild)
+            return [message] if matcher.search(content) is not None else None
+        if name == "invites":
+            if self.config.nativeAutomod.coversInvites(message.guild):
+                return None
+            return [message] if INVITE.search(content) is not None else None
+        if name == "links":
+            allowed = rule.data.get("allowed_domains", [])
+            for match in LINK.finditer(content):
+                domain = match.group(1).lower()
+                if not any(domain == item or domain.endswith("." + item) for item in allowed):
+                    return [message]
+            return None
+        if name == "mentions":
+            count = len(message.raw_mentions) + len(message.raw_role_mentions) + int(message.mention_everyone)
+            return [message] if count > rule.getNumber("max", 5) else None
+        if name == "caps":
+            letters = [char for char in content if char.isalpha()]
+            if len(letters) < rule.getNumber("min_length", 12):
+                return None
+            upper = sum(1 for char in letters if char.isupper())
+            return [message] if upper / len(letters) >= rule.getNumber("ratio", 0.7) else None
+        if name == "duplicates":
+            if len(contentKey) == 0:
+                return None
+            same = [entry[2] for entry in userBuffer.since(now - rule.getNumber("seconds", 30))
+                    if entry[1] == contentKey]
+            return same[::-1] if len(same) >= rule.getNumber("count", 3) else None
+        if name in ("user_rate", "channel_rate"):
+            buffer = userBuffer if name == "user_rate" else channelBuffer
+            recent = [entry[2] for entry in buffer.since(now - rule.getNumber("seconds", 5))]
+            return recent[::-1] if len(recent) >= rule.getNumber("count", 6) else None
+        return None
+
+    def _startCooldown(self, rule: AutomodRule, message, now: float) -> bool:
+        if len(rule.actions) == 0:
+            return False
+        key = (message.guild.id, message.author.id, rule.name)
+        if self.cooldowns.get(key, 0.0) > now:
+            return False
+        self.cooldowns[key] = now + rule.cooldown
+        return True
+
+    def deleteLater(self, messages: list):
+        for message in messages:
+            if message.id in self.deletedIds:
+                continue
+            self.deletedIds[message.id] = None
+            if len(self.deletedIds) > 4096:
+                del self.deletedIds[next(iter(self.deletedIds))]
+            queued = self.pending.get(message.channel.id, None)
+            if queued is None:
+                queued = (message.channel, dict())
+                self.pending[message.channel.id] = queued
+                asyncio.get_running_loop().create_task(self._flush(message.channel.id))
+            queued[1][message.id] = message
+
+    async def _flush(self, channelId: int):
+        await asyncio.sleep(self.getNumber("delete_delay", 1.0))
+        channel, queued = self.pending.pop(channelId, (None, dict()))
+        found = list(queued.values())
+        for start in range(0, len(found), BULK_DELETE_LIMIT):
+            chunk = found[start:start + BULK_DELETE_LIMIT]
+            if hasattr(channel, "delete_messages"):
+                try:
+                    await channel.delete_messages(chunk, reason="automod")
+                    self.bulkDeletes += 1
+                    self.deleted += len(chunk)
+                    continue
+                except Exception as e:
+                    print(f"Automod could not bulk delete {len(chunk)} messages in channel {channelId}, "
+                          f"deleting them one by one: {e}")
+            for message in chunk:
+                await self._deleteOne(message)
+
+    async def _deleteOne(self, message):
+        try:
+            await message.delete()
+            self.deleted += 1
+        except Exception as e:
+            if getattr(e, "status", None) == 404:
+                return
+            # forgotten so the next violation of the same message queues it again
+            self.deletedIds.pop(message.id, None)
+            print(f"Automod could not delete message {message.id}: {e}")
+
+    def invalidate(self) -> int:
+        dropped = len(self.rules) if self.rules is not None else 0
+        self.rules = None
+        self.users.clear()
+        self.channels.clear()
+        self.cooldowns.clear()
+        return dropped
+
+    def onReload(self, changedKeys: set) -> int:
+        return self.invalidate() if ("config", "automod") in changedKeys else 0
+
+    def getStats(self) -> dict:
+        return {"checked": self.checked, "violations": self.violations, "tracked_users": len(self.users),
+                "tracked_channels": len(self.channels), "bulk_deletes": self.bulkDeletes, "deleted": self.deleted}
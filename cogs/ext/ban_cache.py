@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+from typing import *
+
+from cogs.ext.guild_index import NameIndex
+
+
+class GuildBans:
+    """A guild's banned users by id and name, filled from guild.bans() once"""
+
+    def __init__(self, guild):
+        self.guild = guild
+        self.users = NameIndex()
+        self.filled = False
+        self.lock = asyncio.Lock()
+        # ban/unban events seen while the first fetch runs, replayed after it so they aren't overwritten
+        self.pending: List[tuple] = []
+
+    async def fill(self):
+        async with self.lock:
+            if self.filled:
+                return
+            self.pending = []
+            users = NameIndex()
+            async for entry in self.guild.bans(limit=None):
+                users.add(entry.user)
+            self.users = users
+            for banned, user in self.pending:
+                self._apply(banned, user)
+            self.pending = []
+            self.filled = True
+
+    def _apply(self, banned: bool, user):
+        if banned:
+            self.users.add(user)
+        else:
+            self.users.remove(user.id)
+
+    def onBanChange(self, banned: bool, user):
+        if self.filled:
+            self._apply(banned, user)
+        elif self.lock.locked():
+            self.pending.append((banned, user))
+
+    def isBanned(self, userId: int) -> bool:
+        return userId in self.users.names
+
+    def get(self, userId: int):
+        name = self.users.names.get(userId, None)
+        return self.users.byName[name][userId] if name is not None else None
+
+    def getByName(self, name: str) -> list:
+        return self.users.get(name)
+
+    def __len__(self):
+        return len(self.users)
+
+
+class BanCache:
+    """
+    GuildBans per guild, fetched on first use and then kept current from on_member_ban/on_member_unban.
+
+    Without `start(bot)` nothing would keep them current, so every lookup fetches the bans again.
+    """
+
+    def __init__(self):
+        self.bot = None
+        self.guilds: Dict[int, GuildBans] = dict()
+        self.fetches = 0
+        self.hits = 0
+
+    def start(self, bot):
+        if self.bot is bot:
+            return
+        self.bot = bot
+        self.guilds.clear()
+        bot.add_listener(self.onMemberBan, "on_member_ban")
+        bot.add_listener(self.onMemberUnban, "on_member_unban")
+        bot.add_listener(self.onGuildRemove, "on_guild_remove")
+        bot.add_listener(self.onReady, "on_ready")
+
+    async def get(self, guild) -> GuildBans:
+        bans = self.guilds.get(guild.id, None)
+        if bans is None or bans.guild is not guild:
+            bans = GuildBans(guild)
+            if self.bot is not None:
+                self.guilds[guild.id] = bans
+        if bans.filled:
+            self.hits += 1
+        else:
+            self.fetches += 1
+            await bans.fill()
+        return bans
+
+    async def isBanned(self, guild, userId: int) -> bool:
+        return (await self.get(guild)).isBanned(userId)
+
+    def invalidate(self, guildId: int | None = None) -> int:
+        if guildId is None:
+            dropped = len(self.guilds)
+            self.guilds.clear()
+            return dropped
+        return 1 if self.guilds.pop(guildId, None) is not None else 0
+
+    async def onMemberBan(self, guild, user):
+        bans = self.guilds.get(guild.id, None)
+        if bans is not None:
+            bans.onBanChange(True, user)
+
+    async def onMemberUnban(self, guild, user):
+        bans = self.guilds.get(guild.id, None)
+        if bans is not None:
+            bans.onBanChange(False, user)
+
+    async def onGuildRemove(self, guild):
+        self.invalidate(guild.id)
+
+    async def onReady(self):
+        # bans that happened while disconnected never reach us as events
+        self.invalidate()
+
+    def getStats(self) -> dict:
+        return {"guilds": len(self.guilds), "bans": sum(len(bans) for bans in self.guilds.values()),
+                "fetches": self.fetches, "hits": self.hits}
+
+
+banCache = BanCache()
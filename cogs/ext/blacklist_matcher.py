@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import *
+
+# letters from other scripts that look like latin ones, applied after NFKD folded the compatibility forms
+CONFUSABLES = str.maketrans({
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p", "с": "c", "т": "t",
+    "у": "y", "х": "x", "і": "i", "ї": "i", "ј": "j", "ѕ": "s", "ԁ": "d", "ɡ": "g", "һ": "h", "ӏ": "l",
+    "А": "A", "В": "B", "Е": "E", "К": "K", "М": "M", "Н": "H", "О": "O", "Р": "P", "С": "C", "Т": "T",
+    "Х": "X", "І": "I", "Ј": "J", "Ѕ": "S",
+    "α": "a", "β": "b", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p", "τ": "t", "υ": "u",
+    "χ": "x", "Α": "A", "Β": "B", "Ε": "E", "Ζ": "Z", "Η": "H", "Ι": "I", "Κ": "K", "Μ": "M", "Ν": "N",
+    "Ο": "O", "Ρ": "P", "Τ": "T", "Υ": "Y", "Χ": "X",
+})
+# zero width characters people put inside words to dodge filters
+INVISIBLE = dict.fromkeys(map(ord, "​‌‍⁠﻿­"), None)
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalizeText(text: str, casefold: bool = False, confusables: bool = False, whitespace: bool = False) -> str:
+    if confusables:
+        text = unicodedata.normalize("NFKD", text)
+        # drops the accents NFKD split off, "é" matches "e"
+        text = "".join(char for char in text if not unicodedata.combining(char)).translate(CONFUSABLES)
+    if whitespace:
+        text = WHITESPACE.sub(" ", text.translate(INVISIBLE))
+    if casefold:
+        text = text.casefold()
+    return text
+
+
+class BlacklistMatcher:
+    """
+    Aho-Corasick automaton over the (normalized) blacklisted words, a message is scanned once no
+    matter how many words there are. Both the words and the messages go through normalizeText with
+    the same options, without options it matches exactly like `word in content` did.
+    """
+
+    def __init__(self, words: Iterable[str], casefold: bool = False, confusables: bool = False,
+                 whitespace: bool = False):
+        self.casefold = casefold
+        self.confusables = confusables
+        self.whitespace = whitespace
+        # state -> {char: state}, the fail link and the index of the word that ends there (or the nearest via fail)
+        self.goto: List[Dict[str, int]] = [dict()]
+        self.fail: List[int] = [0]
+        self.output: List[int] = [-1]
+        self.words: List[str] = []
+        for word in words:
+            if not isinstance(word, str):
+                continue
+            normalized = self.normalize(word)
+            # an empty word would match every message
+            if len(normalized) > 0:
+                self._add(normalized, len(self.words))
+                self.words.append(word)
+        self._link()
+
+    def normalize(self, text: str) -> str:
+        return normalizeText(text, self.casefold, self.confusables, self.whitespace)
+
+    def _add(self, word: str, index: int):
+        state = 0
+        for char in word:
+            nextState = self.goto[state].get(char, None)
+            if nextState is None:
+                nextState = len(self.goto)
+                self.goto.append(dict())
+                self.fail.append(0)
+                self.output.append(-1)
+                self.goto[state][char] = nextState
+            state = nextState
+        if self.output[state] == -1:
+            self.output[state] = index
+
+    def _link(self):
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, nextState in self.goto[state].items():
+                queue.append(nextState)
+                fallback = self.fail[state]
+                while fallback != 0 and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[nextState] = target if target != nextState else 0
+                if self.output[nextState] == -1:
+                    self.output[nextState] = self.output[self.fail[nextState]]
+
+    def search(self, content: str) -> str | None:
+        """The first blacklisted word found in the content, or None"""
+        if len(self.words) == 0:
+            return None
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        state = 0
+        for char in self.normalize(content):
+            while state != 0 and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] != -1:
+                return self.words[output[state]]
+        return None
+
+    def getStats(self) -> dict:
+        return {"words": len(self.words), "states": len(self.goto), "casefold": self.casefold,
+                "confusables": self.confusables, "whitespace": self.whitespace}
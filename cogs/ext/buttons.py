@@ -1,61 +1,144 @@
 from cogs.ext.imports import *
+from cogs.ext import actions
+from cogs.ext.config_snapshot import ViewModel
 
 
-class ViewButton(discord.ui.Button):
-    def __init__(self, data: dict, placeholders: dict, bot: commands.Bot, **kwargs):
+class RegisteredButton(discord.ui.Button):
+    def __init__(self, registry, **kwargs):
         super().__init__(**kwargs)
-        self.actions: list = list(data['actions']).copy()
-        self.bot = bot
-        self.placeholders = placeholders
-        # 'idk' -> [1, 2, 3]
+        self.registry = registry
 
-        self.actionData: dict = dict()
-        # 'idk' -> {'messages' : [....]}
+    async def callback(self, interaction: discord.Interaction):
+        await self.registry.dispatch(interaction, self.custom_id)
 
-        for action in self.actions:
-            self.actionData[action] = utils.configManager.getActionData(action).copy()
 
-    async def callback(self, interaction: discord.Interaction):
-        await actions.handleAllActions(self.bot, self.actionData, interaction=interaction,
-                                       placeholders=self.placeholders)
+class RegisteredView:
+    """A configured view, calling it returns the discord.ui.View to attach to a message"""
+
+    def __init__(self, registry, model: ViewModel):
+        self.registry = registry
+        self.model = model
+        self.name = model.name
+        self.timeout = model.timeout
+        eph = utils.configManager.getEphPlaceholder()
+        self.is_active_placeholder = utils.configManager.isActivePlaceholder(eph) and eph in model.name
+        self.displayView: discord.ui.View | None = None
+
+    def build(self, timeout: float | None) -> discord.ui.View:
+        view = discord.ui.View(timeout=timeout)
+        for button in self.model.buttons:
+            view.add_item(RegisteredButton(self.registry, label=button.label,
+                                           style=getattr(discord.ButtonStyle, button.style, discord.ButtonStyle.green),
+                                           custom_id=self.registry.customIDs[button.key]))
+        return view
 
+    def __call__(self) -> discord.ui.View:
+        if self.timeout is not None:
+            # every message gets its own timer, discord.py forgets the view when it expires
+            return self.build(self.timeout)
+        if self.displayView is None:
+            # stopped, so discord.py only renders it and never stores it per message,
+            # the clicks reach the persistent view registered for the same custom_ids
+            self.displayView = self.build(None)
+            self.displayView.stop()
+        return self.displayView
 
-class TempView(discord.ui.View):
-    is_active_placeholder = False
-    allButtonLabels = []
-    view = ""
-    timeout = None
-    bot = None
-    placeholders = dict()
+
+class ViewRegistry:
+    """
+    Every view from messages.json built once, with a stable custom_id per button.
+
+    Views without a timeout are registered with bot.add_view so their buttons keep working after a
+    restart and cost the same no matter how many messages carry them. Clicks are routed by custom_id
+    to the button's action data, resolved when the registry is built and again after a reload.
+    """
 
     def __init__(self):
-        super().__init__(timeout=self.timeout)
-        if len(self.view) > 0:
-            self.allButtonLabels = utils.configManager.getButtonsByView(self.view)
-            for label in self.allButtonLabels:
-                comb = self.view.replace(" ", "") + " " + str(label).replace(" ", "")
-
-                self.add_item(ViewButton(label=label,
-                                         style=getattr(discord.ButtonStyle, utils.configManager.getButtonStyle(comb)),
-                                         custom_id=utils.configManager.getButtonCustomID(comb),
-                                         bot=self.bot,
-                                         data={"actions": utils.configManager.getActions(comb)},
-                                         placeholders=self.placeholders))
-
-    if timeout is None:
-        async def on_timeout(self):
-            for child in self.children:
-                child.disabled = False
-
-
-def buildButtonData(bot: commands.Bot, msg: str, placeholders: dict) -> discord.ui.View | None:
+        self.bot: commands.Bot | None = None
+        self.views: Dict[str, RegisteredView] = dict()
+        # button key ("view button") -> custom_id
+        self.customIDs: Dict[str, str] = dict()
+        # custom_id -> {action: action data}
+        self.actionData: Dict[str, dict] = dict()
+        self.persistentViews: List[discord.ui.View] = []
+        self.built = False
+        self.builds = 0
+        self.clicks = 0
+
+    def start(self, bot: commands.Bot):
+        if self.bot is bot:
+            return
+        if self.bot is None:
+            utils.configManager.addReloadListener(self.onReload)
+        self.bot = bot
+        self.build()
+
+    def build(self):
+        views = dict()
+        customIDs = dict()
+        actionData = dict()
+        for name, model in utils.configManager.snapshot.views.items():
+            for button in model.buttons:
+                customID = utils.configManager.getButtonCustomID(button.key)
+                if customID in actionData:
+                    print("Button " + button.key + " uses the custom_id " + customID + " of another button")
+                    customID = utils.configManager.getDefaultButtonCustomID(button.key)
+                customIDs[button.key] = customID
+                actionData[customID] = {action: utils.configManager.getActionData(action).copy()
+                                        for action in button.actions}
+            views[name] = RegisteredView(self, model)
+
+        self.views = views
+        self.customIDs = customIDs
+        self.actionData = actionData
+        self.built = True
+        self.builds += 1
+        if self.bot is not None:
+            self._registerPersistentViews()
+
+    def _registerPersistentViews(self):
+        for view in self.persistentViews:
+            view.stop()
+        self.persistentViews = []
+        for registeredView in self.views.values():
+            if registeredView.timeout is None and len(registeredView.model.buttons) > 0:
+                view = registeredView.build(None)
+                self.bot.add_view(view)
+                self.persistentViews.append(view)
+
+    def getView(self, name: str) -> RegisteredView | None:
+        if not self.built:
+            self.build()
+        return self.views.get(name, None)
+
+    def onReload(self, changedKeys: set) -> int:
+        if ("messages", "views") not in changedKeys and ("config", "actions") not in changedKeys:
+            return 0
+        dropped = len(self.views)
+        self.build()
+        return dropped
+
+    async def dispatch(self, interaction: discord.Interaction, customID: str):
+        actionData = self.actionData.get(customID, None)
+        if actionData is None:
+            return
+        self.clicks += 1
+        await actions.handleAllActions(self.bot, actionData, interaction=interaction,
+                                       placeholders=placeholders_utils.addDefaultPlaceholder(dict(),
+                                                                                             interaction=interaction))
+
+    def getStats(self) -> dict:
+        return {"views": len(self.views), "buttons": len(self.actionData), "persistent": len(self.persistentViews),
+                "builds": self.builds, "clicks": self.clicks}
+
+
+viewRegistry = ViewRegistry()
+
+
+def buildButtonData(bot: commands.Bot, msg: str, placeholders: dict) -> RegisteredView | None:
     if not utils.configManager.hasButton(msg) or bot is None:
         return None
 
-    eph = utils.configManager.getEphPlaceholder()
-    TempView.view = placeholders_utils.usePlaceholders(msg, placeholders)
-    TempView.bot = bot
-    TempView.placeholders = placeholders
-    TempView.timeout = utils.configManager.getButtonTimeout(msg)
-    TempView.is_active_placeholder = utils.configManager.isActivePlaceholder(eph) and eph in msg
-    return TempView
+    viewRegistry.start(bot)
+    view = viewRegistry.getView(placeholders_utils.usePlaceholders(msg, placeholders))
+    return view if view is not None else viewRegistry.getView(msg)
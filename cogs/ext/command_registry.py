@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import importlib.util
+from typing import *
+
+COG_ACTIVE = "active"
+COG_INACTIVE = "inactive"
+COG_NOT_FOUND = "not_found"
+
+
+class CommandRegistry:
+    """
+    (type, command name) -> (cog, command) for the cogs of "cog_data" whose extension is loaded,
+    type being "app" or "prefix".
+
+    discord.py has no event for extension loads and unloads, so the registry compares the loaded
+    extension modules and cog objects with the ones it was built from on each lookup (a tuple comparison)
+    and rebuilds when they differ. They are compared by identity, a reloaded extension or a cog disabled
+    and enabled again keeps its name but not its objects. It is also dropped when "cog_data" is reloaded.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.commands: Dict[Tuple[str, str], tuple] = dict()
+        self.signature: tuple | None = None
+        self.builds = 0
+        self.lookups = 0
+
+    def _signature(self, bot) -> tuple:
+        # the registered commands keep the old cogs alive, so a new cog can't get an old one's id
+        return tuple(map(id, bot.extensions.values())), tuple(map(id, bot.cogs.values()))
+
+    def build(self, bot):
+        registered = dict()
+        for name, fileName in self.config.getCogData().items():
+            cog = bot.get_cog(name)
+            if cog is None or self.getCogStatus(bot, name) != COG_ACTIVE:
+                continue
+            for command in cog.get_app_commands():
+                registered.setdefault(("app", command.name), (cog, command))
+            for command in cog.get_commands():
+                registered.setdefault(("prefix", command.name), (cog, command))
+        self.commands = registered
+        self.signature = self._signature(bot)
+        self.builds += 1
+
+    def get(self, bot, name: str, isApp: bool) -> tuple | None:
+        if self.signature != self._signature(bot):
+            self.build(bot)
+        self.lookups += 1
+        return self.commands.get(("app" if isApp else "prefix", name), None)
+
+    def getCogStatus(self, bot, name: str) -> str:
+        fileName = self.config.getCogData().get(name, None)
+        if fileName is None:
+            return COG_NOT_FOUND
+        extension = "cogs." + str(fileName)
+        if extension in bot.extensions:
+            return COG_ACTIVE
+        try:
+            found = importlib.util.find_spec(extension) is not None
+        except (ImportError, ValueError):
+            found = False
+        return COG_INACTIVE if found else COG_NOT_FOUND
+
+    def invalidate(self) -> int:
+        dropped = len(self.commands)
+        self.commands = dict()
+        self.signature = None
+        return dropped
+
+    def onReload(self, changedKeys: set) -> int:
+        return self.invalidate() if ("config", "cog_data") in changedKeys else 0
+
+    def getStats(self) -> dict:
+        return {"commands": len(self.commands), "builds": self.builds, "lookups": self.lookups}
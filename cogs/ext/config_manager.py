@@ -1,4 +1,22 @@
 from cogs.ext.imports import *
+from cogs.ext.json_cache import JSONFileCache
+from cogs.ext.json_writer import JSONWriter
+from cogs.ext.config_watcher import ConfigWatcher
+from cogs.ext.warnings_store import WarningsStore
+from cogs.ext.scheduler import Scheduler
+from cogs.ext.leveling import LevelingStore
+from cogs.ext.command_registry import CommandRegistry
+from cogs.ext.restrictions import RestrictionPolicies
+from cogs.ext.blacklist_matcher import BlacklistMatcher
+from cogs.ext.automod import Automod
+from cogs.ext.native_automod import NativeAutomod
+from cogs.ext.templates import TemplateEngine
+from cogs.ext.response_plans import ResponsePlanner, ResponsePlan, EmbedPlan
+import atexit
+import hashlib
+import time
+from cogs.ext.config_snapshot import ConfigSnapshot, ViewModel, ButtonModel, OutputModel, EMPTY_OUTPUT, \
+    getButtonKey, diffTopLevel
 
 class ConfigManager:
     def __init__(self, configPath, messagesConfigPath, warningsConfigPath, commandsFolderPath):
@@ -6,108 +24,322 @@ class ConfigManager:
         self.message_path = messagesConfigPath
         self.warning_path = warningsConfigPath
         self.command_folder = commandsFolderPath
-        self.warningsData = self._readJSON(warningsConfigPath)
+        # path -> (mtime, size) of the version we last read or wrote, lets the watcher skip our own saves
+        self.fileSignatures: dict = dict()
         self.configData = self._readJSON(configPath)
         self.messagesData = self._readJSON(messagesConfigPath)
+        self.snapshot = ConfigSnapshot(self.configData, self.messagesData)
+        cacheSize = self.configData.get("command_cache_size", 128)
+        self.commandCache = JSONFileCache(self._readJSONFile, cacheSize if isinstance(cacheSize, int) else 128)
+        debounce = self.configData.get("save_debounce_seconds", 1.0)
+        self.writer = JSONWriter(debounce if isinstance(debounce, (int, float)) else 1.0,
+                                 onWrite=self._rememberSignature)
+        atexit.register(self.writer.close)
+        # warnings.json is imported into the database the first time it is opened
+        self.warnings = WarningsStore(warningsConfigPath + ".db", warningsConfigPath + ".json")
+        atexit.register(self.warnings.close)
+        # timed reversals (temporary bans, roles...) survive a restart in here
+        self.scheduler = Scheduler(os.path.join(os.path.dirname(configPath), "scheduler.db"))
+        atexit.register(self.scheduler.close)
+        # member XP, written behind in batches and at exit
+        self.leveling = LevelingStore(os.path.join(os.path.dirname(configPath), "leveling.db"))
+        atexit.register(self.leveling.close)
+        # callables taking the set of changed (file, top level key) pairs and returning how many entries they dropped
+        self.reloadListeners: list = []
+        self.lastReloadReport: dict = dict()
+        self.watcher: ConfigWatcher | None = None
+        templateCacheSize = self.configData.get("template_cache_size", 4096)
+        self.templates = TemplateEngine(self.configData.get("activated_placeholders", []),
+                                        templateCacheSize if isinstance(templateCacheSize, int) else 4096)
+        self.addReloadListener(self._onTemplatesReload)
+        self.responsePlans = ResponsePlanner(self)
+        self.addReloadListener(self.responsePlans.onReload)
+        self.commandRegistry = CommandRegistry(self)
+        self.addReloadListener(self.commandRegistry.onReload)
+        self.restrictions = RestrictionPolicies(self)
+        self.addReloadListener(self.restrictions.onReload)
+        # compiled from "blacklist_words" on first use after each change
+        self.blacklist: BlacklistMatcher | None = None
+        self.addReloadListener(self._onBlacklistReload)
+        self.automod = Automod(self)
+        self.addReloadListener(self.automod.onReload)
+        self.nativeAutomod = NativeAutomod(self)
+        self.addReloadListener(self.nativeAutomod.onReload)
+        self.configureLeveling()
+        self.addReloadListener(self._onLevelingReload)
 
     def saveCommandJSON(self, command: str, command_data: dict) -> None:
-        self._saveJSON(self.command_folder + "/" + command + ".json", command_data)
+        self._saveJSON(self.command_folder + "/" + command, command_data)
+        self.commandCache.invalidate(self.command_folder + "/" + command + ".json")
+        self.responsePlans.invalidate(command)
 
     def saveConfigJSON(self) -> None:
         self._saveJSON(self.config_path, self.configData)
 
-    def saveWarningsJSON(self) -> None:
-        self._saveJSON(self.warning_path, self.warningsData)
-
     def saveMessagesJSON(self) -> None:
         self._saveJSON(self.message_path, self.messagesData)
 
     def _saveJSON(self, output_file_name, data) -> None:
-        open(output_file_name + ".json", "a")
-        with open(output_file_name + ".json", "w") as jsonfile:
-            json.dump(data, jsonfile, indent=4)
+        self.writer.schedule(output_file_name + ".json", data)
+
+    def flush(self) -> None:
+        self.writer.flush()
 
     def _readJSON(self, file_name) -> dict:
-        if not os.path.exists(file_name + ".json"):
+        return self._readJSONFile(file_name + ".json")
+
+    def _readJSONFile(self, path) -> dict:
+        try:
+            return self._parseJSONFile(path)
+        except Exception as e:
+            print("Your "+path+" has problems", e)
+            exit()
+
+    def _parseJSONFile(self, path) -> dict:
+        if not os.path.exists(path):
             return {}
 
-        with open(file_name + ".json", "r") as jsonfile:
-            try:
-                return json.load(jsonfile)
-            except Exception as e:
-                print("Your "+file_name+".json has problems", e)
-                exit()
+        with open(path, "r") as jsonfile:
+            data = json.load(jsonfile)
+        self._rememberSignature(path)
+        return data
 
-    def reloadConfig(self):
-        self.warningsData = self._readJSON(self.warning_path)
-        self.configData = self._readJSON(self.config_path)
-        self.messagesData = self._readJSON(self.message_path)
+    def _rememberSignature(self, path) -> None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        self.fileSignatures[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size)
+
+    def _getFileKinds(self) -> dict:
+        return {os.path.abspath(self.config_path + ".json"): "config",
+                os.path.abspath(self.message_path + ".json"): "messages"}
+
+    def addReloadListener(self, listener) -> None:
+        self.reloadListeners.append(listener)
+
+    def _onTemplatesReload(self, changedKeys: set) -> int:
+        if ("config", "activated_placeholders") in changedKeys:
+            return self.templates.setActive(self.configData.get("activated_placeholders", []))
+        # compiled templates only depend on their text, drop them so removed messages do not linger
+        if any(kind == "messages" for kind, key in changedKeys):
+            return self.templates.invalidate()
+        return 0
+
+    async def reloadConfig(self) -> dict:
+        # saves still queued are written first so the reload reads them back, off the event loop
+        await asyncio.to_thread(self.writer.flush)
+        start = time.perf_counter()
+        report = self._applyReload({"config": self._readJSON(self.config_path),
+                                    "messages": self._readJSON(self.message_path)}, start)
+        report["invalidated"] += len(self.commandCache.entries)
+        self.commandCache.invalidate()
+        # command files are re-read as well, plans falling back to their messages must follow
+        report["invalidated"] += self.responsePlans.invalidate()
+        return report
+
+    async def reloadFile(self, path: str) -> dict | None:
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        if signature is not None and self.fileSignatures.get(path, None) == signature:
+            return None
+
+        start = time.perf_counter()
+        kind = self._getFileKinds().get(path, None)
+        if kind is None:
+            if os.path.dirname(path) != os.path.abspath(self.command_folder):
+                return None
+            command = os.path.basename(path)[:-len(".json")]
+            cacheKey = self.command_folder + "/" + command + ".json"
+            invalidated = 1 if cacheKey in self.commandCache.entries else 0
+            self.commandCache.invalidate(cacheKey)
+            self._rememberSignature(path)
+            changedKeys = {("commands", command)}
+            invalidated += sum(listener(changedKeys) or 0 for listener in self.reloadListeners)
+            report = {"latency_ms": round((time.perf_counter() - start) * 1000, 2),
+                      "changed": sorted(kind + ":" + key for kind, key in changedKeys),
+                      "sections": 0, "invalidated": invalidated}
+            self.lastReloadReport = report
+            return report
+
+        # a deleted or half written file would wipe every setting, the loaded version stays until it is back
+        if signature is None:
+            print("Your " + path + " is missing, keeping the loaded version")
+            return None
+        # a change made on disk wins over an in-memory edit that was not written yet
+        self.writer.discard(path)
+        try:
+            data = await asyncio.to_thread(self._parseJSONFile, path)
+        except Exception as e:
+            print("Your " + path + " has problems, keeping the loaded version", e)
+            return None
+        if not isinstance(data, dict) or len(data) == 0:
+            print("Your " + path + " has no settings, keeping the loaded version")
+            return None
+        return self._applyReload({kind: data}, start)
+
+    def configureLeveling(self):
+        self.leveling.configure(self.getLevelingValue("xp_min", 15), self.getLevelingValue("xp_max", 25),
+                                self.getLevelingValue("cooldown", 60), self.getLevelingValue("flush_interval", 10))
+
+    def _onLevelingReload(self, changedKeys: set) -> int:
+        if ("config", "leveling") in changedKeys:
+            self.configureLeveling()
+        return 0
+
+    def _onBlacklistReload(self, changedKeys: set) -> int:
+        keys = ("blacklist_words", "blacklist_casefold", "blacklist_normalize_confusables",
+                "blacklist_normalize_whitespace")
+        if self.blacklist is not None and any(("config", key) in changedKeys for key in keys):
+            self.blacklist = None
+            return 1
+        return 0
+
+    def _applyReload(self, newData: dict, start: float) -> dict:
+        changedKeys = set()
+        for kind, data in newData.items():
+            added, removed, changed = diffTopLevel(getattr(self, kind + "Data"), data)
+            changedKeys.update((kind, key) for key in added | removed | changed)
+
+        # nothing below awaits, so coroutines never see half of the new data
+        self.configData = newData.get("config", self.configData)
+        self.messagesData = newData.get("messages", self.messagesData)
+        sections = 0
+        if len(changedKeys) > 0:
+            self.snapshot = ConfigSnapshot(self.configData, self.messagesData, previous=self.snapshot,
+                                           changedKeys=changedKeys)
+            sections = self.snapshot.compiledSections
+        invalidated = 0
+        if len(changedKeys) > 0:
+            invalidated = sum(listener(changedKeys) or 0 for listener in self.reloadListeners)
+
+        report = {"latency_ms": round((time.perf_counter() - start) * 1000, 2),
+                  "changed": sorted(kind + ":" + key for kind, key in changedKeys),
+                  "sections": sections, "invalidated": invalidated}
+        self.lastReloadReport = report
+        return report
+
+    def formatReloadReport(self, report: dict) -> str:
+        if len(report.get("changed", [])) == 0:
+            return "no changes"
+        return (", ".join(report["changed"]) + " changed, " + str(report["sections"]) +
+                " sections recompiled, " + str(report["invalidated"]) + " cached entries dropped")
+
+    def compileSnapshot(self):
+        self.snapshot = ConfigSnapshot(self.configData, self.messagesData)
+
+    def isConcurrentDelivery(self) -> bool:
+        return bool(self.configData.get("concurrent_delivery", False))
+
+    def isCoalescingMessages(self) -> bool:
+        return bool(self.configData.get("coalesce_messages", True))
+
+    def getMaxConcurrentActions(self) -> int:
+        res = self.configData.get("max_concurrent_actions", 8)
+        return res if isinstance(res, int) and not isinstance(res, bool) and res > 0 else 8
+
+    def getMaxConcurrentSends(self) -> int:
+        res = self.configData.get("max_concurrent_sends", 4)
+        return res if isinstance(res, int) and not isinstance(res, bool) and res > 0 else 4
+
+    def getPurgeSingleDeleteDelay(self) -> float:
+        res = self.configData.get("purge_single_delete_delay", 1.0)
+        return res if isinstance(res, (int, float)) and not isinstance(res, bool) and res >= 0 else 1.0
+
+    def getPurgeProgressInterval(self) -> float:
+        res = self.configData.get("purge_progress_interval", 2.0)
+        return res if isinstance(res, (int, float)) and not isinstance(res, bool) and res > 0 else 2.0
+
+    def getPurgeProgressMessage(self) -> str:
+        return str(self.configData.get("purge_progress_message", "Deleted /deleted/ of /scanned/ scanned messages"))
+
+    def getLevelingValue(self, key: str, default: int) -> int:
+        section = self.__handleMaps(self.configData.get("leveling", {}))
+        res = section.get(key, default)
+        return res if isinstance(res, (int, float)) and not isinstance(res, bool) and res >= 0 else default
+
+    def isLevelingEnabled(self) -> bool:
+        return bool(self.__handleMaps(self.configData.get("leveling", {})).get("enabled", True))
+
+    def isWatchingConfigFiles(self) -> bool:
+        return bool(self.configData.get("watch_config_files", False))
+
+    def startWatcher(self) -> str:
+        if self.watcher is None:
+            interval = self.configData.get("watch_poll_interval", 2.0)
+            self.watcher = ConfigWatcher(list(self._getFileKinds().keys()), self._onFileChanged,
+                                         folders=[self.command_folder],
+                                         pollInterval=interval if isinstance(interval, (int, float)) else 2.0)
+        return self.watcher.start()
+
+    def stopWatcher(self) -> None:
+        if self.watcher is not None:
+            self.watcher.stop()
+
+    async def _onFileChanged(self, path: str):
+        report = await self.reloadFile(path)
+        if report is not None and len(report["changed"]) > 0:
+            print("Reloaded " + path + " in " + str(report["latency_ms"]) + " ms: " + self.formatReloadReport(report))
 
     def getRoleManagements(self) -> list:
-        res = self.configData.get("role_management", {})
-        if not isinstance(res, dict):
-            return []
-        return list(res.keys())
+        return list(self.snapshot.roleManagements.keys())
 
     def getAllRolesIDByRoleManager(self, manager: str) -> list:
-        res = self.__handleMaps(self.configData.get("role_management", {}))
-        res = self.__handleMaps(res.get(manager, {})).get("all_roles_id", [])
-        if not isinstance(res, list):
-            res = []
-        return res
+        return list(self.snapshot.roleManagements.get(manager, ((), ()))[0])
 
     def getAnyRolesIDByRoleManager(self, manager: str) -> list:
-        res = self.__handleMaps(self.configData.get("role_management", {}))
-        res = self.__handleMaps(res.get(manager, {}))
-        res = res.get("any_roles_id", [])
-        if not isinstance(res, list):
-            return []
-        return res
+        return list(self.snapshot.roleManagements.get(manager, ((), ()))[1])
 
     def getActionData(self, action: str) -> dict:
-        return self.__handleMaps(self.__handleMaps(self.configData.get("actions", {})).get(action, {}))
+        return self.snapshot.actions.get(action, {})
+
+    def getView(self, view: str) -> ViewModel | None:
+        return self.snapshot.views.get(view, None)
+
+    def getButton(self, combined: str) -> ButtonModel | None:
+        return self.snapshot.buttons.get(combined, None)
+
+    def getButtonKey(self, view: str, label: str) -> str:
+        return getButtonKey(view, label)
 
     def getActions(self, combined: str) -> list:
-        comb = combined.split(" ")
-        res = self.__handleMaps(self.messagesData.get("views", {}))
-        res = self.__handleMaps(res.get(comb[0], {}))
-        res = self.__handleMaps(res.get(comb[1], {})).get("actions", [])
-        if not isinstance(res, list):
-            return []
-        return list(res)
+        button = self.snapshot.buttons.get(combined, None)
+        return [] if button is None else list(button.actions)
 
     def getButtonsByView(self, view: str) -> list:
-        res = self.__handleMaps(self.messagesData.get("views", {}))
-        res = self.__handleMaps(res.get(view, {}))
-        if len(res.keys()) == 0:
-            return []
-        res.pop("timeout")
-        return list(res.keys())
+        res = self.snapshot.views.get(view, None)
+        return [] if res is None else [button.label for button in res.buttons]
 
     def getButtonStyle(self, combined: str) -> str:
-        comb = combined.split(" ")
-        res = self.__handleMaps(self.messagesData.get("views", {}))
-        res = self.__handleMaps(res.get(comb[0], {}))
-        res = self.__handleMaps(res.get(comb[1], {}))
-        return str(res.get("style", "green"))
+        button = self.snapshot.buttons.get(combined, None)
+        if button is not None:
+            return button.style
+        view = self.snapshot.views.get(combined, None)
+        return "green" if view is None else view.style
 
     def getButtonTimeout(self, view: str) -> float | None:
-        res = self.__handleMaps(self.messagesData.get("views", {}))
-        res = self.__handleMaps(res.get(view, {}))
-        res = res.get("timeout", None)
-        if not isinstance(res, int) or not isinstance(res, float):
-            return None
-        return res
+        res = self.snapshot.views.get(view, None)
+        return None if res is None else res.timeout
 
     def getButtonCustomID(self, combined: str) -> str:
-        comb = combined.split(" ")
-        res = self.__handleMaps(self.messagesData.get("views", {}))
-        res = self.__handleMaps(res.get(comb[0], {}))
-        res = self.__handleMaps(res.get(comb[1], {}))
-        return str(res.get("custom_id", str(random.randint(1, 1000))))
+        button = self.snapshot.buttons.get(combined, None)
+        if button is None or button.custom_id is None:
+            return self.getDefaultButtonCustomID(combined)
+        return button.custom_id
+
+    def getDefaultButtonCustomID(self, combined: str) -> str:
+        # stable across restarts so persistent views keep working, Discord allows 100 characters
+        customID = "view:" + combined
+        if len(customID) > 100:
+            customID = "view:" + hashlib.sha1(combined.encode()).hexdigest()
+        return customID
 
     def getCogData(self) -> dict:
-        return self.__handleMaps(self.configData.get('cog_data', {}))
+        return self.snapshot.cogData
 
     def getBotToken(self) -> str:
         return str(self.configData.get("discord_bot_token", ""))
@@ -125,40 +357,62 @@ class ConfigManager:
         return str(self.messagesData.get("cog_not_found_status", "not found"))
 
     def hasButton(self, name: str) -> bool:
-        return self.__handleMaps(self.messagesData.get("views", {})).get(name, None) is not None
+        return name in self.snapshot.views
 
     def getButtonText(self, name: str) -> str:
-        res = self.__handleMaps(self.messagesData.get("views", {}))
-        res = self.__handleMaps(res.get(name, {}))
-        return str(res.get("label", "No label for " + name))
+        res = self.snapshot.views.get(name, None)
+        return "No label for " + name if res is None else res.label
 
     def __handleMaps(self, res) -> dict:
         if not isinstance(res, dict):
             return dict()
         return res
 
-    def getButtonStyle(self, name: str) -> str:
-        res = self.__handleMaps(self.messagesData.get("views", {}))
-        res = self.__handleMaps(res.get(name, {}))
-        return str(res.get("style", "green"))
-
     def getBlacklistedWords(self) -> list:
         return self.configData.get("blacklist_words", [])
 
     def updateBlacklistWords(self, words: list):
         try:
             self.configData["blacklist_words"] = words
+            self.blacklist = None
+            self.nativeAutomod.requestSync()
         except Exception as e:
             print(e)
             pass
 
-    def getCommandData(self, command_name):
-        return self._readJSON(self.command_folder + "/" + command_name)
+    def buildBlacklistMatcher(self, words: list) -> BlacklistMatcher:
+        return BlacklistMatcher(words, bool(self.configData.get("blacklist_casefold", False)),
+                                bool(self.configData.get("blacklist_normalize_confusables", False)),
+                                bool(self.configData.get("blacklist_normalize_whitespace", False)))
+
+    def getBlacklistMatcher(self) -> BlacklistMatcher:
+        if self.blacklist is None:
+            words = self.getBlacklistedWords()
+            self.blacklist = self.buildBlacklistMatcher(words if isinstance(words, list) else [])
+        return self.blacklist
+
+    def getCommandData(self, command_name) -> dict:
+        path = self.command_folder + "/" + command_name + ".json"
+        pending = self.writer.getPending(path)
+        if pending is not None:
+            return pending
+        return self.commandCache.get(path)
+
+    def getCommandFileSignature(self, command_name) -> tuple | None:
+        """(mtime, size) of the command's file, None when it doesn't exist"""
+        try:
+            stat = os.stat(self.command_folder + "/" + command_name + ".json")
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def getCommandCacheStats(self) -> dict:
+        return self.commandCache.getStats()
 
     def getCommandArgDescription(self, command_name, argument) -> str:
-        res = self.messagesData.get("args", {}).get(argument, None)
+        res = self.snapshot.args.get(argument, None)
         if res is not None:
-            return str(res)
+            return res
 
         res = self.getCommandData(command_name).get("args", {}).get(argument, None)
         if res is None:
@@ -170,41 +424,25 @@ class ConfigManager:
         return dict(self.configData.get("command_restriction", {}).get(command_name, {}))
 
     def getCommandEmbeds(self, command: str, message: str) -> dict | None:
-        res = self.__handleMaps(self.messagesData.get("embed_format", {}))
-        res = self.__handleMaps(res.get(message, {}))
-        if len(res.keys()) > 0:
-            return res
-        return None
+        return self.snapshot.embeds.get(message, None)
+
+    def getChannelOutput(self, name: str) -> OutputModel:
+        return self.snapshot.channelOutputs.get(name, EMPTY_OUTPUT)
+
+    def getDMOutput(self, name: str) -> OutputModel:
+        return self.snapshot.dmOutputs.get(name, EMPTY_OUTPUT)
 
     def getMessagesByChannel(self, name: str) -> list:
-        res = self.__handleMaps(self.messagesData.get("channel_messages", {}))
-        res = self.__handleMaps(res.get(name, {}))
-        res = res.get("messages", [])
-        if not isinstance(res, list):
-            return []
-        return res
+        return list(self.getChannelOutput(name).messages)
 
     def getEmbedsByChannel(self, name: str) -> list:
-        res = self.__handleMaps(self.messagesData.get("channel_messages", {}))
-        res = self.__handleMaps(res.get(name, {}))
-        res = res.get("embeds", [])
-        if not isinstance(res, list):
-            return []
-        return res
+        return list(self.getChannelOutput(name).embeds)
 
     def getButtonsByChannel(self, name: str) -> list:
-        res = self.__handleMaps(self.messagesData.get("channel_messages", {}))
-        res = self.__handleMaps(res.get(name, {}))
-        res = res.get("views", [])
-        if not isinstance(res, list):
-            return []
-        return res
+        return list(self.getChannelOutput(name).views)
 
     def getChannelIdByName(self, name: str) -> int:
-        res = self.__handleMaps(self.configData.get("channels", {})).get(name, 0)
-        if not isinstance(res, int):
-            return 0
-        return res
+        return self.snapshot.channels.get(name, 0)
 
     def isPrintError(self) -> bool:
         res = self.configData.get("print_error_if_original_error_fails", True)
@@ -213,9 +451,7 @@ class ConfigManager:
         return res
 
     def getCommandMessages(self, command_name, message) -> list:
-        res = self.__handleMaps(self.messagesData.get("messages", {})).get(message, [])
-        if not isinstance(res, list):
-            res = []
+        res = list(self.snapshot.messages.get(message, ()))
         if len(res) == 0:
             res = self.__handleMaps(self.getCommandData(command_name).get("messages", {})).get(message, [])
             return [] if not isinstance(res, list) else res
@@ -223,37 +459,28 @@ class ConfigManager:
             return res
 
     def getDMMessages(self, message) -> list:
-        res = self.__handleMaps(self.__handleMaps(self.messagesData.get("dm", {}))
-                                .get(message, {})).get("messages", [])
-        if not isinstance(res, list):
-            return []
-        return res
+        return list(self.getDMOutput(message).messages)
 
     def getDMEmbeds(self, message) -> list:
-        res = self.__handleMaps(self.messagesData.get("dm", {}))
-        res = self.__handleMaps(res.get(message, {})).get("embeds", [])
-        if not isinstance(res, list):
-            return []
-        return res
+        return list(self.getDMOutput(message).embeds)
 
     def getDMViews(self, message) -> list:
-        res = self.__handleMaps(self.messagesData.get("dm", {}))
-        res = self.__handleMaps(res.get(message, {}))
-        res = res.get("views", [])
-        if not isinstance(res, list):
-            return []
-        return res
+        return list(self.getDMOutput(message).views)
 
     def getCommandActiveMessages(self, command_name) -> list:
         res = self.getCommandData(command_name).get("message_names", [])
         return res if isinstance(res, list) else []
 
     def getErrorActions(self, errorPath: str) -> list:
-        res = (self.__handleMaps(self.__handleMaps(self.configData.get("errors", {})).get(errorPath, {}))
-               .get("actions"))
-        if not isinstance(res, list):
-            return list()
-        return res
+        return list(self.snapshot.errorActions.get(errorPath, ()))
+
+    def getWarningLevels(self) -> int:
+        res = self.__handleMaps(self.configData.get("warning_levels", {}))
+        levels = [int(level) for level in res.keys() if str(level).isdigit()]
+        return max(levels) if len(levels) > 0 else 0
+
+    def getWarningDataForLevel(self, level: int) -> dict:
+        return self.__handleMaps(self.__handleMaps(self.configData.get("warning_levels", {})).get(str(level), {}))
 
     def getMentionMemberKey(self):
         return "mention_member_arg"
@@ -273,6 +500,15 @@ class ConfigManager:
     def getMentionRoleKey(self):
         return "mention_role_arg"
 
+    def getContainsKey(self):
+        return "contains_arg"
+
+    def getAttachmentsKey(self):
+        return "attachments_arg"
+
+    def getMinutesKey(self):
+        return "minutes_arg"
+
     def getNumberKey(self):
         return "number_arg"
 
@@ -316,7 +552,19 @@ class ConfigManager:
         return "author_icon_url"
 
     def isActivePlaceholder(self, placeholder: str):
-        return placeholder in self.configData.get("activated_placeholders")
+        return placeholder in self.templates.active
+
+    def getTemplateStats(self) -> dict:
+        return self.templates.getStats()
+
+    def getResponsePlan(self, command: str, message: str) -> ResponsePlan:
+        return self.responsePlans.getPlan(command, message)
+
+    def getEmbedPlan(self, message: str) -> EmbedPlan | None:
+        return self.responsePlans.getEmbedPlan(message)
+
+    def getResponsePlanStats(self) -> dict:
+        return self.responsePlans.getStats()
 
     def getUsernamePlaceholder(self):
         return "/username/"
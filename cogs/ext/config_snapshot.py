@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from typing import *
+
+
+def getButtonKey(view: str, label: str) -> str:
+    # same "view button" form that buttons.ViewRegistry and ConfigManager.getActions use
+    return str(view).replace(" ", "") + " " + str(label).replace(" ", "")
+
+
+def _handleMaps(res) -> dict:
+    if not isinstance(res, dict):
+        return dict()
+    return res
+
+
+def _handleLists(res) -> tuple:
+    if not isinstance(res, list):
+        return tuple()
+    return tuple(res)
+
+
+class ButtonModel:
+    __slots__ = ("view", "label", "key", "style", "custom_id", "actions")
+
+    def __init__(self, view: str, label: str, data: dict):
+        self.view: str = view
+        self.label: str = label
+        self.key: str = getButtonKey(view, label)
+        self.style: str = str(data.get("style", "green"))
+        customID = data.get("custom_id", None)
+        self.custom_id: str | None = None if customID is None else str(customID)
+        self.actions: tuple = _handleLists(data.get("actions", []))
+
+
+class ViewModel:
+    __slots__ = ("name", "timeout", "label", "style", "buttons")
+
+    def __init__(self, name: str, data: dict):
+        self.name: str = name
+        timeout = data.get("timeout", None)
+        self.timeout: float | None = float(timeout) if isinstance(timeout, (int, float)) and \
+            not isinstance(timeout, bool) else None
+        self.label: str = str(data.get("label", "No label for " + name))
+        self.style: str = str(data.get("style", "green"))
+        self.buttons: tuple = tuple(ButtonModel(name, label, buttonData)
+                                    for label, buttonData in data.items()
+                                    if label != "timeout" and isinstance(buttonData, dict))
+
+
+class OutputModel:
+    """Names of the messages, embeds and views sent to a channel or to a DM for one message name"""
+    __slots__ = ("messages", "embeds", "views")
+
+    def __init__(self, data: dict):
+        self.messages: tuple = _handleLists(data.get("messages", []))
+        self.embeds: tuple = _handleLists(data.get("embeds", []))
+        self.views: tuple = _handleLists(data.get("views", []))
+
+    def isEmpty(self) -> bool:
+        return len(self.messages) == 0 and len(self.embeds) == 0 and len(self.views) == 0
+
+
+EMPTY_OUTPUT = OutputModel({})
+
+
+class ConfigSnapshot:
+    """
+    Pre-validated, flat view of config.json and messages.json.
+
+    Built once by ConfigManager on load/reload so every getter is a single dict lookup
+    instead of walking the raw JSON with isinstance checks. When `previous` and `changedKeys`
+    are given only the sections whose top level key changed are compiled again, the rest is reused.
+    """
+
+    # (file, top level key) -> (compiler, attributes it fills)
+    SECTIONS = {
+        ("messages", "views"): ("_compileViews", ("views", "buttons")),
+        ("messages", "embed_format"): ("_compileEmbeds", ("embeds",)),
+        ("messages", "messages"): ("_compileMessages", ("messages",)),
+        ("messages", "channel_messages"): ("_compileChannelOutputs", ("channelOutputs",)),
+        ("messages", "dm"): ("_compileDMOutputs", ("dmOutputs",)),
+        ("messages", "args"): ("_compileArgs", ("args",)),
+        ("config", "channels"): ("_compileChannels", ("channels",)),
+        ("config", "actions"): ("_compileActions", ("actions",)),
+        ("config", "errors"): ("_compileErrorActions", ("errorActions",)),
+        ("config", "role_management"): ("_compileRoleManagements", ("roleManagements",)),
+        ("config", "cog_data"): ("_compileCogData", ("cogData",)),
+    }
+
+    def __init__(self, configData: dict, messagesData: dict, previous: ConfigSnapshot | None = None,
+                 changedKeys: Set[Tuple[str, str]] | None = None):
+        sources = {"config": _handleMaps(configData), "messages": _handleMaps(messagesData)}
+        self.compiledSections: int = 0
+        for (source, key), (compiler, attributes) in self.SECTIONS.items():
+            if previous is not None and changedKeys is not None and (source, key) not in changedKeys:
+                for attribute in attributes:
+                    setattr(self, attribute, getattr(previous, attribute))
+                continue
+            getattr(self, compiler)(_handleMaps(sources[source].get(key, {})))
+            self.compiledSections += 1
+
+    def _compileViews(self, data: dict):
+        self.views: Dict[str, ViewModel] = dict()
+        self.buttons: Dict[str, ButtonModel] = dict()
+        for viewName, viewData in data.items():
+            if not isinstance(viewData, dict):
+                continue
+            view = ViewModel(viewName, viewData)
+            self.views[viewName] = view
+            for button in view.buttons:
+                self.buttons[button.key] = button
+
+    def _compileEmbeds(self, data: dict):
+        self.embeds: Dict[str, dict] = {name: embedData for name, embedData in data.items()
+                                        if isinstance(embedData, dict) and len(embedData) > 0}
+
+    def _compileMessages(self, data: dict):
+        self.messages: Dict[str, tuple] = {name: tuple(lines) for name, lines in data.items()
+                                           if isinstance(lines, list)}
+
+    def _compileChannelOutputs(self, data: dict):
+        self.channelOutputs: Dict[str, OutputModel] = {name: OutputModel(outputData)
+                                                       for name, outputData in data.items()
+                                                       if isinstance(outputData, dict)}
+
+    def _compileDMOutputs(self, data: dict):
+        self.dmOutputs: Dict[str, OutputModel] = {name: OutputModel(outputData)
+                                                  for name, outputData in data.items()
+                                                  if isinstance(outputData, dict)}
+
+    def _compileArgs(self, data: dict):
+        self.args: Dict[str, str] = {name: str(description) for name, description in data.items()
+                                     if description is not None}
+
+    def _compileChannels(self, data: dict):
+        self.channels: Dict[str, int] = {name: channelId for name, channelId in data.items()
+                                         if isinstance(channelId, int) and not isinstance(channelId, bool)}
+
+    def _compileActions(self, data: dict):
+        self.actions: Dict[str, dict] = {name: actionData for name, actionData in data.items()
+                                         if isinstance(actionData, dict)}
+
+    def _compileErrorActions(self, data: dict):
+        self.errorActions: Dict[str, tuple] = dict()
+        for errorPath, errorData in data.items():
+            res = _handleMaps(errorData).get("actions")
+            if isinstance(res, list):
+                self.errorActions[errorPath] = tuple(res)
+
+    def _compileRoleManagements(self, data: dict):
+        self.roleManagements: Dict[str, Tuple[tuple, tuple]] = dict()
+        for manager, managerData in data.items():
+            managerData = _handleMaps(managerData)
+            self.roleManagements[manager] = (_handleLists(managerData.get("all_roles_id", [])),
+                                             _handleLists(managerData.get("any_roles_id", [])))
+
+    def _compileCogData(self, data: dict):
+        self.cogData: dict = data
+
+
+def diffTopLevel(oldData: dict, newData: dict) -> Tuple[set, set, set]:
+    oldData = _handleMaps(oldData)
+    newData = _handleMaps(newData)
+    added = {key for key in newData.keys() if key not in oldData}
+    removed = {key for key in oldData.keys() if key not in newData}
+    changed = {key for key, value in newData.items() if key in oldData and oldData[key] != value}
+    return added, removed, changed
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from typing import *
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _loadInotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class ConfigWatcher:
+    """
+    Calls `onChange(path)` on the event loop whenever one of the watched files changes on disk.
+
+    Uses inotify on the parent folders where it is available (atomic renames replace the inode,
+    so files themselves are not watched) and falls back to polling os.stat every `pollInterval` seconds.
+    Bursts of events for the same file are coalesced for `settle` seconds.
+    """
+
+    def __init__(self, files: List[str], onChange: Callable[[str], Any], folders: List[str] | None = None,
+                 pollInterval: float = 2.0, settle: float = 0.2):
+        self.files: Set[str] = {os.path.abspath(f) for f in files}
+        # every *.json in these folders is watched as well (configs/commands)
+        self.folders: Set[str] = {os.path.abspath(f) for f in folders or []}
+        self.onChange = onChange
+        self.pollInterval = pollInterval
+        self.settle = settle
+        self.mode: str = "stopped"
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.fd: int = -1
+        self.watches: Dict[int, str] = dict()
+        self.pollTask: asyncio.Task | None = None
+        self.signatures: Dict[str, tuple] = dict()
+        self.scheduled: Dict[str, asyncio.TimerHandle] = dict()
+
+    def isRunning(self) -> bool:
+        return self.mode != "stopped"
+
+    def start(self, forcePolling: bool = False) -> str:
+        if self.isRunning():
+            return self.mode
+        self.loop = asyncio.get_running_loop()
+        if not forcePolling and self._startInotify():
+            self.mode = "inotify"
+        else:
+            self.signatures = self._scan()
+            self.pollTask = self.loop.create_task(self._poll())
+            self.mode = "polling"
+        return self.mode
+
+    def stop(self):
+        for handle in self.scheduled.values():
+            handle.cancel()
+        self.scheduled.clear()
+        if self.fd >= 0:
+            self.loop.remove_reader(self.fd)
+            os.close(self.fd)
+            self.fd = -1
+            self.watches.clear()
+        if self.pollTask is not None:
+            self.pollTask.cancel()
+            self.pollTask = None
+        self.mode = "stopped"
+
+    def _isWatched(self, path: str) -> bool:
+        return path in self.files or (os.path.dirname(path) in self.folders and path.endswith(".json"))
+
+    def _startInotify(self) -> bool:
+        libc = _loadInotify()
+        if libc is None:
+            return False
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return False
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+        for folder in {os.path.dirname(f) for f in self.files} | self.folders:
+            wd = libc.inotify_add_watch(fd, os.fsencode(folder), mask)
+            if wd < 0:
+                os.close(fd)
+                self.watches.clear()
+                return False
+            self.watches[wd] = folder
+        self.fd = fd
+        self.loop.add_reader(fd, self._readEvents)
+        return True
+
+    def _readEvents(self):
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+            folder = self.watches.get(wd, None)
+            if folder is None or len(name) == 0:
+                continue
+            path = os.path.join(folder, os.fsdecode(name))
+            if self._isWatched(path):
+                self._schedule(path)
+
+    def _schedule(self, path: str):
+        handle = self.scheduled.pop(path, None)
+        if handle is not None:
+            handle.cancel()
+        self.scheduled[path] = self.loop.call_later(self.settle, self._fire, path)
+
+    def _fire(self, path: str):
+        self.scheduled.pop(path, None)
+        res = self.onChange(path)
+        if asyncio.iscoroutine(res):
+            self.loop.create_task(res)
+
+    def _scan(self) -> Dict[str, tuple]:
+        paths = set(self.files)
+        for folder in self.folders:
+            try:
+                paths.update(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".json"))
+            except OSError:
+                continue
+        signatures = dict()
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.pollInterval)
+            signatures = await asyncio.to_thread(self._scan)
+            for path in set(signatures.keys()) | set(self.signatures.keys()):
+                if signatures.get(path) != self.signatures.get(path):
+                    self._schedule(path)
+            self.signatures = signatures
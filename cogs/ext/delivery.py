@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from typing import *
+
+
+# Discord limits for one message
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBEDS = 10
+
+
+class Delivery:
+    """Text, embeds and/or a view sent to a single destination with one API call"""
+    __slots__ = ("destination", "target", "content", "embeds", "view", "ephemeral", "executionPath")
+
+    def __init__(self, destination: str, target, content: str | None = None, embeds: list | None = None,
+                 view=None, ephemeral: bool = False, executionPath: str = ""):
+        # "reply" for the interaction/ctx, "channel:<id>" or "dm:<id>" otherwise
+        self.destination = destination
+        self.target = target
+        self.content = content
+        self.embeds: list = embeds if embeds is not None else []
+        self.view = view
+        self.ephemeral = ephemeral
+        self.executionPath = executionPath
+
+
+def _splitContent(content: str, limit: int) -> List[str]:
+    # only for a single text that is already over the limit, prefer cutting at a line break
+    parts = []
+    while len(content) > limit:
+        cut = content.rfind("\n", 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        parts.append(content[:cut])
+        content = content[cut:].lstrip("\n")
+    if len(content) > 0:
+        parts.append(content)
+    return parts
+
+
+def coalesce(deliveries: List[Delivery], maxContent: int = MAX_CONTENT_LENGTH,
+             maxEmbeds: int = MAX_EMBEDS) -> List[Delivery]:
+    """
+    Merges the deliveries of each destination, in order, into as few sends as possible.
+
+    A send holds its texts joined by new lines, then its embeds, then at most one view (the layout
+    Discord shows), so a new send is only started when the view slot is taken, the ephemeral flag
+    differs or the content/embed limits would be exceeded. Destinations keep their first appearance order.
+    """
+    batches: Dict[str, List[Delivery]] = OrderedDict()
+    for delivery in deliveries:
+        group = batches.setdefault(delivery.destination, [])
+        contents = _splitContent(delivery.content, maxContent) if delivery.content is not None else []
+        items = [("content", content) for content in contents] + [("embed", embed) for embed in delivery.embeds]
+        if delivery.view is not None:
+            items.append(("view", delivery.view))
+        for kind, item in items:
+            current = group[-1] if len(group) > 0 else None
+            fits = current is not None and current.ephemeral == delivery.ephemeral and current.view is None
+            if fits and kind == "content":
+                fits = current.content is None or len(current.content) + 1 + len(item) <= maxContent
+            elif fits and kind == "embed":
+                fits = len(current.embeds) < maxEmbeds
+            if not fits:
+                current = Delivery(delivery.destination, delivery.target, ephemeral=delivery.ephemeral,
+                                   executionPath=delivery.executionPath)
+                group.append(current)
+            if kind == "content":
+                current.content = item if current.content is None else current.content + "\n" + item
+            elif kind == "embed":
+                current.embeds.append(item)
+            else:
+                current.view = item
+    return [batch for group in batches.values() for batch in group]
+
+
+def groupByDestination(deliveries: List[Delivery]) -> OrderedDict:
+    groups: OrderedDict[str, list] = OrderedDict()
+    for index, delivery in enumerate(deliveries):
+        groups.setdefault(delivery.destination, []).append((index, delivery))
+    return groups
+
+
+_semaphore: asyncio.Semaphore | None = None
+_semaphoreLimit = 0
+
+
+def getSendSemaphore(limit: int) -> asyncio.Semaphore:
+    # shared by every response so the limit bounds all sends in flight, not only one response's
+    global _semaphore, _semaphoreLimit
+    limit = max(1, int(limit))
+    if _semaphore is None or _semaphoreLimit != limit:
+        _semaphore = asyncio.Semaphore(limit)
+        _semaphoreLimit = limit
+    return _semaphore
+
+
+async def deliver(deliveries: List[Delivery], send: Callable[[Delivery], Awaitable], concurrent: bool = False,
+                  limit: int = 4) -> tuple:
+    """
+    Sends every delivery with `send` and returns (error, executionPath) of the first one that failed
+    (in delivery order) or (None, "").
+
+    Sequential mode stops at the first failure. Concurrent mode keeps the order within a destination,
+    which also keeps each destination inside one discord.py rate limit bucket, and sends to different
+    destinations in parallel with at most `limit` sends in flight; a failure stops only its destination.
+    """
+    groups = groupByDestination(deliveries) if concurrent else None
+    if groups is None or len(groups) <= 1:
+        for delivery in deliveries:
+            try:
+                await send(delivery)
+            except Exception as e:
+                return e, delivery.executionPath
+        return None, ""
+
+    semaphore = getSendSemaphore(limit)
+    failures: Dict[int, tuple] = dict()
+
+    async def sendGroup(group: list):
+        for index, delivery in group:
+            try:
+                async with semaphore:
+                    await send(delivery)
+            except Exception as e:
+                failures[index] = (e, delivery.executionPath)
+                return
+
+    await asyncio.gather(*(sendGroup(group) for group in groups.values()))
+    if len(failures) > 0:
+        return failures[min(failures.keys())]
+    return None, ""
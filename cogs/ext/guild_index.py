@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from typing import *
+
+
+class NameIndex:
+    """name -> {id: object}, objects with the same name keep the order they were added in"""
+    __slots__ = ("byName", "names")
+
+    def __init__(self, objects: Iterable = ()):
+        self.byName: Dict[str, Dict[int, Any]] = dict()
+        # id -> name it is indexed under, names can change before we see the update
+        self.names: Dict[int, str] = dict()
+        for obj in objects:
+            self.add(obj)
+
+    def add(self, obj):
+        self.remove(obj.id)
+        self.byName.setdefault(obj.name, dict())[obj.id] = obj
+        self.names[obj.id] = obj.name
+
+    def remove(self, objId: int):
+        name = self.names.pop(objId, None)
+        if name is None:
+            return
+        objects = self.byName.get(name, None)
+        if objects is not None:
+            objects.pop(objId, None)
+            if len(objects) == 0:
+                del self.byName[name]
+
+    def get(self, name: str) -> list:
+        objects = self.byName.get(name, None)
+        return list(objects.values()) if objects is not None else []
+
+    def first(self, name: str):
+        objects = self.byName.get(name, None)
+        return next(iter(objects.values())) if objects else None
+
+    def __len__(self):
+        return len(self.names)
+
+
+class GuildIndex:
+    """
+    Name indexes of one guild's members, roles, channels and categories.
+    Id lookups keep using the guild's own maps (guild.get_member, get_role, get_channel), they already are dicts.
+    """
+
+    def __init__(self, guild):
+        self.guild = guild
+        # members that arrive through chunking fire no events, the index is rebuilt once chunking completed
+        self.chunked = guild.chunked
+        self.members = NameIndex(guild.members)
+        self.roles = NameIndex(role for role in guild.roles if not role.is_default())
+        self.channels = NameIndex(guild.channels)
+        self.categories = NameIndex(guild.categories)
+
+    def addChannel(self, channel):
+        self.channels.add(channel)
+        if str(getattr(channel, "type", "")) == "category":
+            self.categories.add(channel)
+
+    def removeChannel(self, channelId: int):
+        self.channels.remove(channelId)
+        self.categories.remove(channelId)
+
+    def getStats(self) -> dict:
+        return {"members": len(self.members), "roles": len(self.roles), "channels": len(self.channels),
+                "categories": len(self.categories)}
+
+
+class GuildIndexes:
+    """
+    A GuildIndex per guild, built on the first lookup and then kept current from gateway events.
+
+    Until `start(bot)` registered the listeners nothing would keep an index current, so lookups
+    get a fresh index every time (the same cost as scanning the guild).
+    """
+
+    def __init__(self):
+        self.bot = None
+        self.indexes: Dict[int, GuildIndex] = dict()
+        self.builds = 0
+        self.updates = 0
+
+    def start(self, bot):
+        if self.bot is bot:
+            return
+        self.bot = bot
+        self.indexes.clear()
+        listeners = {"on_member_join": self.onMemberJoin, "on_member_remove": self.onMemberRemove,
+                     "on_member_update": self.onMemberUpdate, "on_user_update": self.onUserUpdate,
+                     "on_guild_role_create": self.onRoleCreate, "on_guild_role_delete": self.onRoleDelete,
+                     "on_guild_role_update": self.onRoleUpdate, "on_guild_channel_create": self.onChannelCreate,
+                     "on_guild_channel_delete": self.onChannelDelete,
+                     "on_guild_channel_update": self.onChannelUpdate, "on_guild_remove": self.onGuildRemove,
+                     "on_guild_available": self.onGuildAvailable, "on_ready": self.onReady}
+        for event, listener in listeners.items():
+            bot.add_listener(listener, event)
+
+    def get(self, guild) -> GuildIndex:
+        index = self.indexes.get(guild.id, None)
+        if index is None or index.guild is not guild or index.chunked != guild.chunked:
+            index = GuildIndex(guild)
+            self.builds += 1
+            if self.bot is not None:
+                self.indexes[guild.id] = index
+        return index
+
+    def invalidate(self, guildId: int | None = None) -> int:
+        if guildId is None:
+            dropped = len(self.indexes)
+            self.indexes.clear()
+            return dropped
+        return 1 if self.indexes.pop(guildId, None) is not None else 0
+
+    def _built(self, guild) -> GuildIndex | None:
+        # events for guilds nobody looked up yet are ignored, their index is built from the cache later
+        index = self.indexes.get(guild.id, None) if guild is not None else None
+        if index is not None:
+            self.updates += 1
+        return index
+
+    async def onReady(self):
+        # a new session rebuilds discord.py's cache with new objects
+        self.invalidate()
+
+    async def onGuildRemove(self, guild):
+        self.invalidate(guild.id)
+
+    async def onGuildAvailable(self, guild):
+        # after an outage the guild's members and channels are loaded again, the old index can miss them
+        self.invalidate(guild.id)
+
+    async def onMemberJoin(self, member):
+        index = self._built(member.guild)
+        if index is not None:
+            index.members.add(member)
+
+    async def onMemberRemove(self, member):
+        index = self._built(member.guild)
+        if index is not None:
+            index.members.remove(member.id)
+
+    async def onMemberUpdate(self, before, after):
+        index = self._built(after.guild)
+        if index is not None:
+            index.members.add(after)
+
+    async def onUserUpdate(self, before, after):
+        if before.name == after.name:
+            return
+        for index in self.indexes.values():
+            name = index.members.names.get(after.id, None)
+            if name is not None and name != after.name:
+                member = index.members.byName[name][after.id]
+                self.updates += 1
+                index.members.add(member)
+
+    async def onRoleCreate(self, role):
+        index = self._built(role.guild)
+        if index is not None:
+            index.roles.add(role)
+
+    async def onRoleDelete(self, role):
+        index = self._built(role.guild)
+        if index is not None:
+            index.roles.remove(role.id)
+
+    async def onRoleUpdate(self, before, after):
+        index = self._built(after.guild)
+        if index is not None:
+            index.roles.add(after)
+
+    async def onChannelCreate(self, channel):
+        index = self._built(channel.guild)
+        if index is not None:
+            index.addChannel(channel)
+
+    async def onChannelDelete(self, channel):
+        index = self._built(channel.guild)
+        if index is not None:
+            index.removeChannel(channel.id)
+
+    async def onChannelUpdate(self, before, after):
+        index = self._built(after.guild)
+        if index is not None:
+            index.addChannel(after)
+
+    def getStats(self) -> dict:
+        return {"guilds": len(self.indexes), "builds": self.builds, "updates": self.updates}
+
+
+guildIndexes = GuildIndexes()
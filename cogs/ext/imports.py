@@ -8,7 +8,6 @@ from discord.ext import commands
 from discord import Role
 import discord
 from cogs.ext.config_manager import ConfigManager
-import cogs.ext.messages as messages
 import threading
 from datetime import datetime, timedelta
 
@@ -17,19 +16,17 @@ from discord import File
 from discord.ext import commands
 import cogs.ext.utils.utils as utils
 
-import cogs.ext.buttons as buttons
-from cogs.ext.utils.roles_utils import getRoles
-import requests as rq
-import cogs.ext.messages as messages
+# every module below star imports this one while it is still being imported, so the helper
+# modules come first and the modules that need each other import those names themselves
 import cogs.ext.placeholders as placeholders_utils
+from cogs.ext.utils.roles_utils import getRoles
 from cogs.ext.utils.members_utils import *
 from cogs.ext.utils.channel_utils import *
 from cogs.ext.utils.emoji_utils import *
 from cogs.ext.utils.sticker_utils import *
 from cogs.ext.utils.category_utils import *
 from cogs.ext.utils.roles_utils import *
-import cogs.ext.actions as actions
 from cogs.ext.actionHandlers import *
-import requests as rq
-
-
+import cogs.ext.messages as messages
+import cogs.ext.buttons as buttons
+import cogs.ext.actions as actions
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from typing import *
+
+
+class JSONFileCache:
+    """
+    Bounded LRU cache of parsed JSON files.
+
+    Every entry remembers the mtime and size of the file it was parsed from, a lookup only
+    costs one os.stat unless the file changed on disk. The cached dicts are shared, do not mutate them.
+    """
+
+    def __init__(self, loader: Callable[[str], dict], maxSize: int = 128):
+        self.loader = loader
+        self.maxSize = max(1, int(maxSize))
+        self.entries: OrderedDict[str, tuple] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, path: str) -> dict:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.entries.pop(path, None)
+            self.misses += 1
+            return self.loader(path)
+
+        entry = self.entries.get(path, None)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            self.entries.move_to_end(path)
+            self.hits += 1
+            return entry[2]
+
+        self.misses += 1
+        data = self.loader(path)
+        self.entries[path] = (stat.st_mtime_ns, stat.st_size, data)
+        self.entries.move_to_end(path)
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return data
+
+    def invalidate(self, path: str | None = None):
+        if path is None:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+        elif self.entries.pop(path, None) is not None:
+            self.invalidations += 1
+
+    def getStats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "invalidations": self.invalidations, "size": len(self.entries), "max_size": self.maxSize,
+                "hit_rate": self.hits / total if total > 0 else 0.0}
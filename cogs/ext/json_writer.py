@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import *
+
+
+class JSONWriter:
+    """
+    Write-behind JSON persistence.
+
+    schedule() only records the latest document for a path, a worker thread writes it once the path
+    has been quiet for `debounce` seconds (or `maxDelay` seconds after the first pending save) and
+    replaces the file atomically through a temp file in the same folder. The document is snapshotted
+    by schedule() on the caller's thread with the compact C encoder, the worker only indents the
+    snapshot, so it never reads a dict the event loop is halfway through changing.
+    """
+
+    def __init__(self, debounce: float = 1.0, maxDelay: float | None = None, indent: int | None = 4,
+                 onWrite: Callable[[str], Any] | None = None):
+        self.debounce = max(0.0, float(debounce))
+        self.maxDelay = max(self.debounce, float(maxDelay)) if maxDelay is not None else self.debounce * 5
+        self.indent = indent
+        self.onWrite = onWrite
+        self.lock = threading.Condition()
+        # serializes pop+write so an older document never lands on disk after a newer one
+        self.writeLock = threading.Lock()
+        self.pending: Dict[str, list] = dict()
+        self.thread: threading.Thread | None = None
+        self.closed = False
+        self.writes = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def schedule(self, path: str, data) -> None:
+        path = os.path.abspath(path)
+        if self.closed:
+            self.writeNow(path, data)
+            return
+        try:
+            snapshot = json.dumps(data)
+        except (TypeError, ValueError) as e:
+            self.failures += 1
+            print("Couldn't save " + path, e)
+            return
+        now = time.monotonic()
+        with self.lock:
+            entry = self.pending.get(path, None)
+            if entry is None:
+                self.pending[path] = [data, now, now, snapshot]
+            else:
+                entry[0] = data
+                entry[2] = now
+                entry[3] = snapshot
+                self.coalesced += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="JSONWriter", daemon=True)
+                self.thread.start()
+            self.lock.notify()
+
+    def getPending(self, path: str):
+        path = os.path.abspath(path)
+        with self.lock:
+            entry = self.pending.get(path, None)
+            return None if entry is None else entry[0]
+
+    def discard(self, path: str) -> bool:
+        path = os.path.abspath(path)
+        with self.lock:
+            return self.pending.pop(path, None) is not None
+
+    def writeNow(self, path: str, data) -> None:
+        path = os.path.abspath(path)
+        with self.writeLock:
+            with self.lock:
+                self.pending.pop(path, None)
+            self._write(path, json.dumps(data))
+
+    def flush(self) -> None:
+        with self.writeLock:
+            with self.lock:
+                due = [(path, entry[3]) for path, entry in self.pending.items()]
+                self.pending.clear()
+            for path, data in due:
+                self._write(path, data)
+
+    def close(self) -> None:
+        self.flush()
+        with self.lock:
+            self.closed = True
+            self.lock.notify()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+
+    def getStats(self) -> dict:
+        with self.lock:
+            return {"writes": self.writes, "coalesced": self.coalesced, "failures": self.failures,
+                    "pending": len(self.pending)}
+
+    def _deadline(self, entry: list) -> float:
+        return min(entry[2] + self.debounce, entry[1] + self.maxDelay)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while True:
+                    if self.closed:
+                        return
+                    if len(self.pending) > 0:
+                        wait = min(self._deadline(entry) for entry in self.pending.values()) - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self.lock.wait(wait)
+                    else:
+                        self.lock.wait()
+
+            with self.writeLock:
+                with self.lock:
+                    now = time.monotonic()
+                    due = [path for path, entry in self.pending.items() if self._deadline(entry) <= now]
+                    due = [(path, self.pending.pop(path)[3]) for path in due]
+                for path, data in due:
+                    self._write(path, data)
+
+    def _format(self, snapshot: str) -> str:
+        return snapshot if self.indent is None else json.dumps(json.loads(snapshot), indent=self.indent)
+
+    def _write(self, path: str, snapshot: str) -> None:
+        tmpPath = None
+        try:
+            content = self._format(snapshot)
+            folder = os.path.dirname(path) or "."
+            os.makedirs(folder, exist_ok=True)
+            fd, tmpPath = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=folder)
+            with os.fdopen(fd, "w") as jsonfile:
+                jsonfile.write(content)
+                jsonfile.flush()
+                os.fsync(jsonfile.fileno())
+            os.chmod(tmpPath, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+            os.replace(tmpPath, path)
+            tmpPath = None
+            self.writes += 1
+            if self.onWrite is not None:
+                self.onWrite(path)
+        except Exception as e:
+            self.failures += 1
+            print("Couldn't save " + path, e)
+        finally:
+            if tmpPath is not None and os.path.exists(tmpPath):
+                os.remove(tmpPath)
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import *
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS levels (
+    guild_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    xp INTEGER NOT NULL DEFAULT 0,
+    level INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (guild_id, member_id)
+) WITHOUT ROWID;
+"""
+
+UPSERT = ("INSERT INTO levels (guild_id, member_id, xp, level, updated_at) VALUES (?, ?, ?, ?, ?) "
+          "ON CONFLICT (guild_id, member_id) DO UPDATE SET xp = excluded.xp, level = excluded.level, "
+          "updated_at = excluded.updated_at")
+
+
+def xpForNextLevel(level: int) -> int:
+    """XP needed to go from level to level + 1"""
+    return 5 * level * level + 50 * level + 100
+
+
+def xpForLevel(level: int) -> int:
+    """Total XP a member has when reaching level"""
+    return sum(xpForNextLevel(current) for current in range(max(0, level)))
+
+
+def levelForXP(xp: int, level: int = 0) -> int:
+    """The level of a member with xp total XP, starting the search at a level known to be reached"""
+    level = max(0, level)
+    needed = xpForLevel(level)
+    while xp >= needed + xpForNextLevel(level):
+        needed += xpForNextLevel(level)
+        level += 1
+    return level
+
+
+class MemberXP:
+    __slots__ = ("xp", "level", "lastAward")
+
+    def __init__(self, xp: int = 0, level: int = 0):
+        self.xp = xp
+        self.level = level
+        # time.monotonic() of the last message that gave XP, not stored
+        self.lastAward = float("-inf")
+
+
+class LevelingStore:
+    """
+    Member XP per guild, kept in memory and written behind to SQLite.
+
+    A guild's rows are read once, on the first message from it, and every change after that only marks the
+    member dirty. The dirty rows are written in one transaction every `flushInterval` seconds and on close,
+    so a message costs a dict lookup instead of a disk write. Like the other stores the database is only
+    touched from one worker thread and the async methods never block the event loop.
+    """
+
+    def __init__(self, databasePath: str, xpMin: int = 15, xpMax: int = 25, cooldown: float = 60.0,
+                 flushInterval: float = 10.0):
+        self.databasePath = databasePath
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="LevelingStore")
+        self.connection: sqlite3.Connection | None = None
+        self.openLock = threading.Lock()
+        self.xpMin = 15
+        self.xpMax = 25
+        self.cooldown = 60.0
+        self.flushInterval = 10.0
+        self.configure(xpMin, xpMax, cooldown, flushInterval)
+        self.guilds: Dict[int, Dict[int, MemberXP]] = dict()
+        self.loading: Dict[int, asyncio.Future] = dict()
+        self.dirty: Set[Tuple[int, int]] = set()
+        self.task: asyncio.Task | None = None
+        self.awards = 0
+        self.cooldownSkips = 0
+        self.flushes = 0
+        self.rowsWritten = 0
+
+    def configure(self, xpMin: int, xpMax: int, cooldown: float, flushInterval: float):
+        self.xpMin = max(0, int(xpMin))
+        self.xpMax = max(self.xpMin, int(xpMax))
+        self.cooldown = max(0.0, float(cooldown))
+        self.flushInterval = max(0.1, float(flushInterval))
+
+    def _connect(self) -> sqlite3.Connection:
+        with self.openLock:
+            if self.connection is None:
+                folder = os.path.dirname(self.databasePath)
+                if len(folder) > 0:
+                    os.makedirs(folder, exist_ok=True)
+                connection = sqlite3.connect(self.databasePath, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.executescript(SCHEMA)
+                self.connection = connection
+            return self.connection
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def _loadGuild(self, guildId: int) -> Dict[int, MemberXP]:
+        cursor = self._connect().execute("SELECT member_id, xp, level FROM levels WHERE guild_id = ?", (guildId,))
+        return {row[0]: MemberXP(row[1], row[2]) for row in cursor.fetchall()}
+
+    def _write(self, rows: List[tuple]) -> int:
+        connection = self._connect()
+        with connection:
+            connection.executemany(UPSERT, rows)
+        return len(rows)
+
+    async def _loadInto(self, guildId: int) -> Dict[int, MemberXP]:
+        try:
+            loaded = await self._run(self._loadGuild, guildId)
+        finally:
+            self.loading.pop(guildId, None)
+        return self.guilds.setdefault(guildId, loaded)
+
+    async def getGuild(self, guildId: int) -> Dict[int, MemberXP]:
+        members = self.guilds.get(guildId, None)
+        if members is not None:
+            return members
+        # messages arriving while the guild loads wait for the same read
+        future = self.loading.get(guildId, None)
+        if future is None:
+            future = asyncio.ensure_future(self._loadInto(guildId))
+            self.loading[guildId] = future
+        return await asyncio.shield(future)
+
+    def _member(self, members: Dict[int, MemberXP], memberId: int) -> MemberXP:
+        member = members.get(memberId, None)
+        if member is None:
+            member = MemberXP()
+            members[memberId] = member
+        return member
+
+    async def award(self, guildId: int, memberId: int) -> int | None:
+        """Gives the member XP for a message, returns their new level if they leveled up"""
+        members = self.guilds.get(guildId, None)
+        if members is None:
+            members = await self.getGuild(guildId)
+        member = self._member(members, memberId)
+        now = time.monotonic()
+        if now - member.lastAward < self.cooldown:
+            self.cooldownSkips += 1
+            return None
+        member.lastAward = now
+        member.xp += random.randint(self.xpMin, self.xpMax)
+        self.dirty.add((guildId, memberId))
+        self.awards += 1
+        level = levelForXP(member.xp, member.level)
+        if level == member.level:
+            return None
+        member.level = level
+        return level
+
+    async def getMember(self, guildId: int, memberId: int) -> MemberXP:
+        member = (await self.getGuild(guildId)).get(memberId, None)
+        return member if member is not None else MemberXP()
+
+    async def setXP(self, guildId: int, memberId: int, xp: int) -> MemberXP:
+        member = self._member(await self.getGuild(guildId), memberId)
+        member.xp = max(0, int(xp))
+        member.level = levelForXP(member.xp)
+        self.dirty.add((guildId, memberId))
+        return member
+
+    async def setLevel(self, guildId: int, memberId: int, level: int) -> MemberXP:
+        member = self._member(await self.getGuild(guildId), memberId)
+        member.level = max(0, int(level))
+        member.xp = xpForLevel(member.level)
+        self.dirty.add((guildId, memberId))
+        return member
+
+    def _takeDirty(self) -> List[tuple]:
+        now = time.time()
+        rows = []
+        for guildId, memberId in self.dirty:
+            member = self.guilds.get(guildId, {}).get(memberId, None)
+            if member is not None:
+                rows.append((guildId, memberId, member.xp, member.level, now))
+        self.dirty = set()
+        return rows
+
+    async def flush(self) -> int:
+        # the values are copied before the write, changes made during it are left for the next flush
+        rows = self._takeDirty()
+        if len(rows) == 0:
+            return 0
+        try:
+            written = await self._run(self._write, rows)
+        except Exception:
+            self.dirty.update((row[0], row[1]) for row in rows)
+            raise
+        self.flushes += 1
+        self.rowsWritten += written
+        return written
+
+    def start(self):
+        if self.task is not None and not self.task.done():
+            return
+        self.task = asyncio.create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.flushInterval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print("Couldn't save levels, retrying on the next flush:", e)
+
+    def getStats(self) -> dict:
+        return {"guilds": len(self.guilds), "members": sum(len(members) for members in self.guilds.values()),
+                "dirty": len(self.dirty), "awards": self.awards, "cooldown_skips": self.cooldownSkips,
+                "flushes": self.flushes, "rows_written": self.rowsWritten}
+
+    def close(self):
+        # the event loop is gone at exit, what is still dirty is written from here
+        self.executor.shutdown(wait=True)
+        rows = self._takeDirty()
+        if len(rows) > 0:
+            try:
+                self._write(rows)
+            except Exception as e:
+                print("Couldn't save levels:", e)
+        with self.openLock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
@@ -1,82 +1,70 @@
 from cogs.ext.imports import *
+from cogs.ext import buttons, actions
+from cogs.ext.response_plans import ResponsePlan, EmbedPlan
+from cogs.ext.delivery import Delivery, deliver, coalesce
+from cogs.ext.reply_tracker import ReplyTracker
+
+# invoking message id -> replied, only the first output of a prefix command is sent as a reply
+replyTracker = ReplyTracker()
+
 
 def isEmbedEph(embed: discord.Embed, eph: str) -> bool:
-    return embed is not None and utils.configManager.isActivePlaceholder(eph) and eph in embed.title
+    return (embed is not None and embed.title is not None and utils.configManager.isActivePlaceholder(eph) and
+            eph in embed.title)
 
 
 def isMsgEph(msg, eph) -> bool:
     return utils.configManager.isActivePlaceholder(eph) and eph in msg
 
 
-async def handleMessageResponse(msg: str | None, embed: discord.Embed | None, buttonView: discord.ui.View | None,
-                                channel: discord.TextChannel | None, DMUser: discord.User | None, isEph: bool,
-                                interaction: discord.Interaction | None = None,
-                                ctx: discord.ext.commands.context.Context | None = None):
-    if embed is not None:
-        embed.title = embed.title.replace(utils.configManager.getEphPlaceholder(), "")
-    hasMessage = msg is not None and len(msg.replace(" ", "")) > 0
-    if hasMessage:
-        msg = msg.replace(utils.configManager.getEphPlaceholder(), "")
-    if interaction is not None and not interaction.is_expired():
-        if interaction.is_done():
-            if embed is not None:
-                if interaction.is_done():
-                    await interaction.channel.send(embed=embed)
-            if hasMessage:
-                await interaction.response.send_message(msg, ephemeral=isEph)
-            if buttonView is not None:
-                await interaction.channel.send(view=buttonView())
-        else:
-            if embed is not None:
-                embed.title = embed.title.replace(utils.configManager.getEphPlaceholder(), "")
-                await interaction.response.send_message(embed=embed, ephemeral=isEph)
-            if hasMessage:
-                await interaction.response.send_message(msg, ephemeral=isEph)
-            if buttonView is not None:
-                await interaction.response.send_message(view=buttonView(), ephemeral=isEph)
-    if ctx is not None:
-        hasReplied = False
-        async for message in ctx.channel.history(after=ctx.message, limit=100):
-            if (message.reference and message.reference.message_id == ctx.message.id and
-                    message.author.id == ctx.bot.user.id):
-                hasReplied = True
-                break
-        if hasReplied:
-            if embed is not None:
-                await ctx.send(embed=embed)
-            if hasMessage:
-                await ctx.send(msg)
-            if buttonView is not None:
-                await ctx.send(view=buttonView())
+async def __sendInteraction(interaction: discord.Interaction, isEph: bool, **kwargs):
+    # only the first message can be the interaction response, the rest are follow ups
+    if not interaction.response.is_done():
+        await interaction.response.send_message(ephemeral=isEph, **kwargs)
+    else:
+        await interaction.followup.send(ephemeral=isEph, **kwargs)
+
+
+async def sendDelivery(delivery: Delivery, interaction: discord.Interaction | None = None,
+                       ctx: discord.ext.commands.context.Context | None = None):
+    kwargs = dict()
+    if delivery.content is not None:
+        kwargs["content"] = delivery.content
+    if len(delivery.embeds) > 0:
+        kwargs["embeds"] = delivery.embeds
+    if delivery.view is not None:
+        kwargs["view"] = delivery.view()
+    if len(kwargs) == 0:
+        return
+
+    if delivery.destination != "reply":
+        await delivery.target.send(**kwargs)
+    elif interaction is not None:
+        if not interaction.is_expired():
+            await __sendInteraction(interaction, delivery.ephemeral, **kwargs)
+    elif ctx is not None:
+        if replyTracker.hasReplied(ctx.message.id):
+            await ctx.send(**kwargs)
         else:
-            if embed is not None:
-                await ctx.reply(embed=embed, ephemeral=isEph)
-            if hasMessage:
-                await ctx.reply(msg, ephemeral=isEph)
-            if buttonView is not None:
-                await ctx.reply(view=buttonView(), ephemeral=isEph)
-    if channel is not None:
-        if embed is not None:
-            await channel.send(embed=embed)
-        if hasMessage:
-            await channel.send(msg)
-        if buttonView is not None:
-            await channel.send(view=buttonView())
-    if DMUser is not None:
-        if embed is not None:
-            await DMUser.send(embed=embed)
-        if hasMessage:
-            await DMUser.send(msg)
-        if buttonView is not None:
-            await DMUser.send(view=buttonView())
+            await ctx.reply(ephemeral=delivery.ephemeral, **kwargs)
+            replyTracker.markReplied(ctx.message.id)
 
 
-async def sendResponse(mainData: dict, DMUser: discord.User | None, interaction: discord.Interaction | None = None,
-                       ctx: discord.ext.commands.context.Context | None = None) -> tuple:
-    if len(mainData) == 0:
-        return "No data given", ""
-
+def buildDeliveries(mainData: dict, DMUser: discord.User | None, interaction: discord.Interaction | None = None,
+                    ctx: discord.ext.commands.context.Context | None = None) -> tuple:
+    """Returns the deliveries in send order and the (error, execution path) that stopped collecting them"""
     eph = utils.configManager.getEphPlaceholder()
+
+    def text(msg: str) -> str | None:
+        return msg.replace(eph, "") if len(msg.replace(" ", "")) > 0 else None
+
+    def embeds(embed: discord.Embed) -> list:
+        if embed.title is not None:
+            embed.title = embed.title.replace(eph, "")
+        return [embed]
+
+    deliveries: List[Delivery] = []
+    hasReply = interaction is not None or ctx is not None
     for messageName, data in mainData.items():
         messages: list = data.get("messages", [])
         embed: discord.Embed | None = data.get("embed", None)
@@ -88,53 +76,67 @@ async def sendResponse(mainData: dict, DMUser: discord.User | None, interaction:
         channelButtons: list = data.get("channel_buttons", [])
         channel: discord.TextChannel | None = data.get("channel", None)
         buttonView: discord.ui.View | None = data.get("button", None)
+        executionPath = str(data.get("execution_path", ""))
 
-        try:
-            if (len(messages) == 0 and embed is None and len(DMMessages) == 0 and len(DMEmbeds) == 0 and
-                    len(DMButtons) == 0 and len(channelEmbeds) == 0 and len(channelMessages) == 0 and
-                    len(channelButtons) == 0):
-                return "No data given", str(data.get("execution_path", ""))
-
-            if interaction is None and ctx is None and channel is None:
-                return (f"Expected valid text channel when there is no interaction! for message {messageName}",
-                        str(data.get("execution_path", "")))
+        if (len(messages) == 0 and embed is None and len(DMMessages) == 0 and len(DMEmbeds) == 0 and
+                len(DMButtons) == 0 and len(channelEmbeds) == 0 and len(channelMessages) == 0 and
+                len(channelButtons) == 0):
+            return deliveries, ("No data given", executionPath)
 
-            await handleMessageResponse(None, embed, None, None, None,
-                                        isEmbedEph(embed, eph), interaction=interaction, ctx=ctx)
+        if not hasReply and channel is None:
+            return deliveries, (f"Expected valid text channel when there is no interaction! for message "
+                                f"{messageName}", executionPath)
 
+        if hasReply:
+            if embed is not None:
+                isEph = isEmbedEph(embed, eph)
+                deliveries.append(Delivery("reply", None, embeds=embeds(embed), ephemeral=isEph,
+                                           executionPath=executionPath))
             for msg in messages:
-                await handleMessageResponse(msg, None, None, None, None,
-                                            isMsgEph(msg, eph), interaction=interaction, ctx=ctx)
-
-            if channel is not None:
-                for channelMessage in channelMessages:
-                    await handleMessageResponse(channelMessage, None, None, channel, None,
-                                                isMsgEph(channelMessage, eph), interaction=interaction, ctx=ctx)
-                for channelEmbed in channelEmbeds:
-                    await handleMessageResponse(None, channelEmbed, None, channel, None,
-                                                isEmbedEph(channelEmbed, eph), interaction=interaction, ctx=ctx)
-                for channelButton in channelButtons:
-                    await handleMessageResponse(None, None, buttonView, channel, None,
-                                                buttonView.is_active_placeholder, interaction=interaction, ctx=ctx)
-                    await channel.send(view=channelButton())
-
-            if DMUser is not None:
-                for DM in DMMessages:
-                    await handleMessageResponse(DM, None, None, None, DMUser,
-                                                isMsgEph(DM, eph), interaction=interaction, ctx=ctx)
-                for DMEmbed in DMEmbeds:
-                    await handleMessageResponse(None, DMEmbed, None, None, DMUser,
-                                                isEmbedEph(DMEmbed, eph), interaction=interaction, ctx=ctx)
-                for DMButton in DMButtons:
-                    await handleMessageResponse(None, None, DMButton, None, DMUser,
-                                                buttonView.is_active_placeholder, interaction=interaction, ctx=ctx)
-
-            if buttonView is not None:
-                await handleMessageResponse(None, None, buttonView, None, None,
-                                            buttonView.is_active_placeholder, interaction=interaction, ctx=ctx)
-        except Exception as e:
-            return e, str(data.get("execution_path", ""))
-    return None, ""
+                deliveries.append(Delivery("reply", None, content=text(msg), ephemeral=isMsgEph(msg, eph),
+                                           executionPath=executionPath))
+
+        if channel is not None:
+            destination = "channel:" + str(channel.id)
+            for channelMessage in channelMessages:
+                deliveries.append(Delivery(destination, channel, content=text(channelMessage),
+                                           executionPath=executionPath))
+            for channelEmbed in channelEmbeds:
+                deliveries.append(Delivery(destination, channel, embeds=embeds(channelEmbed),
+                                           executionPath=executionPath))
+            for channelButton in channelButtons:
+                deliveries.append(Delivery(destination, channel, view=channelButton, executionPath=executionPath))
+
+        if DMUser is not None:
+            destination = "dm:" + str(DMUser.id)
+            for DM in DMMessages:
+                deliveries.append(Delivery(destination, DMUser, content=text(DM), executionPath=executionPath))
+            for DMEmbed in DMEmbeds:
+                deliveries.append(Delivery(destination, DMUser, embeds=embeds(DMEmbed), executionPath=executionPath))
+            for DMButton in DMButtons:
+                deliveries.append(Delivery(destination, DMUser, view=DMButton, executionPath=executionPath))
+
+        if hasReply and buttonView is not None:
+            deliveries.append(Delivery("reply", None, view=buttonView, ephemeral=buttonView.is_active_placeholder,
+                                       executionPath=executionPath))
+    return deliveries, (None, "")
+
+
+async def sendResponse(mainData: dict, DMUser: discord.User | None, interaction: discord.Interaction | None = None,
+                       ctx: discord.ext.commands.context.Context | None = None) -> tuple:
+    if len(mainData) == 0:
+        return "No data given", ""
+
+    deliveries, buildError = buildDeliveries(mainData, DMUser, interaction=interaction, ctx=ctx)
+    if utils.configManager.isCoalescingMessages():
+        deliveries = coalesce(deliveries)
+    error, execPath = await deliver(deliveries, lambda delivery: sendDelivery(delivery, interaction=interaction,
+                                                                              ctx=ctx),
+                                    concurrent=utils.configManager.isConcurrentDelivery(),
+                                    limit=utils.configManager.getMaxConcurrentSends())
+    if error is not None:
+        return error, execPath
+    return buildError
 
 
 async def MainBuild(bot: commands.Bot, commandName: str, executionPath: str, placeholders: dict,
@@ -158,14 +160,16 @@ async def MainBuild(bot: commands.Bot, commandName: str, executionPath: str, pla
 
 async def __handleOneMessage(bot, commandName, ctx, executionPath, interaction, msg, multiMessage, placeholders,
                              error) -> dict:
+    plan = utils.configManager.getResponsePlan(commandName, msg)
     (DM, DMEmbeds, DMButtons) = await buildDMData(bot, commandName, msg, executionPath, placeholders,
-                                                  interaction=interaction, ctx=ctx)
+                                                  interaction=interaction, ctx=ctx, plan=plan)
     (builtChannelEmbeds, builtChannelMessages, channel, builtChannelButtons) = (
         await buildChannelData(bot, commandName, msg, placeholders, executionPath, error, interaction=interaction,
-                               ctx=ctx))
-    multiMessage[msg] = {"messages": buildMessageData(commandName, msg, placeholders),
-                         "embed": await buildEmbed(bot, commandName, msg, executionPath, placeholders, error,
-                                                   interaction=interaction, ctx=ctx),
+                               ctx=ctx, plan=plan))
+    multiMessage[msg] = {"messages": renderLines(plan.messages, placeholders),
+                         "embed": await buildEmbedFromPlan(bot, command=commandName, embedPlan=plan.embed,
+                                                           executionPath=executionPath, placeholders=placeholders,
+                                                           error=error, interaction=interaction, ctx=ctx),
                          "dm_messages": DM,
                          "dm_embeds": DMEmbeds,
                          "dm_buttons": DMButtons,
@@ -173,7 +177,8 @@ async def __handleOneMessage(bot, commandName, ctx, executionPath, interaction,
                          "channel_messages": builtChannelMessages,
                          "channel_buttons": builtChannelButtons,
                          "channel": channel,
-                         "button": buttons.buildButtonData(bot, msg, placeholders),
+                         "button": buttons.buildButtonData(bot, plan.view, placeholders)
+                         if plan.view is not None else None,
                          "execution_path": executionPath}
     return multiMessage
 
@@ -198,83 +203,66 @@ async def isCommandRestricted(bot: commands.Bot, commandName: str, executionPath
 
 async def buildChannelData(bot: commands.Bot, commandName: str, message: str, placeholders: dict, executionPath: str,
                            error, interaction: discord.Interaction | None = None,
-                           ctx: discord.ext.commands.context.Context | None = None) -> tuple:
+                           ctx: discord.ext.commands.context.Context | None = None,
+                           plan: ResponsePlan | None = None) -> tuple:
     if bot is None and interaction is None and ctx is None:
         raise Exception("Code error!")
-    channelMessages: list = utils.configManager.getMessagesByChannel(message).copy()
-    channelEmbeds: list = utils.configManager.getEmbedsByChannel(message).copy()
-    channelButtons: list = utils.configManager.getButtonsByChannel(message).copy()
-    builtChannelEmbeds = []
-    if len(channelEmbeds) > 0:
-        for EmbedName in channelEmbeds:
-            embed = await buildEmbed(bot, commandName, EmbedName, executionPath, placeholders, error,
-                                     interaction=interaction, ctx=ctx)
-            if embed is not None:
-                builtChannelEmbeds.append(embed.copy())
+    if plan is None:
+        plan = utils.configManager.getResponsePlan(commandName, message)
+    channel: discord.abc.GuildChannel | None = bot.get_channel(plan.channelId)
+    if channel is None:
+        return [], [], None, []
 
-    builtChannelMessages = []
-    if len(channelMessages) > 0:
-        for messageName in channelMessages:
-            for msg in buildMessageData(commandName, messageName, placeholders):
-                builtChannelMessages.append(msg)
+    if not isinstance(channel, discord.TextChannel):
+        if error is None:
+            raise Exception("Text channel expected")
+        return [], [], None, []
+
+    builtChannelEmbeds = []
+    for embedPlan in plan.channel.embeds:
+        embed = await buildEmbedFromPlan(bot, commandName, embedPlan, executionPath, placeholders, error,
+                                         interaction=interaction, ctx=ctx)
+        if embed is not None:
+            builtChannelEmbeds.append(embed)
 
     builtChannelButtons = []
-    if len(channelButtons) > 0:
-        for buttonName in channelButtons:
-            button = buttons.buildButtonData(bot, buttonName, placeholders)
-            if button is not None:
-                builtChannelButtons.append(button)
-
-    channelId: int = utils.configManager.getChannelIdByName(message)
-    channel: discord.abc.GuildChannel | None = bot.get_channel(channelId)
-    if channel is None:
-        return [], [], None, []
+    for buttonName in plan.channel.views:
+        button = buttons.buildButtonData(bot, buttonName, placeholders)
+        if button is not None:
+            builtChannelButtons.append(button)
 
-    if isinstance(channel, discord.TextChannel):
-        return builtChannelEmbeds, builtChannelMessages, channel, builtChannelButtons
+    return builtChannelEmbeds, renderLines(plan.channel.messages, placeholders), channel, builtChannelButtons
 
-    if error is None:
-        raise Exception("Text channel expected")
-    else:
-        return [], [], None, []
+
+def renderLines(lines: tuple, placeholders: dict) -> list:
+    return [placeholders_utils.usePlaceholders(line, placeholders) for line in lines]
 
 
 def buildMessageData(commandName: str, msg: str, placeholders: dict) -> list:
-    message: list = utils.configManager.getCommandMessages(commandName, msg).copy()
-    if len(message) > 0:
-        for i in range(len(message)):
-            message[i] = placeholders_utils.usePlaceholders(message[i], placeholders)
-    return message
+    return renderLines(utils.configManager.getResponsePlan(commandName, msg).messages, placeholders)
 
 
 async def buildDMData(bot: commands.Bot, command: str, msg: str, executionPath: str, placeholders: dict,
                       interaction: discord.Interaction | None = None,
-                      ctx: discord.ext.commands.context.Context | None = None) -> tuple:
-    DM: list = utils.configManager.getDMMessages(msg).copy()
-    builtDMMessages = []
-    if len(DM) > 0:
-        for DMMessage in DM:
-            for msg in buildMessageData(command, DMMessage, placeholders):
-                builtDMMessages.append(msg)
-
-    DMEmbeds: list = utils.configManager.getDMEmbeds(msg).copy()
+                      ctx: discord.ext.commands.context.Context | None = None,
+                      plan: ResponsePlan | None = None) -> tuple:
+    if plan is None:
+        plan = utils.configManager.getResponsePlan(command, msg)
+
     builtDMEmbeds = []
-    if len(DMEmbeds) > 0:
-        for embedName in DMEmbeds:
-            embed = await buildEmbed(bot, command, embedName, executionPath, placeholders, None,
-                                     interaction=interaction, ctx=ctx)
-            if embed is not None:
-                builtDMEmbeds.append(embed.copy())
+    for embedPlan in plan.dm.embeds:
+        embed = await buildEmbedFromPlan(bot, command, embedPlan, executionPath, placeholders, None,
+                                         interaction=interaction, ctx=ctx)
+        if embed is not None:
+            builtDMEmbeds.append(embed)
 
-    DMButtons: list = utils.configManager.getDMViews(msg).copy()
     builtDMButtons = []
-    if len(DMButtons) > 0:
-        for DMButton in DMButtons:
-            button = buttons.buildButtonData(bot, DMButton, placeholders)
-            if button is not None:
-                builtDMButtons.append(button)
+    for DMButton in plan.dm.views:
+        button = buttons.buildButtonData(bot, DMButton, placeholders)
+        if button is not None:
+            builtDMButtons.append(button)
 
-    return (builtDMMessages, builtDMEmbeds, builtDMButtons)
+    return renderLines(plan.dm.messages, placeholders), builtDMEmbeds, builtDMButtons
 
 
 async def MainBuildError(bot: commands.Bot, commandName: str, executionPath: str, error,
@@ -291,13 +279,19 @@ async def MainBuildError(bot: commands.Bot, commandName: str, executionPath: str
 async def buildEmbed(bot: commands.Bot, command: str, message_key: str, executionPath: str, placeholders: dict, error,
                      interaction: discord.Interaction | None = None,
                      ctx: discord.ext.commands.context.Context | None = None) -> discord.Embed | None:
+    return await buildEmbedFromPlan(bot, command, utils.configManager.getEmbedPlan(message_key), executionPath,
+                                    placeholders, error, interaction=interaction, ctx=ctx)
+
+
+async def buildEmbedFromPlan(bot: commands.Bot, command: str, embedPlan: EmbedPlan | None, executionPath: str,
+                             placeholders: dict, error, interaction: discord.Interaction | None = None,
+                             ctx: discord.ext.commands.context.Context | None = None) -> discord.Embed | None:
     try:
-        data: dict | None = utils.configManager.getCommandEmbeds(command, message_key)
-        if data is None:
+        if embedPlan is None:
             return None
 
         embed = discord.Embed()
-        for key, value in data.items():
+        for key, value in embedPlan.items:
             if key == utils.configManager.getEmbedTitle():
                 embed.title = placeholders_utils.usePlaceholders(value, placeholders)
             elif key == utils.configManager.getEmbedAuthorName():
@@ -316,21 +310,17 @@ async def buildEmbed(bot: commands.Bot, command: str, message_key: str, executio
                 embed.description = placeholders_utils.usePlaceholders(value, placeholders)
             elif key == utils.configManager.getEmbedColor():
                 embed.colour = utils.getColour(placeholders_utils.usePlaceholders(value, placeholders))
-            elif key == utils.configManager.getEmbedFields():
-                notinlinePlaceholder = utils.configManager.getNotInLinePlaceholder()
-                if not isinstance(value, dict):
-                    raise Exception("Embed " + message_key +
-                                    " needs fields as map: Example (" + notinlinePlaceholder +
-                                    " placeholder is optional): " +
-                                    "'" + utils.configManager.getEmbedFields() + "': {'FieldName': 'FieldValue " +
-                                    notinlinePlaceholder + "'}")
-                for k, v in data.get(utils.configManager.getEmbedFields()).items():
-                    v = placeholders_utils.usePlaceholders(v, placeholders)
-                    k = placeholders_utils.usePlaceholders(k, placeholders)
-                    if notinlinePlaceholder in v and utils.configManager.isActivePlaceholder(notinlinePlaceholder):
-                        embed.add_field(name=k, value=v, inline=False)
-                    else:
-                        embed.add_field(name=k, value=v)
+
+        if embedPlan.fieldsError is not None:
+            raise Exception(embedPlan.fieldsError)
+        notinlinePlaceholder = utils.configManager.getNotInLinePlaceholder()
+        for k, v in embedPlan.fields:
+            v = placeholders_utils.usePlaceholders(v, placeholders)
+            k = placeholders_utils.usePlaceholders(k, placeholders)
+            if notinlinePlaceholder in v and utils.configManager.isActivePlaceholder(notinlinePlaceholder):
+                embed.add_field(name=k, value=v, inline=False)
+            else:
+                embed.add_field(name=k, value=v)
 
         return embed
 
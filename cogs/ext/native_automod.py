@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import asyncio
+from typing import *
+
+import discord
+
+from cogs.ext.automod import INVITE_PATTERN
+from cogs.ext.target_executor import targetExecutor
+
+# Discord's limits for keyword rules
+KEYWORD_LIMIT = 1000
+KEYWORD_LENGTH = 60
+REGEX_LIMIT = 10
+KEYWORD_RULE_LIMIT = 6
+EXEMPT_ROLES_LIMIT = 20
+EXEMPT_CHANNELS_LIMIT = 50
+
+
+def toKeyword(word: str) -> str | None:
+    """The keyword matching word anywhere in a message like the local matcher does, None if AutoMod can't express it"""
+    if not isinstance(word, str) or len(word.strip()) == 0 or "*" in word or len(word) + 2 > KEYWORD_LENGTH:
+        return None
+    return "*" + word + "*"
+
+
+def assignChunks(existing: List[list], desired: list, limit: int, maxChunks: int) -> tuple:
+    """
+    (chunks, overflow): desired spread over at most maxChunks chunks of limit entries.
+    Entries stay in the chunk they already were in, so one added word edits one rule instead of all of them.
+    """
+    remaining = dict.fromkeys(desired)
+    chunks = []
+    for chunk in existing[:maxChunks]:
+        kept = [entry for entry in chunk if entry in remaining][:limit]
+        for entry in kept:
+            del remaining[entry]
+        chunks.append(kept)
+    for entry in list(remaining.keys()):
+        target = next((chunk for chunk in chunks if len(chunk) < limit), None)
+        if target is None:
+            if len(chunks) >= maxChunks:
+                break
+            target = []
+            chunks.append(target)
+        target.append(entry)
+        del remaining[entry]
+    return [chunk for chunk in chunks if len(chunk) > 0], list(remaining.keys())
+
+
+class GuildSync:
+    """What a guild's native rules cover after a sync"""
+    __slots__ = ("words", "invites", "fallback")
+
+    def __init__(self, words: FrozenSet[str], invites: bool, fallback):
+        self.words = words
+        self.invites = invites
+        # BlacklistMatcher over the words the native rules don't have, or all of them when normalizing
+        self.fallback = fallback
+
+
+class NativeAutomod:
+    """
+    Mirrors "blacklist_words" (and the automod invites rule) into the guilds' native AutoMod keyword rules
+    when "automod_native" is enabled, so Discord blocks those messages before they are posted.
+
+    The bot's rules are named "<rule_name> <n>" and diffed against the wanted keywords, only rules whose
+    keywords or settings changed are edited. Words AutoMod can't express (too long, containing "*") or
+    that don't fit the free rule slots stay with the local matcher, which is all the local blacklist
+    stage checks in a synced guild. With "blacklist_normalize_confusables" or
+    "blacklist_normalize_whitespace" on, the local matcher keeps every word, AutoMod only matches the
+    exact spelling. Until a guild is synced, or after the blacklist changed and the sync hasn't finished,
+    the local matcher checks every word again. While disabled, the guilds are still gone through once
+    after start so rules an earlier run created are removed.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.bot = None
+        self.guilds: Dict[int, GuildSync] = dict()
+        # one sync per guild at a time, a second one would create the same rules again
+        self.locks: Dict[int, asyncio.Lock] = dict()
+        self.task: asyncio.Task | None = None
+        # bumped on every config change, a sync that started before it doesn't record its result
+        self.generation = 0
+        # while the guilds may have our rules a disabled sync goes through them to remove the rules, at start
+        # rules left by an earlier run can still be there
+        self.active = True
+        self.syncs = 0
+        self.edits = 0
+
+    def getSection(self) -> dict:
+        section = self.config.configData.get("automod_native", {})
+        return section if isinstance(section, dict) else dict()
+
+    def isEnabled(self) -> bool:
+        return bool(self.getSection().get("enabled", False))
+
+    def getRuleName(self) -> str:
+        return str(self.getSection().get("rule_name", "Blacklist"))
+
+    def start(self, bot):
+        if self.bot is bot:
+            return
+        self.bot = bot
+        bot.add_listener(self.onReady, "on_ready")
+        bot.add_listener(self.onGuildJoin, "on_guild_join")
+        bot.add_listener(self.onGuildRemove, "on_guild_remove")
+        bot.add_listener(self.onRuleDelete, "on_automod_rule_delete")
+        self.requestSync()
+
+    def getMatcher(self, guild):
+        """The matcher the local blacklist stage uses for the guild"""
+        sync = self.guilds.get(guild.id, None) if guild is not None else None
+        return sync.fallback if sync is not None else self.config.getBlacklistMatcher()
+
+    def coversInvites(self, guild) -> bool:
+        sync = self.guilds.get(guild.id, None) if guild is not None else None
+        return sync is not None and sync.invites
+
+    def requestSync(self):
+        """Syncs every guild after "sync_delay" seconds, changes made in the meantime are part of the same sync"""
+        # the native rules no longer match the config, the local matcher takes over until the sync is done
+        self.guilds.clear()
+        self.generation += 1
+        if self.bot is None or self.task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.task = loop.create_task(self._delayedSync())
+
+    async def _delayedSync(self):
+        delay = self.getSection().get("sync_delay", 2)
+        await asyncio.sleep(delay if isinstance(delay, (int, float)) and not isinstance(delay, bool) else 2)
+        self.task = None
+        await self.syncAll()
+
+    async def syncAll(self):
+        if self.bot is None or not (self.isEnabled() or self.active):
+            return
+        result = await targetExecutor.run(list(self.bot.guilds), self.syncGuild)
+        for guild, error in result.failed:
+            print(f"Could not sync AutoMod rules of guild {guild.id}: {error}")
+        if not self.isEnabled() and len(result.failed) == 0 and self.bot.is_ready():
+            self.active = False
+
+    def normalizes(self) -> bool:
+        """Whether the local matcher catches evasions (lookalike letters, accents, hidden spaces) AutoMod can't"""
+        return bool(self.config.configData.get("blacklist_normalize_confusables", False)) or \
+            bool(self.config.configData.get("blacklist_normalize_whitespace", False))
+
+    def _plan(self) -> tuple:
+        """(keywords, invite patterns, words the local matcher still checks)"""
+        words = self.config.getBlacklistedWords()
+        words = words if isinstance(words, list) else []
+        keywords = dict()
+        fallback = []
+        for word in words:
+            keyword = toKeyword(word)
+            if keyword is None:
+                fallback.append(word)
+            else:
+                keywords.setdefault(keyword, word)
+        if self.normalizes():
+            # the native rules only block the exact spellings first, every word stays with the local matcher
+            fallback = list(words)
+        patterns = [INVITE_PATTERN] if self.config.automod.getRules()["invites"].enabled else []
+        return keywords, patterns, fallback
+
+    def _actions(self) -> list:
+        section = self.getSection()
+        message = str(section.get("custom_message", ""))
+        found = [discord.AutoModRuleAction(custom_message=message) if len(message) > 0
+                 else discord.AutoModRuleAction(type=discord.AutoModRuleActionType.block_message)]
+        channelId = section.get("alert_channel_id", 0)
+        if isinstance(channelId, int) and channelId > 0:
+            found.append(discord.AutoModRuleAction(channel_id=channelId))
+        return found
+
+    def _state(self, keywords: Iterable[str], patterns: Iterable[str], roles: Iterable[int],
+               channels: Iterable[int], actions: list) -> tuple:
+        return (frozenset(keywords), frozenset(patterns), frozenset(roles), frozenset(channels),
+                frozenset((action.type.value, action.channel_id, action.custom_message) for action in actions))
+
+    async def syncGuild(self, guild: discord.Guild):
+        async with self.locks.setdefault(guild.id, asyncio.Lock()):
+            await self._syncGuild(guild)
+
+    async def _syncGuild(self, guild: discord.Guild):
+        generation = self.generation
+        name = self.getRuleName()
+        rules = await guild.fetch_automod_rules()
+        keywordRules = [rule for rule in rules if rule.trigger.type == discord.AutoModRuleTriggerType.keyword]
+        own = sorted((rule for rule in keywordRules
+                      if rule.creator_id == self.bot.user.id and rule.name.startswith(name + " ")),
+                     key=lambda rule: rule.name)
+
+        if not self.isEnabled():
+            for rule in own:
+                await rule.delete(reason="AutoMod sync disabled")
+            self.guilds.pop(guild.id, None)
+            return
+
+        keywords, patterns, fallback = self._plan()
+        maxRules = self.getSection().get("max_rules", 5)
+        maxRules = maxRules if isinstance(maxRules, int) and not isinstance(maxRules, bool) else 5
+        # the keyword rule slots the guild's own rules leave free
+        slots = min(maxRules, KEYWORD_RULE_LIMIT - (len(keywordRules) - len(own)))
+        chunks, overflow = assignChunks([[keyword for keyword in rule.trigger.keyword_filter] for rule in own],
+                                        list(keywords.keys()), KEYWORD_LIMIT, max(0, slots))
+        if not self.normalizes():
+            fallback += [keywords[keyword] for keyword in overflow]
+        invites = len(patterns) > 0 and slots > 0
+        if len(chunks) == 0 and invites:
+            chunks.append([])
+
+        automod = self.config.automod.getSection()
+        roles = [roleId for roleId in automod.get("exempt_roles_id", []) if isinstance(roleId, int)]
+        channels = [channelId for channelId in automod.get("exempt_channels_id", []) if isinstance(channelId, int)]
+        roles, channels = roles[:EXEMPT_ROLES_LIMIT], channels[:EXEMPT_CHANNELS_LIMIT]
+        actions = self._actions()
+        for index, chunk in enumerate(chunks):
+            # the invite pattern rides along in the first rule
+            rulePatterns = patterns[:REGEX_LIMIT] if index == 0 and invites else []
+            trigger = discord.AutoModTrigger(type=discord.AutoModRuleTriggerType.keyword, keyword_filter=chunk,
+                                             regex_patterns=rulePatterns)
+            exemptRoles = [discord.Object(roleId) for roleId in roles]
+            exemptChannels = [discord.Object(channelId) for channelId in channels]
+            if index < len(own):
+                rule = own[index]
+                current = self._state(rule.trigger.keyword_filter, rule.trigger.regex_patterns,
+                                      rule.exempt_role_ids, rule.exempt_channel_ids, rule.actions)
+                if current == self._state(chunk, rulePatterns, roles, channels, actions) and rule.enabled:
+                    continue
+                await rule.edit(trigger=trigger, actions=actions, enabled=True, exempt_roles=exemptRoles,
+                                exempt_channels=exemptChannels, reason="Blacklist changed")
+            else:
+                await guild.create_automod_rule(name=f"{name} {index + 1}",
+                                                event_type=discord.AutoModRuleEventType.message_send,
+                                                trigger=trigger, actions=actions, enabled=True,
+                                                exempt_roles=exemptRoles, exempt_channels=exemptChannels,
+                                                reason="Blacklist changed")
+            self.edits += 1
+        for rule in own[len(chunks):]:
+            await rule.delete(reason="Blacklist changed")
+            self.edits += 1
+
+        self.active = True
+        if generation != self.generation:
+            return
+        synced = frozenset(keyword for chunk in chunks for keyword in chunk)
+        self.guilds[guild.id] = GuildSync(frozenset(keywords[keyword] for keyword in synced), invites,
+                                          self.config.buildBlacklistMatcher(fallback))
+        self.syncs += 1
+
+    def onReload(self, changedKeys: set) -> int:
+        keys = ("blacklist_words", "blacklist_normalize_confusables", "blacklist_normalize_whitespace",
+                "automod_native", "automod")
+        if any(("config", key) in changedKeys for key in keys):
+            dropped = len(self.guilds)
+            self.requestSync()
+            return dropped
+        return 0
+
+    async def onReady(self):
+        self.requestSync()
+
+    async def onGuildJoin(self, guild: discord.Guild):
+        try:
+            await self.syncGuild(guild)
+        except Exception as e:
+            print(f"Could not sync AutoMod rules of guild {guild.id}: {e}")
+
+    async def onGuildRemove(self, guild: discord.Guild):
+        self.guilds.pop(guild.id, None)
+        self.locks.pop(guild.id, None)
+
+    async def onRuleDelete(self, rule: discord.AutoModRule):
+        # someone removed one of our rules, its words are checked locally again until the next sync
+        if self.bot is not None and rule.creator_id == self.bot.user.id:
+            self.guilds.pop(rule.guild.id, None)
+
+    def getStats(self) -> dict:
+        return {"enabled": self.isEnabled(), "synced_guilds": len(self.guilds), "syncs": self.syncs,
+                "rule_edits": self.edits,
+                "native_words": sum(len(sync.words) for sync in self.guilds.values())}
@@ -1,11 +1,9 @@
 from cogs.ext.imports import *
+from cogs.ext.templates import LazyPlaceholder, resolveValue
 
 
 def usePlaceholders(msg: str, placeholders: dict) -> str:
-    for placeholder, v in placeholders.items():
-        if utils.configManager.isActivePlaceholder(placeholder):
-            msg = msg.replace(str(placeholder), str(v))
-    return msg
+    return utils.configManager.templates.render(msg, placeholders)
 
 
 def addDefaultPlaceholder(placeholders: dict, interaction: discord.Interaction = None,
@@ -15,17 +13,17 @@ def addDefaultPlaceholder(placeholders: dict, interaction: discord.Interaction =
         placeholders[actionPath] = ""
     if interaction is not None:
         if utils.configManager.getUsernamePlaceholder() not in placeholders.keys():
-            placeholders[utils.configManager.getUsernamePlaceholder()] = interaction.user.name
+            placeholders[utils.configManager.getUsernamePlaceholder()] = LazyPlaceholder(lambda: interaction.user.name)
 
         if utils.configManager.getIDPlaceholder() not in placeholders.keys():
-            placeholders[utils.configManager.getIDPlaceholder()] = str(interaction.user.id)
+            placeholders[utils.configManager.getIDPlaceholder()] = LazyPlaceholder(lambda: str(interaction.user.id))
 
     elif ctx is not None:
         if utils.configManager.getUsernamePlaceholder() not in placeholders.keys():
-            placeholders[utils.configManager.getUsernamePlaceholder()] = ctx.author.name
+            placeholders[utils.configManager.getUsernamePlaceholder()] = LazyPlaceholder(lambda: ctx.author.name)
 
         if utils.configManager.getIDPlaceholder() not in placeholders.keys():
-            placeholders[utils.configManager.getIDPlaceholder()] = str(ctx.author.id)
+            placeholders[utils.configManager.getIDPlaceholder()] = LazyPlaceholder(lambda: str(ctx.author.id))
 
     return placeholders
 
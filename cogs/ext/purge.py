@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import *
+
+# the most messages one channel.delete_messages call takes, and how old they may be
+BULK_LIMIT = 100
+BULK_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+
+
+class PurgeFilter:
+    """Which of the scanned messages are deleted, every given condition has to match"""
+    __slots__ = ("authorIds", "contains", "attachments", "after", "before")
+
+    def __init__(self, authorIds: Iterable[int] | None = None, contains: str | None = None,
+                 attachments: bool = False, after: datetime | None = None, before: datetime | None = None):
+        self.authorIds = frozenset(authorIds) if authorIds is not None else None
+        self.contains = contains.casefold() if contains else None
+        self.attachments = attachments
+        self.after = after
+        self.before = before
+
+    def matches(self, message) -> bool:
+        if self.authorIds is not None and message.author.id not in self.authorIds:
+            return False
+        if self.contains is not None and self.contains not in message.content.casefold():
+            return False
+        return not self.attachments or len(message.attachments) > 0
+
+
+class PurgeProgress:
+    __slots__ = ("limit", "scanned", "bulkDeleted", "singleDeleted", "failed", "done", "started")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.scanned = 0
+        self.bulkDeleted = 0
+        self.singleDeleted = 0
+        self.failed = 0
+        self.done = False
+        self.started = time.monotonic()
+
+    @property
+    def deleted(self) -> int:
+        return self.bulkDeleted + self.singleDeleted
+
+    def format(self, text: str) -> str:
+        values = {"/deleted/": self.deleted, "/scanned/": self.scanned, "/number/": self.limit,
+                  "/old/": self.singleDeleted, "/failed/": self.failed,
+                  "/seconds/": round(time.monotonic() - self.started)}
+        for placeholder, value in values.items():
+            text = text.replace(placeholder, str(value))
+        return text
+
+
+class PurgeEngine:
+    """
+    Deletes up to `limit` scanned messages of a channel, newest first.
+
+    History is read page by page and the matching messages are deleted while scanning: messages younger
+    than 14 days in channel.delete_messages batches of 100, older ones (which Discord doesn't bulk delete)
+    one by one with `singleDelay` seconds between them. onProgress gets the PurgeProgress at most every
+    `progressInterval` seconds and once at the end, its errors don't stop the purge.
+    """
+
+    def __init__(self, singleDelay: float = 1.0, progressInterval: float = 2.0):
+        self.singleDelay = 1.0
+        self.progressInterval = 2.0
+        self.configure(singleDelay, progressInterval)
+        self.running: Dict[int, PurgeProgress] = dict()
+        # channels a command claimed before its first await, so a second one can't start there meanwhile
+        self.reserved: Set[int] = set()
+
+    def configure(self, singleDelay: float, progressInterval: float):
+        self.singleDelay = max(0.0, float(singleDelay))
+        self.progressInterval = max(0.5, float(progressInterval))
+
+    def isRunning(self, channelId: int) -> bool:
+        return channelId in self.running or channelId in self.reserved
+
+    def tryAcquire(self, channelId: int) -> bool:
+        """Reserves the channel until release, False if a purge already runs or is reserved there"""
+        if self.isRunning(channelId):
+            return False
+        self.reserved.add(channelId)
+        return True
+
+    def release(self, channelId: int):
+        self.reserved.discard(channelId)
+
+    async def run(self, channel, limit: int, purgeFilter: PurgeFilter | None = None,
+                  onProgress: Callable[[PurgeProgress], Awaitable] | None = None) -> PurgeProgress:
+        purgeFilter = purgeFilter if purgeFilter is not None else PurgeFilter()
+        progress = PurgeProgress(limit)
+        self.running[channel.id] = progress
+        lastReport = time.monotonic()
+        batch = []
+        try:
+            bulkCutoff = datetime.now(timezone.utc) - BULK_MAX_AGE
+            # history defaults to oldest first when after is given, the bulk lane needs newest first
+            async for message in channel.history(limit=limit, after=purgeFilter.after, before=purgeFilter.before,
+                                                 oldest_first=False):
+                progress.scanned += 1
+                if not purgeFilter.matches(message):
+                    pass
+                elif message.created_at > bulkCutoff:
+                    batch.append(message)
+                    if len(batch) >= BULK_LIMIT:
+                        await self._bulkDelete(channel, batch, progress)
+                        batch = []
+                else:
+                    # history is newest first, every message from here on is too old for the bulk lane
+                    if len(batch) > 0:
+                        await self._bulkDelete(channel, batch, progress)
+                        batch = []
+                    await self._singleDelete(message, progress)
+
+                if onProgress is not None and time.monotonic() - lastReport >= self.progressInterval:
+                    lastReport = time.monotonic()
+                    await self._report(onProgress, progress)
+            if len(batch) > 0:
+                await self._bulkDelete(channel, batch, progress)
+        finally:
+            self.running.pop(channel.id, None)
+            progress.done = True
+        if onProgress is not None:
+            await self._report(onProgress, progress)
+        return progress
+
+    async def _bulkDelete(self, channel, batch: list, progress: PurgeProgress):
+        try:
+            await channel.delete_messages(batch)
+            progress.bulkDeleted += len(batch)
+        except Exception as e:
+            print(f"Could not bulk delete {len(batch)} messages in channel {channel.id}: {e}")
+            progress.failed += len(batch)
+
+    async def _singleDelete(self, message, progress: PurgeProgress):
+        try:
+            await message.delete()
+            progress.singleDeleted += 1
+        except Exception as e:
+            print(f"Could not delete message {message.id}: {e}")
+            progress.failed += 1
+        await asyncio.sleep(self.singleDelay)
+
+    async def _report(self, onProgress, progress: PurgeProgress):
+        try:
+            await onProgress(progress)
+        except Exception as e:
+            # an expired interaction only loses the progress messages
+            print(f"Could not report purge progress: {e}")
+
+
+# one per bot so a channel only has one purge running
+purgeEngine = PurgeEngine()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import *
+
+
+class ReplyTracker:
+    """
+    Remembers which invoking messages the bot already replied to.
+
+    Filled by our own sends, so prefix command responses know whether to reply or just send without
+    reading the channel history. Entries expire `ttl` seconds after the last reply and at most
+    `maxSize` messages are kept, oldest dropped first.
+    """
+
+    def __init__(self, maxSize: int = 4096, ttl: float = 900.0, clock: Callable[[], float] = time.monotonic):
+        self.maxSize = max(1, int(maxSize))
+        self.ttl = float(ttl)
+        self.clock = clock
+        self.replied: OrderedDict[int, float] = OrderedDict()
+
+    def _evictExpired(self, now: float):
+        while len(self.replied) > 0:
+            messageId, expiresAt = next(iter(self.replied.items()))
+            if expiresAt > now:
+                break
+            del self.replied[messageId]
+
+    def hasReplied(self, messageId: int) -> bool:
+        now = self.clock()
+        self._evictExpired(now)
+        return messageId in self.replied
+
+    def markReplied(self, messageId: int) -> None:
+        now = self.clock()
+        self._evictExpired(now)
+        self.replied[messageId] = now + self.ttl
+        self.replied.move_to_end(messageId)
+        while len(self.replied) > self.maxSize:
+            self.replied.popitem(last=False)
+
+    def forget(self, messageId: int) -> None:
+        self.replied.pop(messageId, None)
+
+    def __len__(self):
+        return len(self.replied)
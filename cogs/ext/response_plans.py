@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import *
+
+# (file, top level key) pairs a plan is built from, any other change keeps the plans
+PLAN_SECTIONS = {
+    ("messages", "messages"), ("messages", "embed_format"), ("messages", "views"),
+    ("messages", "channel_messages"), ("messages", "dm"), ("config", "channels"),
+}
+
+
+class EmbedPlan:
+    """Embed attributes in config order as (key, template) pairs, fields as (name, value) template pairs"""
+    __slots__ = ("name", "items", "fields", "fieldsError")
+
+    def __init__(self, name: str, items: tuple, fields: tuple, fieldsError: str | None):
+        self.name = name
+        self.items = items
+        self.fields = fields
+        # fields that are not a map only fail when the embed is built, same as before plans
+        self.fieldsError = fieldsError
+
+
+class OutputPlan:
+    """Rendered lines, embed plans and view names sent to one destination (the channel or a DM)"""
+    __slots__ = ("messages", "embeds", "views")
+
+    def __init__(self, messages: tuple, embeds: tuple, views: tuple):
+        self.messages: Tuple[str, ...] = messages
+        self.embeds: Tuple[EmbedPlan, ...] = embeds
+        self.views: Tuple[str, ...] = views
+
+    def isEmpty(self) -> bool:
+        return len(self.messages) == 0 and len(self.embeds) == 0 and len(self.views) == 0
+
+
+class ResponsePlan:
+    __slots__ = ("command", "message", "messages", "embed", "view", "dm", "channel", "channelId", "source")
+
+    def __init__(self, command: str, message: str, messages: tuple, embed: EmbedPlan | None, view: str | None,
+                 dm: OutputPlan, channel: OutputPlan, channelId: int, source: tuple | None):
+        self.command = command
+        self.message = message
+        self.messages = messages
+        self.embed = embed
+        self.view = view
+        self.dm = dm
+        self.channel = channel
+        self.channelId = channelId
+        # (mtime, size) of the command file the fallback lines were read from, None without one
+        self.source = source
+
+
+class ResponsePlanner:
+    """
+    Compiles and caches a ResponsePlan per (command, message name).
+
+    A plan resolves once which messages, embeds, views and channel a message name sends, so building
+    a response only renders templates. Plans are dropped by ConfigManager when the sections they are
+    built from (PLAN_SECTIONS) change, and rebuilt when the command file they fall back to changed on
+    disk, checked like JSONFileCache does with one os.stat per lookup.
+    """
+
+    def __init__(self, config, maxSize: int = 1024):
+        self.config = config
+        self.maxSize = max(1, int(maxSize))
+        self.plans: OrderedDict[Tuple[str, str], ResponsePlan] = OrderedDict()
+        self.embedPlans: Dict[str, EmbedPlan | None] = dict()
+        self.hits = 0
+        self.builds = 0
+        self.invalidations = 0
+
+    def getPlan(self, command: str, message: str) -> ResponsePlan:
+        key = (command, message)
+        plan = self.plans.get(key, None)
+        source = self.config.getCommandFileSignature(command)
+        if plan is not None and plan.source == source:
+            self.plans.move_to_end(key)
+            self.hits += 1
+            return plan
+
+        plan = self._buildPlan(command, message, source)
+        self.builds += 1
+        self.plans[key] = plan
+        if len(self.plans) > self.maxSize:
+            self.plans.popitem(last=False)
+        return plan
+
+    def getEmbedPlan(self, name: str) -> EmbedPlan | None:
+        if name in self.embedPlans:
+            return self.embedPlans[name]
+        plan = self._buildEmbedPlan(name)
+        self.embedPlans[name] = plan
+        return plan
+
+    def invalidate(self, command: str | None = None) -> int:
+        if command is None:
+            dropped = len(self.plans) + len(self.embedPlans)
+            self.plans.clear()
+            self.embedPlans.clear()
+        else:
+            keys = [key for key in self.plans.keys() if key[0] == command]
+            for key in keys:
+                del self.plans[key]
+            dropped = len(keys)
+        self.invalidations += dropped
+        return dropped
+
+    def onReload(self, changedKeys: set) -> int:
+        if len(changedKeys & PLAN_SECTIONS) > 0:
+            return self.invalidate()
+        return sum(self.invalidate(key) for kind, key in changedKeys if kind == "commands")
+
+    def getStats(self) -> dict:
+        total = self.hits + self.builds
+        return {"hits": self.hits, "builds": self.builds, "invalidations": self.invalidations,
+                "size": len(self.plans), "embeds": len(self.embedPlans), "max_size": self.maxSize,
+                "reuse_rate": self.hits / total if total > 0 else 0.0}
+
+    def _lines(self, command: str, names) -> tuple:
+        lines = []
+        for name in names:
+            lines.extend(str(line) for line in self.config.getCommandMessages(command, name))
+        return tuple(lines)
+
+    def _embeds(self, names) -> tuple:
+        return tuple(plan for plan in (self.getEmbedPlan(name) for name in names) if plan is not None)
+
+    def _views(self, names) -> tuple:
+        return tuple(name for name in names if self.config.hasButton(name))
+
+    def _buildPlan(self, command: str, message: str, source: tuple | None) -> ResponsePlan:
+        config = self.config
+        dmOutput = config.getDMOutput(message)
+        channelOutput = config.getChannelOutput(message)
+        dm = OutputPlan(self._lines(command, dmOutput.messages), self._embeds(dmOutput.embeds),
+                        self._views(dmOutput.views))
+        channel = OutputPlan(self._lines(command, channelOutput.messages), self._embeds(channelOutput.embeds),
+                             self._views(channelOutput.views))
+        embed = self.getEmbedPlan(message)
+        return ResponsePlan(command, message, self._lines(command, [message]), embed,
+                            message if config.hasButton(message) else None, dm, channel,
+                            config.getChannelIdByName(message), source)
+
+    def _buildEmbedPlan(self, name: str) -> EmbedPlan | None:
+        config = self.config
+        data = config.getCommandEmbeds("", name)
+        if data is None:
+            return None
+        keys = {config.getEmbedTitle(), config.getEmbedAuthorName(), config.getEmbedAuthorUrl(),
+                config.getEmbedAuthorIconUrl(), config.getEmbedFooter(), config.getEmbedFooterIconUrl(),
+                config.getEmbedImageUrl(), config.getEmbedDescription(), config.getEmbedColor()}
+        items = tuple((key, value) for key, value in data.items() if key in keys)
+        fields = ()
+        fieldsError = None
+        fieldsData = data.get(config.getEmbedFields(), None)
+        if isinstance(fieldsData, dict):
+            fields = tuple(fieldsData.items())
+        elif config.getEmbedFields() in data:
+            notinline = config.getNotInLinePlaceholder()
+            fieldsError = ("Embed " + name + " needs fields as map: Example (" + notinline +
+                           " placeholder is optional): " + "'" + config.getEmbedFields() +
+                           "': {'FieldName': 'FieldValue " + notinline + "'}")
+        return EmbedPlan(name, items, fields, fieldsError)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import *
+
+# rule kinds, in the order they appear in the command's "command_restriction" map
+RULE_ALL = "all"
+RULE_USERS = "users_id"
+RULE_ANY_ROLES = "any_roles_id"
+RULE_ALL_ROLES = "all_roles_id"
+RULE_CHANNELS = "channels_id"
+
+
+class RestrictionPolicy:
+    """
+    A command's "command_restriction" map compiled once into (kind, status, reason) rules with the id lists
+    as frozensets, evaluated in the map's order like before.
+    """
+    __slots__ = ("command", "rules", "error", "usesRoles", "usesChannel", "usesUser")
+
+    def __init__(self, command: str, data: dict):
+        self.command = command
+        self.rules: List[tuple] = []
+        # message reported for a value that is not a map, evaluation stops at it
+        self.error: str | None = None
+        for option, optionData in data.items():
+            if not isinstance(optionData, dict):
+                if option == "actions":
+                    if not isinstance(optionData, list):
+                        self.rules.append(("reason", None, "Expected list for messages in command restrictions, "
+                                                           f"but got type {type(optionData)}"))
+                    else:
+                        # only used by the checks after it, like when the map was walked per check
+                        self.rules.append(("actions", tuple(optionData), ""))
+                    continue
+                self.error = f"Expected map in command restrictions, but got type {type(optionData)}"
+                self.rules.append(("reason", None, f"Expected map for {option} in command restrictions, but got type "
+                                                   f"{type(optionData)}"))
+                break
+            reason = str(optionData.get("reason", ""))
+            status = optionData.get("status", [])
+            if option == RULE_ALL:
+                self.rules.append((RULE_ALL, bool(optionData.get("status", True)), reason))
+            elif option in (RULE_USERS, RULE_ANY_ROLES, RULE_ALL_ROLES, RULE_CHANNELS) and isinstance(status, list):
+                self.rules.append((option, frozenset(status), reason))
+        kinds = {rule[0] for rule in self.rules}
+        self.usesRoles = RULE_ANY_ROLES in kinds or RULE_ALL_ROLES in kinds
+        self.usesChannel = RULE_CHANNELS in kinds
+        self.usesUser = RULE_USERS in kinds
+
+    def isEmpty(self) -> bool:
+        return len(self.rules) == 0 and self.error is None
+
+    def evaluate(self, userId: int, roleIds: FrozenSet[int], channelId: int | None) -> tuple:
+        """(reason, actions), an empty reason means the command isn't restricted"""
+        reason = ""
+        actions: list = []
+        for kind, status, ruleReason in self.rules:
+            if kind == "actions":
+                actions = list(status)
+            elif kind == "reason":
+                reason += ruleReason
+            elif kind == RULE_ALL:
+                if status:
+                    return reason, actions
+                reason += ruleReason
+            elif kind == RULE_USERS and userId not in status:
+                reason += ruleReason
+            elif kind == RULE_ANY_ROLES and not status.isdisjoint(roleIds):
+                reason += ruleReason
+            # an empty all_roles_id restricts nobody, allRolesContains([], roles) was False as well
+            elif kind == RULE_ALL_ROLES and len(status) > 0 and status <= roleIds:
+                reason += ruleReason
+            elif kind == RULE_CHANNELS and channelId not in status:
+                reason += ruleReason
+        return reason, actions
+
+
+EMPTY_POLICY = RestrictionPolicy("", dict())
+
+
+class RestrictionPolicies:
+    """
+    Compiled RestrictionPolicy per command and an LRU of decisions keyed by
+    (command, member id, the member's role ids, channel id).
+
+    The policies are recompiled and the decisions dropped when "command_restriction" is reloaded,
+    a member's decisions are dropped when on_member_update shows their roles changed.
+    Policies with a config error are never cached so the error keeps being reported.
+    """
+
+    def __init__(self, config, maxSize: int = 4096):
+        self.config = config
+        self.maxSize = max(1, int(maxSize))
+        self.policies: Dict[str, RestrictionPolicy] = dict()
+        self.decisions: OrderedDict[tuple, tuple] = OrderedDict()
+        # member id -> decision keys, so a role update drops only that member's entries
+        self.memberKeys: Dict[int, Set[tuple]] = dict()
+        self.bot = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, bot):
+        if self.bot is bot:
+            return
+        self.bot = bot
+        bot.add_listener(self.onMemberUpdate, "on_member_update")
+
+    def getPolicy(self, command: str) -> RestrictionPolicy:
+        policy = self.policies.get(command, None)
+        if policy is None:
+            data = self.config.configData.get("command_restriction", {})
+            data = data.get(command, None) if isinstance(data, dict) else None
+            policy = RestrictionPolicy(command, data) if isinstance(data, dict) and len(data) > 0 else EMPTY_POLICY
+            self.policies[command] = policy
+        return policy
+
+    def check(self, command: str, userId: int, roleIds: FrozenSet[int], channelId: int | None) -> tuple:
+        policy = self.getPolicy(command)
+        if policy.isEmpty():
+            return "", []
+        if policy.error is not None:
+            return policy.evaluate(userId, roleIds, channelId)
+
+        # only what the rules look at is part of the key
+        key = (command, userId if policy.usesUser or policy.usesRoles else 0,
+               roleIds if policy.usesRoles else 0, channelId if policy.usesChannel else 0)
+        decision = self.decisions.get(key, None)
+        if decision is not None:
+            self.decisions.move_to_end(key)
+            self.hits += 1
+            return decision[0], list(decision[1])
+
+        self.misses += 1
+        reason, actions = policy.evaluate(userId, roleIds, channelId)
+        self.decisions[key] = (reason, tuple(actions))
+        self.memberKeys.setdefault(key[1], set()).add(key)
+        if len(self.decisions) > self.maxSize:
+            oldKey, _ = self.decisions.popitem(last=False)
+            self._forgetKey(oldKey)
+        return reason, actions
+
+    def _forgetKey(self, key: tuple):
+        keys = self.memberKeys.get(key[1], None)
+        if keys is not None:
+            keys.discard(key)
+            if len(keys) == 0:
+                del self.memberKeys[key[1]]
+
+    def invalidateMember(self, memberId: int) -> int:
+        keys = self.memberKeys.pop(memberId, set())
+        for key in keys:
+            self.decisions.pop(key, None)
+        return len(keys)
+
+    def invalidate(self) -> int:
+        dropped = len(self.decisions) + len(self.policies)
+        self.decisions.clear()
+        self.memberKeys.clear()
+        self.policies.clear()
+        return dropped
+
+    def onReload(self, changedKeys: set) -> int:
+        return self.invalidate() if ("config", "command_restriction") in changedKeys else 0
+
+    async def onMemberUpdate(self, before, after):
+        if before.roles != after.roles:
+            self.invalidateMember(after.id)
+
+    def getStats(self) -> dict:
+        total = self.hits + self.misses
+        return {"policies": len(self.policies), "decisions": len(self.decisions), "hits": self.hits,
+                "misses": self.misses, "hit_rate": self.hits / total if total > 0 else 0.0}
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from typing import *
+
+from cogs.ext.target_executor import TargetExecutor, TargetResult
+
+
+class RoleChange:
+    """Roles to add to and remove from one member, by role id"""
+    __slots__ = ("member", "add", "remove")
+
+    def __init__(self, member):
+        self.member = member
+        self.add: Dict[int, Any] = dict()
+        self.remove: Dict[int, Any] = dict()
+
+
+# the most changed roles of a member sent as single role adds and removes, more are one member.edit(roles=...)
+SINGLE_ROLE_LIMIT = 2
+
+
+class MemberRoles:
+    """One member's role edits, run one at a time by every planner"""
+    __slots__ = ("lock", "roleIds", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        # the roles the last edit left, newer than the member cache until its update event arrives
+        self.roleIds: Set[int] | None = None
+        self.users = 0
+
+
+# by (guild id, member id), dropped once no edit of the member is running or waiting
+memberRoles: Dict[Tuple[int, int], MemberRoles] = dict()
+
+
+class RolePlanner:
+    """
+    Collects role additions and removals and applies them with one member.edit(roles=...) per member.
+
+    The new role list is computed from the member's cached roles, so roles the member already has
+    (or doesn't have) are not sent and members without an effective change are not edited at all.
+    When the same role is added and removed for a member, the last call wins. Edits of the same member
+    from any planner run one after the other, each starting from the roles the previous one left, so two
+    plans never undo each other; up to SINGLE_ROLE_LIMIT changed roles are sent as single role adds and
+    removes, which don't touch the member's other roles at all.
+    """
+
+    def __init__(self):
+        self.changes: OrderedDict[int, RoleChange] = OrderedDict()
+        self.requested = 0
+        self.edits = 0
+
+    def _change(self, member) -> RoleChange:
+        change = self.changes.get(member.id, None)
+        if change is None:
+            change = RoleChange(member)
+            self.changes[member.id] = change
+        return change
+
+    def add(self, member, role):
+        change = self._change(member)
+        change.remove.pop(role.id, None)
+        change.add[role.id] = role
+        self.requested += 1
+
+    def remove(self, member, role):
+        change = self._change(member)
+        change.add.pop(role.id, None)
+        change.remove[role.id] = role
+        self.requested += 1
+
+    def addAll(self, roles: Dict[Any, list]):
+        for role, members in roles.items():
+            for member in members:
+                self.add(member, role)
+
+    def removeAll(self, roles: Dict[Any, list]):
+        for role, members in roles.items():
+            for member in members:
+                self.remove(member, role)
+
+    def getChanges(self, member) -> tuple:
+        """(added, removed) roles that would actually change for the member"""
+        change = self.changes.get(member.id, None)
+        if change is None:
+            return [], []
+        current = {role.id for role in change.member.roles}
+        return ([role for roleId, role in change.add.items() if roleId not in current],
+                [role for roleId, role in change.remove.items() if roleId in current])
+
+    def getMembers(self) -> list:
+        """Members with at least one effective change, in the order they were first planned"""
+        members = []
+        for change in self.changes.values():
+            added, removed = self.getChanges(change.member)
+            if len(added) > 0 or len(removed) > 0:
+                members.append(change.member)
+        return members
+
+    def getRoles(self, member, roleIds: Set[int] | None = None) -> list:
+        """The member's roles after the change, starting from roleIds instead of the cache when given"""
+        change = self.changes[member.id]
+        current = change.member.roles if roleIds is None else \
+            [role for role in map(change.member.guild.get_role, roleIds) if role is not None]
+        roles = [role for role in current if not role.is_default() and role.id not in change.remove]
+        present = {role.id for role in roles}
+        roles.extend(role for roleId, role in change.add.items() if roleId not in present)
+        return roles
+
+    async def applyTo(self, member, reason: str = ""):
+        key = (member.guild.id, member.id)
+        state = memberRoles.get(key, None)
+        if state is None:
+            state = MemberRoles()
+            memberRoles[key] = state
+        state.users += 1
+        try:
+            async with state.lock:
+                await self._applyTo(member, state, reason)
+        finally:
+            state.users -= 1
+            if state.users == 0:
+                memberRoles.pop(key, None)
+
+    async def _applyTo(self, member, state: MemberRoles, reason: str):
+        change = self.changes[member.id]
+        current = state.roleIds if state.roleIds is not None else {role.id for role in change.member.roles}
+        added = [role for roleId, role in change.add.items() if roleId not in current]
+        removed = [role for roleId, role in change.remove.items() if roleId in current]
+        if len(added) == 0 and len(removed) == 0:
+            return
+        self.edits += 1
+        if len(added) + len(removed) > SINGLE_ROLE_LIMIT:
+            roles = self.getRoles(member, state.roleIds)
+            await member.edit(roles=roles, reason=reason)
+            state.roleIds = {role.id for role in roles}
+            return
+        if len(added) > 0:
+            await member.add_roles(*added, reason=reason)
+            current = current | {role.id for role in added}
+            state.roleIds = current
+        if len(removed) > 0:
+            await member.remove_roles(*removed, reason=reason)
+            state.roleIds = current - {role.id for role in removed}
+
+    async def apply(self, reason: str = "", executor: TargetExecutor | None = None,
+                    limit: int | None = None) -> TargetResult:
+        members = self.getMembers()
+        if executor is not None:
+            return await executor.run(members, lambda member: self.applyTo(member, reason), limit=limit)
+
+        succeeded = []
+        failed = []
+        for member in members:
+            try:
+                await self.applyTo(member, reason)
+            except Exception as e:
+                failed.append((member, e))
+            else:
+                succeeded.append(member)
+        return TargetResult(succeeded, failed)
+
+    def getStats(self) -> dict:
+        return {"members": len(self.changes), "requested": self.requested, "edits": self.edits}
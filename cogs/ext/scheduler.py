@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import *
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    run_at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    guild_id INTEGER,
+    payload TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_run_at ON jobs (run_at);
+"""
+# columns added after the first version of the table, added to existing databases when they are opened
+RETRY_COLUMNS = {"attempts": "INTEGER NOT NULL DEFAULT 0", "last_error": "TEXT NOT NULL DEFAULT ''"}
+# a durable job that failed is tried again after RETRY_DELAY * 2^(attempts - 1) seconds (at most MAX_RETRY_DELAY),
+# after MAX_ATTEMPTS it stays stored as failed until it is cancelled
+RETRY_DELAY = 60
+MAX_RETRY_DELAY = 3600
+MAX_ATTEMPTS = 8
+
+
+class ScheduledJob:
+    __slots__ = ("id", "runAt", "kind", "guildId", "payload", "description", "createdAt", "callback", "onError",
+                 "attempts", "lastError")
+
+    def __init__(self, jobId: int, runAt: float, kind: str, guildId: int | None, payload: dict,
+                 description: str = "", createdAt: float | None = None, callback: Callable[[], Awaitable] | None = None,
+                 onError: Callable[[Exception], Awaitable] | None = None, attempts: int = 0, lastError: str = ""):
+        self.id = jobId
+        # wall clock (time.time()) so it survives restarts
+        self.runAt = runAt
+        self.kind = kind
+        self.guildId = guildId
+        self.payload = payload
+        self.description = description
+        self.createdAt = createdAt if createdAt is not None else time.time()
+        # jobs with a callback only live in memory, the others are stored and run by the handler of their kind
+        self.callback = callback
+        self.onError = onError
+        # failed runs so far, the handler may narrow the payload to what is left before it raises
+        self.attempts = attempts
+        self.lastError = lastError
+
+    def isDurable(self) -> bool:
+        return self.callback is None
+
+    def isFailed(self) -> bool:
+        """Gave up retrying, it is only kept so it shows in the jobs list until it is cancelled"""
+        return self.isDurable() and self.attempts >= MAX_ATTEMPTS
+
+    def toDict(self) -> dict:
+        return {"id": self.id, "run_at": self.runAt, "kind": self.kind, "guild_id": self.guildId,
+                "description": self.description, "created_at": self.createdAt, "durable": self.isDurable(),
+                "attempts": self.attempts, "last_error": self.lastError, "failed": self.isFailed()}
+
+
+class Scheduler:
+    """
+    Runs delayed jobs (timed reversals of bans, roles, timeouts...) from one task on the event loop.
+
+    Pending jobs are kept in a min-heap ordered by run time, the task sleeps until the first one is due
+    or a sooner job is scheduled. Durable jobs are stored in SQLite before they are pushed and deleted
+    once they ran successfully, `start` loads the stored ones back so a restart doesn't lose them (overdue jobs run
+    right away). Cancelled jobs are removed from the store and skipped when they reach the top of the heap.
+    A durable job that fails stays stored and is retried with backoff, after MAX_ATTEMPTS it is kept as
+    failed (listed, not run) until it is cancelled.
+    """
+
+    def __init__(self, databasePath: str):
+        self.databasePath = databasePath
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Scheduler")
+        self.connection: sqlite3.Connection | None = None
+        self.openLock = threading.Lock()
+        self.handlers: Dict[str, Callable[[ScheduledJob], Awaitable]] = dict()
+        self.jobs: Dict[int, ScheduledJob] = dict()
+        self.heap: List[tuple] = []
+        self.nextId = 1
+        self.wakeup: asyncio.Event | None = None
+        self.task: asyncio.Task | None = None
+        self.running: Set[asyncio.Task] = set()
+        self.ran = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        with self.openLock:
+            if self.connection is None:
+                folder = os.path.dirname(self.databasePath)
+                if len(folder) > 0:
+                    os.makedirs(folder, exist_ok=True)
+                connection = sqlite3.connect(self.databasePath, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.executescript(SCHEMA)
+                columns = {row[1] for row in connection.execute("PRAGMA table_info(jobs)").fetchall()}
+                for column, definition in RETRY_COLUMNS.items():
+                    if column not in columns:
+                        connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+                connection.commit()
+                self.connection = connection
+            return self.connection
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def _insert(self, job: ScheduledJob):
+        connection = self._connect()
+        with connection:
+            connection.execute("INSERT INTO jobs (id, run_at, kind, guild_id, payload, description, created_at) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (job.id, job.runAt, job.kind, job.guildId, json.dumps(job.payload),
+                                job.description, job.createdAt))
+
+    def _update(self, job: ScheduledJob):
+        connection = self._connect()
+        with connection:
+            connection.execute("UPDATE jobs SET run_at = ?, payload = ?, attempts = ?, last_error = ? WHERE id = ?",
+                               (job.runAt, json.dumps(job.payload), job.attempts, job.lastError, job.id))
+
+    def _delete(self, jobId: int):
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM jobs WHERE id = ?", (jobId,))
+
+    def _load(self) -> List[ScheduledJob]:
+        jobs = []
+        for row in self._connect().execute("SELECT id, run_at, kind, guild_id, payload, description, created_at, "
+                                           "attempts, last_error FROM jobs ORDER BY run_at").fetchall():
+            try:
+                payload = json.loads(row[4])
+            except Exception as e:
+                print("Skipping scheduled job " + str(row[0]) + " with invalid payload", e)
+                continue
+            jobs.append(ScheduledJob(row[0], row[1], row[2], row[3], payload, row[5], row[6], attempts=row[7],
+                                     lastError=row[8]))
+        return jobs
+
+    def register(self, kind: str, handler: Callable[[ScheduledJob], Awaitable]):
+        self.handlers[kind] = handler
+
+    async def start(self):
+        if self.task is not None and not self.task.done():
+            return
+        self.wakeup = asyncio.Event()
+        for job in await self._run(self._load):
+            if job.id not in self.jobs:
+                self._push(job)
+            self.nextId = max(self.nextId, job.id + 1)
+        self.task = asyncio.create_task(self._loop())
+        if len(self.jobs) > 0:
+            failed = sum(1 for job in self.jobs.values() if job.isFailed())
+            print("Rescheduled " + str(len(self.jobs) - failed) + " pending jobs" +
+                  (", " + str(failed) + " failed jobs are waiting to be cancelled" if failed > 0 else ""))
+
+    def _push(self, job: ScheduledJob):
+        self.jobs[job.id] = job
+        if job.isFailed():
+            return
+        heapq.heappush(self.heap, (job.runAt, job.id))
+        if self.wakeup is not None and self.heap[0][1] == job.id:
+            self.wakeup.set()
+
+    async def schedule(self, delay: float, kind: str, payload: dict | None = None, guildId: int | None = None,
+                       description: str = "", callback: Callable[[], Awaitable] | None = None,
+                       onError: Callable[[Exception], Awaitable] | None = None) -> ScheduledJob:
+        if self.task is None:
+            # loads the stored jobs first so new ids never collide with theirs
+            await self.start()
+        job = ScheduledJob(self.nextId, time.time() + max(0.0, float(delay)), kind, guildId,
+                           payload if payload is not None else dict(), description, callback=callback,
+                           onError=onError)
+        self.nextId += 1
+        if job.isDurable():
+            await self._run(self._insert, job)
+        self._push(job)
+        return job
+
+    async def cancel(self, jobId: int) -> bool:
+        job = self.jobs.pop(jobId, None)
+        if job is None:
+            return False
+        # the heap entry is skipped when it comes up
+        self.cancelled += 1
+        if job.isDurable():
+            await self._run(self._delete, jobId)
+        return True
+
+    def getJobs(self, guildId: int | None = None) -> List[ScheduledJob]:
+        return sorted((job for job in self.jobs.values() if guildId is None or job.guildId == guildId),
+                      key=lambda job: (job.runAt, job.id))
+
+    async def _loop(self):
+        while True:
+            while len(self.heap) > 0 and self.heap[0][1] not in self.jobs:
+                heapq.heappop(self.heap)
+            self.wakeup.clear()
+            timeout = None if len(self.heap) == 0 else self.heap[0][0] - time.time()
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            runAt, jobId = heapq.heappop(self.heap)
+            job = self.jobs.get(jobId, None)
+            # a retried job has a new heap entry, this one is left from its previous run time
+            if job is not None and job.runAt == runAt:
+                if not job.isDurable():
+                    del self.jobs[jobId]
+                # a slow job never holds back the ones due after it
+                task = asyncio.create_task(self._execute(job))
+                self.running.add(task)
+                task.add_done_callback(self.running.discard)
+
+    async def _execute(self, job: ScheduledJob):
+        try:
+            if job.callback is not None:
+                await job.callback()
+            else:
+                handler = self.handlers.get(job.kind, None)
+                if handler is None:
+                    raise Exception("No handler for scheduled job kind " + job.kind)
+                await handler(job)
+        except Exception as e:
+            self.failed += 1
+            retrying = job.isDurable() and await self._retry(job, e)
+            if retrying and not job.isFailed():
+                print("Scheduled job " + str(job.id) + " (" + job.kind + ") failed, retrying in " +
+                      str(round(job.runAt - time.time())) + " seconds:", e)
+            elif job.onError is not None:
+                await job.onError(e)
+            else:
+                print("Scheduled job " + str(job.id) + " (" + job.kind + ") failed:", e)
+            return
+        self.ran += 1
+        if job.isDurable() and self.jobs.pop(job.id, None) is not None:
+            await self._run(self._delete, job.id)
+
+    async def _retry(self, job: ScheduledJob, error: Exception) -> bool:
+        """Whether the job was rescheduled, a job cancelled while it ran is not"""
+        job.attempts += 1
+        job.lastError = str(error)
+        job.runAt = time.time() + min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (job.attempts - 1))
+        if job.id not in self.jobs:
+            # cancelled while it ran
+            return False
+        await self._run(self._update, job)
+        self._push(job)
+        return True
+
+    def getStats(self) -> dict:
+        return {"pending": len(self.jobs), "durable": sum(1 for job in self.jobs.values() if job.isDurable()),
+                "ran": self.ran, "failed": self.failed, "cancelled": self.cancelled,
+                "given_up": sum(1 for job in self.jobs.values() if job.isFailed())}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self.openLock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+from typing import *
+
+
+class TargetResult:
+    """Targets an operation succeeded for and (target, exception) pairs it failed for, both in target order"""
+    __slots__ = ("succeeded", "failed")
+
+    def __init__(self, succeeded: list, failed: List[tuple]):
+        self.succeeded = succeeded
+        self.failed = failed
+
+    def raiseFirstFailure(self):
+        if len(self.failed) > 0:
+            raise self.failed[0][1]
+
+
+class TargetExecutor:
+    """
+    Runs one operation per target (member, role, ...) concurrently.
+
+    The semaphore is shared by every action using the executor, so `limit` bounds the REST calls in
+    flight for the whole bot and discord.py's rate limiter only has to queue what is above it.
+    Targets with the same id are only processed once.
+    """
+
+    def __init__(self, limit: int = 8):
+        self.limit = 0
+        self.semaphore: asyncio.Semaphore | None = None
+        self.setLimit(limit)
+        self.succeeded = 0
+        self.failed = 0
+
+    def setLimit(self, limit: int):
+        limit = max(1, int(limit))
+        if limit != self.limit:
+            self.limit = limit
+            self.semaphore = asyncio.Semaphore(limit)
+
+    async def run(self, targets: Iterable, operation: Callable[[Any], Awaitable],
+                  limit: int | None = None) -> TargetResult:
+        if limit is not None:
+            self.setLimit(limit)
+        unique = []
+        seen = set()
+        for target in targets:
+            key = getattr(target, "id", None)
+            key = id(target) if key is None else key
+            if key not in seen:
+                seen.add(key)
+                unique.append(target)
+
+        semaphore = self.semaphore
+
+        async def runOne(target):
+            async with semaphore:
+                await operation(target)
+
+        results = await asyncio.gather(*(runOne(target) for target in unique), return_exceptions=True)
+        succeeded = []
+        failed = []
+        for target, result in zip(unique, results):
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                failed.append((target, result))
+            else:
+                succeeded.append(target)
+        self.succeeded += len(succeeded)
+        self.failed += len(failed)
+        return TargetResult(succeeded, failed)
+
+    def getStats(self) -> dict:
+        return {"limit": self.limit, "succeeded": self.succeeded, "failed": self.failed}
+
+
+# shared by every action so the limit bounds all member/role operations in flight
+targetExecutor = TargetExecutor()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import re
+from collections import OrderedDict
+from typing import *
+
+_MISSING = object()
+
+
+class LazyPlaceholder:
+    """
+    Placeholder value computed by `provider()` the first time a rendered template needs it.
+
+    The result is memoized, so a response that renders the same placeholder in several
+    messages, embeds and views still calls the provider at most once.
+    """
+    __slots__ = ("provider", "value")
+
+    def __init__(self, provider: Callable[[], Any]):
+        self.provider = provider
+        self.value = _MISSING
+
+    def isResolved(self) -> bool:
+        return self.value is not _MISSING
+
+    def get(self):
+        if self.value is _MISSING:
+            self.value = self.provider()
+        return self.value
+
+    def __str__(self):
+        return str(self.get())
+
+
+def resolveValue(value):
+    return value.get() if isinstance(value, LazyPlaceholder) else value
+
+
+class TemplateEngine:
+    """
+    Renders "/placeholder/" templates in one pass.
+
+    A template is split once into a tuple of segments where the even indexes are literal text and the
+    odd indexes are the names of the activated placeholders it contains. Rendering only looks up those
+    slots in the values (LazyPlaceholder values are resolved there), placeholders without a value are
+    left in the text like str.replace did.
+    Compiled templates are kept in a bounded LRU and dropped when the activated placeholders change.
+    """
+
+    def __init__(self, activePlaceholders: Iterable[str] = (), maxSize: int = 4096):
+        self.maxSize = max(1, int(maxSize))
+        self.compiled: OrderedDict[str, tuple] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.setActive(activePlaceholders)
+
+    def setActive(self, activePlaceholders: Iterable[str]) -> int:
+        active = activePlaceholders if isinstance(activePlaceholders, (list, tuple, set, frozenset)) else ()
+        self.active: FrozenSet[str] = frozenset(p for p in active if isinstance(p, str) and len(p) > 0)
+        # longest first so "/action:path/" wins over any placeholder that is a prefix of it
+        names = sorted(self.active, key=len, reverse=True)
+        self.pattern = re.compile("(" + "|".join(re.escape(name) for name in names) + ")") if len(names) > 0 \
+            else None
+        return self.invalidate()
+
+    def isActive(self, placeholder: str) -> bool:
+        return placeholder in self.active
+
+    def invalidate(self) -> int:
+        dropped = len(self.compiled)
+        self.compiled.clear()
+        return dropped
+
+    def compile(self, template: str) -> tuple:
+        segments = self.compiled.get(template, None)
+        if segments is not None:
+            self.compiled.move_to_end(template)
+            self.hits += 1
+            return segments
+
+        self.misses += 1
+        if self.pattern is None:
+            segments = (template,)
+        else:
+            segments = tuple(self.pattern.split(template))
+        self.compiled[template] = segments
+        if len(self.compiled) > self.maxSize:
+            self.compiled.popitem(last=False)
+        return segments
+
+    def render(self, template: str, values: dict) -> str:
+        segments = self.compile(template)
+        if len(segments) == 1:
+            return segments[0]
+        out = list(segments)
+        for i in range(1, len(out), 2):
+            value = values.get(out[i], _MISSING)
+            if value is not _MISSING:
+                out[i] = str(value.get() if isinstance(value, LazyPlaceholder) else value)
+        return "".join(out)
+
+    def getStats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.compiled), "max_size": self.maxSize,
+                "active": len(self.active), "hit_rate": self.hits / total if total > 0 else 0.0}
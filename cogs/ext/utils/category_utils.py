@@ -1,4 +1,5 @@
 from cogs.ext.imports import *
+from cogs.ext.guild_index import guildIndexes
 
 
 async def editCategory(category: discord.CategoryChannel, categoryData: dict) -> bool:
@@ -34,13 +35,13 @@ def getCategories(categoryData: dict, guild: discord.Guild) -> List[None] | list
 
     categories: list = []
     for ids in categoryIds:
-        for cat in guild.categories:
-            if cat.id == ids:
-                categories.append(cat)
-    for name in categoryNames:
-        for cat in guild.categories:
-            if cat.name == name:
-                categories.append(cat)
+        cat = guild.get_channel(ids) if isinstance(ids, int) else None
+        if isinstance(cat, discord.CategoryChannel):
+            categories.append(cat)
+    if len(categoryNames) > 0:
+        index = guildIndexes.get(guild)
+        for name in categoryNames:
+            categories.extend(index.categories.get(name))
     if len(categories) == 0:
         return [None]
     return categories
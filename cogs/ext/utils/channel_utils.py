@@ -1,4 +1,5 @@
 from cogs.ext.imports import *
+from cogs.ext.guild_index import guildIndexes
 
 
 def getChannels(channelData: dict, guild: discord.Guild) -> list:
@@ -16,13 +17,13 @@ def getChannels(channelData: dict, guild: discord.Guild) -> list:
 
     channels: list = []
     for ids in channelIds:
-        for cha in guild.channels:
-            if cha.id == ids:
-                channels.append(cha)
-    for name in channelNames:
-        for cha in guild.channels:
-            if cha.name == name:
-                channels.append(cha)
+        cha = guild.get_channel(ids) if isinstance(ids, int) else None
+        if cha is not None:
+            channels.append(cha)
+    if len(channelNames) > 0:
+        index = guildIndexes.get(guild)
+        for name in channelNames:
+            channels.extend(index.channels.get(name))
 
     category_name = channelData.get("category_name")
     if isinstance(category_name, str):
@@ -36,12 +37,10 @@ def getChannels(channelData: dict, guild: discord.Guild) -> list:
     if not isinstance(category_id, list):
         category_id = []
 
-    for i in range(len(channels)):
-        channel = channels[i]
-        if not (channel.category is not None and (
-                channel.category.id in category_id or channel.category.name in category_name)):
-            channels.pop(i)
-    return channels
+    if len(category_name) == 0 and len(category_id) == 0:
+        return channels
+    return [channel for channel in channels if channel.category is not None and (
+            channel.category.id in category_id or channel.category.name in category_name)]
 
 
 async def createChannel(channelData: dict, guild: discord.Guild) -> List[discord.abc.GuildChannel]:
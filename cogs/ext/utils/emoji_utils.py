@@ -1,6 +1,7 @@
 import discord
 
 from cogs.ext.imports import *
+from cogs.ext.asset_registry import emojiRegistry
 
 
 async def createEmoji(data: dict, guild: discord.Guild) -> discord.Emoji:
@@ -24,13 +25,8 @@ def getEmojiSearchData(emojiData) -> tuple:
 
 
 async def getEmojis(data: dict, guild: discord.Guild) -> List[discord.Emoji]:
-    emojis = await guild.fetch_emojis()
     emojiIds, emojiNames = getEmojiSearchData(data)
-    res = []
-    for emoji in emojis:
-        if emoji.name in emojiNames or emoji.id in emojiIds:
-            res.append(emoji)
-    return res
+    return await emojiRegistry.find(guild, emojiIds, emojiNames)
 
 
 async def deleteEmoji(emoji: discord.Emoji, reason: str = ""):
@@ -1,4 +1,6 @@
 from cogs.ext.imports import *
+from cogs.ext.guild_index import guildIndexes
+from cogs.ext.ban_cache import banCache
 
 
 def getMemberGuild(guild: discord.Guild, memberId: int) -> discord.Member | None:
@@ -26,8 +28,12 @@ async def banUser(member: discord.Member, reason: str = ""):
     await member.ban(reason=reason)
 
 
-async def unbanUser(member: discord.Member, reason: str = ""):
-    await member.unban(reason=reason)
+async def unbanUser(member: discord.User, reason: str = "", guild: discord.Guild | None = None):
+    # banned users are not members anymore, only the guild can unban them
+    if guild is not None:
+        await guild.unban(member, reason=reason)
+    else:
+        await member.unban(reason=reason)
 
 
 async def kickUser(member: discord.Member, reason: str = ""):
@@ -58,16 +64,19 @@ async def userMute(member: discord.Member, status: bool, reason: str = ""):
     await member.edit(mute=status, reason=reason)
 
 
-def getBannedMembers(userData: dict, guild: discord.Guild) -> List[discord.Member]:
+async def getBannedMembers(userData: dict, guild: discord.Guild) -> List[discord.User]:
     userIds, userNames = getUserSearchData(userData)
-    members = []
-    async for banned in guild.bans():
-        user = banned[0]
-        if user is not None and (user.id in userIds or user.name in userNames):
-            members.append(user)
+    bans = await banCache.get(guild)
+    members = [bans.get(userId) for userId in userIds if bans.isBanned(userId)]
+    for name in userNames:
+        members.extend(bans.getByName(name))
     return members
 
 
+async def isBanned(guild: discord.Guild, userId: int) -> bool:
+    return await banCache.isBanned(guild, userId)
+
+
 def getUserSearchData(userData) -> tuple:
     userIds = userData.get("user_id")
     userNames = userData.get("user_name")
@@ -86,10 +95,12 @@ def getMembers(userData: dict, guild: discord.Guild) -> List[discord.Member]:
         member: discord.Member | None = guild.get_member(ids)
         if member is not None:
             members.append(member)
-    for name in userNames:
-        member: discord.Member | None = discord.utils.get(guild.members, name=name)
-        if member is not None:
-            members.append(member)
+    if len(userNames) > 0:
+        index = guildIndexes.get(guild)
+        for name in userNames:
+            member: discord.Member | None = index.members.first(name)
+            if member is not None:
+                members.append(member)
     return members
 
 
@@ -1,4 +1,15 @@
 from cogs.ext.imports import *
+from cogs.ext.role_planner import RolePlanner
+from cogs.ext.target_executor import targetExecutor
+from cogs.ext.guild_index import guildIndexes
+
+
+async def giveRoleToMembers(role: discord.Role, members: List[discord.Member], reason: str = ""):
+    planner = RolePlanner()
+    planner.addAll({role: members})
+    result = await planner.apply(reason=reason, executor=targetExecutor,
+                                 limit=utils.configManager.getMaxConcurrentActions())
+    result.raiseFirstFailure()
 
 async def createRole(roleData: dict, guild: discord.Guild) -> discord.Role:
     if "ROLE_ICONS" in guild.features:
@@ -22,8 +33,7 @@ async def createRole(roleData: dict, guild: discord.Guild) -> discord.Role:
     if pos.isdigit():
         await role.edit(position=int(pos))
 
-    for user in getMembers(roleData, guild):
-        await giveRoleToUser(user, role, str(roleData.get("give_reason", "")))
+    await giveRoleToMembers(role, getMembers(roleData, guild), str(roleData.get("give_reason", "")))
     return role
 
 
@@ -40,8 +50,7 @@ async def createRoleNoDisplayIcon(roleData: dict, guild: discord.Guild) -> disco
         if pos.isdigit():
             await role.edit(position=int(pos))
 
-        for user in getMembers(roleData, guild):
-            await giveRoleToUser(user, role, str(roleData.get("give_reason", "")))
+        await giveRoleToMembers(role, getMembers(roleData, guild), str(roleData.get("give_reason", "")))
         return role
     except Exception:
         return None
@@ -67,9 +76,7 @@ def getRoles(roleData: dict, guild: discord.Guild) -> List[discord.Role]:
                     if r.name != "@everyone":
                         roles.add(r)
             else:
-                for r in guild.roles:
-                    if r.name != "@everyone" and r.name == roleName:
-                        roles.add(r)
+                roles.update(guildIndexes.get(guild).roles.get(roleName))
         return list(roles)
     except Exception:
         return []
@@ -120,16 +127,18 @@ async def editRole(roleData: dict, role: discord.Role):
         users: list = roleData.get("users", [])
         if not isinstance(users, list):
             return
+        planner = RolePlanner()
         for member in role.members:
-            if member.id in users:
-                continue
-            await removeRole(member, role, reason=reason)
+            if member.id not in users:
+                planner.remove(member, role)
 
         for userId in users:
             member: discord.Member | None = getMemberGuild(role.guild, userId)
-            if member is None or memberHasRole(member, role):
-                continue
-            await addRole(member, role, reason=reason)
+            if member is not None:
+                planner.add(member, role)
+        result = await planner.apply(reason=reason, executor=targetExecutor,
+                                     limit=utils.configManager.getMaxConcurrentActions())
+        result.raiseFirstFailure()
 
 
 def getRoleIdFromRoles(roles: List[discord.Role]) -> list:
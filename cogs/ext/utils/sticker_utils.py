@@ -1,6 +1,7 @@
 import discord
 
 from cogs.ext.imports import *
+from cogs.ext.asset_registry import stickerRegistry
 
 
 async def createSticker(data: dict, guild: discord.Guild) -> discord.GuildSticker:
@@ -32,13 +33,8 @@ def getStickerSearchData(stickerData) -> tuple:
 
 
 async def getStickers(data: dict, guild: discord.Guild) -> List[discord.GuildSticker]:
-    stickers = await guild.fetch_stickers()
     stickerIds, stickerNames = getStickerSearchData(data)
-    res = []
-    for sticker in stickers:
-        if sticker.name in stickerNames or sticker.id in stickerIds:
-            res.append(sticker)
-    return res
+    return await stickerRegistry.find(guild, stickerIds, stickerNames)
 
 
 def getStickerData(sticker: discord.GuildSticker) -> dict:
@@ -30,50 +30,47 @@ def removeWordsFromBlacklist(words: list):
     configManager.saveConfigJSON()
 
 
+async def handleAutomodOnMessage(bot: commands.Bot, message: discord.Message) -> bool:
+    """Runs the automod pipeline on the message, True if it is being deleted"""
+    violation = configManager.automod.check(message)
+    if violation is None:
+        return False
+    if violation.rule.delete:
+        configManager.automod.deleteLater(violation.messages)
+    if violation.runActions:
+        await actions.handleAutomodActions(bot, message, violation)
+    return violation.rule.delete
+
+
+async def handleUserLevelingOnMessage(bot: commands.Bot, message: discord.Message):
+    if message.guild is None or message.author.bot or not configManager.isLevelingEnabled():
+        return
+    level = await configManager.leveling.award(message.guild.id, message.author.id)
+    if level is not None:
+        ctx = await bot.get_context(message)
+        await messages.handleMessage(bot, "level_up", "level_up",
+                                     placeholders={configManager.getUsernamePlaceholder(): message.author.name,
+                                                   configManager.getLevelPlaceholder(): level},
+                                     ctx=ctx)
+
+
 async def isUserRestricted(bot: commands.Bot, commandName: str, executionPath: str,
                            interaction: discord.Interaction | None = None,
                            ctx: discord.ext.commands.context.Context | None = None) -> tuple:
     if interaction is None and ctx is None:
         return "", []
-    res = configManager.getCommandRestrictions(commandName)
-    reason: str = ""
-    actionList: list = []
-
-    for option, data in res.items():
-        if not isinstance(data, dict):
-            if option == "actions":
-                if not isinstance(data, list):
-                    reason += f"Expected list for messages in command restrictions, but got type {type(data)}"
-                else:
-                    actionList = data
-                continue
-            else:
-                await messages.handleError(bot, commandName, executionPath,
-                                           f"Expected map in command restrictions, but got type {type(data)}",
-                                           placeholders=dict(),
-                                           interaction=interaction, ctx=ctx)
-                reason += f"Expected map for {option} in command restrictions, but got type {type(data)}"
-                break
-        dataReason = data.get("reason", "")
-        userRoleId: list = getRoleIdFromRoles(interaction.user.roles if interaction is not None else ctx.author.roles)
-        status = data.get("status", [])
-        if option == "all":
-            if bool(data.get("status", True)):
-                return reason, actionList
-            else:
-                reason += dataReason
-        elif (option == "users_id" and isinstance(status, list) and
-              (interaction.user.id if interaction is not None else ctx.author.id) not in status):
-            reason += dataReason
-        elif option == "any_roles_id" and isinstance(status, list) and anyRolesContains(status, userRoleId):
-            reason += dataReason
-        elif option == "all_roles_id" and isinstance(status, list) and allRolesContains(status, userRoleId):
-            reason += dataReason
-        elif (option == "channels_id" and isinstance(status, list) and
-              (interaction.channel.id if interaction is not None else ctx.channel.id) not in status):
-            reason += dataReason
-
-    return reason, actionList
+    policy = configManager.restrictions.getPolicy(commandName)
+    if policy.isEmpty():
+        return "", []
+    if policy.error is not None:
+        await messages.handleError(bot, commandName, executionPath, policy.error, placeholders=dict(),
+                                   interaction=interaction, ctx=ctx)
+
+    user = interaction.user if interaction is not None else ctx.author
+    channel = interaction.channel if interaction is not None else ctx.channel
+    roleIds = frozenset(getRoleIdFromRoles(getattr(user, "roles", []))) if policy.usesRoles else frozenset()
+    return configManager.restrictions.check(commandName, user.id, roleIds,
+                                            channel.id if channel is not None else None)
 
 
 def separateThread(loop, func, *args):
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import *
+
+# guild id used for warnings migrated from the old warnings.json, which did not record the guild
+LEGACY_GUILD_ID = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    moderator_id INTEGER,
+    reason TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS warnings_guild_member ON warnings (guild_id, member_id, created_at);
+CREATE INDEX IF NOT EXISTS warnings_created_at ON warnings (created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class WarningsStore:
+    """
+    Member warnings kept in SQLite (WAL mode).
+
+    All queries run on one worker thread that owns the connection, the async methods never block the event loop.
+    The database is opened lazily and the old warnings.json is imported into it once.
+    """
+
+    def __init__(self, databasePath: str, legacyJSONPath: str | None = None):
+        self.databasePath = databasePath
+        self.legacyJSONPath = legacyJSONPath
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="WarningsStore")
+        self.connection: sqlite3.Connection | None = None
+        self.openLock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        with self.openLock:
+            if self.connection is None:
+                folder = os.path.dirname(self.databasePath)
+                if len(folder) > 0:
+                    os.makedirs(folder, exist_ok=True)
+                # only the worker thread uses it, close() may run on another one after the executor is gone
+                connection = sqlite3.connect(self.databasePath, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.executescript(SCHEMA)
+                self._migrateJSON(connection)
+                self.connection = connection
+            return self.connection
+
+    def _migrateJSON(self, connection: sqlite3.Connection):
+        if self.legacyJSONPath is None or not os.path.exists(self.legacyJSONPath):
+            return
+        if connection.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone() is not None:
+            return
+        try:
+            with open(self.legacyJSONPath, "r") as jsonfile:
+                data = json.load(jsonfile)
+        except Exception as e:
+            print("Couldn't migrate " + self.legacyJSONPath, e)
+            return
+
+        rows = list(self._legacyRows(data))
+        with connection:
+            connection.executemany("INSERT INTO warnings (guild_id, member_id, moderator_id, reason, created_at) "
+                                   "VALUES (?, ?, ?, ?, ?)", rows)
+            connection.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (str(time.time()),))
+        print("Migrated " + str(len(rows)) + " warnings from " + self.legacyJSONPath)
+
+    def _legacyRows(self, data) -> Iterator[tuple]:
+        # accepts {member_id: reason | [reason | {...}]} and {guild_id: {member_id: ...}}
+        if not isinstance(data, dict):
+            return
+        now = time.time()
+        for key, value in data.items():
+            if not str(key).isdigit():
+                continue
+            if isinstance(value, dict) and all(str(k).isdigit() for k in value.keys()):
+                for memberId, warnings in value.items():
+                    yield from self._legacyMemberRows(int(key), int(memberId), warnings, now)
+            else:
+                yield from self._legacyMemberRows(LEGACY_GUILD_ID, int(key), value, now)
+
+    def _legacyMemberRows(self, guildId: int, memberId: int, warnings, now: float) -> Iterator[tuple]:
+        if not isinstance(warnings, list):
+            warnings = [warnings]
+        for warning in warnings:
+            if isinstance(warning, dict):
+                createdAt = warning.get("created_at", warning.get("timestamp", now))
+                yield (guildId, memberId, warning.get("moderator_id", None), str(warning.get("reason", "")),
+                       float(createdAt) if isinstance(createdAt, (int, float)) else now)
+            elif warning is not None:
+                yield guildId, memberId, None, str(warning), now
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def _addWarning(self, guildId: int, memberId: int, reason: str, moderatorId: int | None) -> int:
+        connection = self._connect()
+        with connection:
+            connection.execute("INSERT INTO warnings (guild_id, member_id, moderator_id, reason, created_at) "
+                               "VALUES (?, ?, ?, ?, ?)", (guildId, memberId, moderatorId, reason, time.time()))
+        return self._countWarnings(guildId, memberId)
+
+    def _countWarnings(self, guildId: int, memberId: int) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM warnings WHERE guild_id IN (?, ?) AND member_id = ?",
+                                       (guildId, LEGACY_GUILD_ID, memberId)).fetchone()[0]
+
+    def _getWarnings(self, guildId: int, memberId: int, limit: int) -> List[dict]:
+        cursor = self._connect().execute(
+            "SELECT id, guild_id, member_id, moderator_id, reason, created_at FROM warnings "
+            "WHERE guild_id IN (?, ?) AND member_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+            (guildId, LEGACY_GUILD_ID, memberId, limit))
+        return [{"id": row[0], "guild_id": row[1], "member_id": row[2], "moderator_id": row[3], "reason": row[4],
+                 "created_at": row[5]} for row in cursor.fetchall()]
+
+    def _clearWarnings(self, guildId: int, memberId: int) -> int:
+        connection = self._connect()
+        with connection:
+            return connection.execute("DELETE FROM warnings WHERE guild_id IN (?, ?) AND member_id = ?",
+                                      (guildId, LEGACY_GUILD_ID, memberId)).rowcount
+
+    def _removeWarning(self, warningId: int) -> bool:
+        connection = self._connect()
+        with connection:
+            return connection.execute("DELETE FROM warnings WHERE id = ?", (warningId,)).rowcount > 0
+
+    async def addWarning(self, guildId: int, memberId: int, reason: str = "", moderatorId: int | None = None) -> int:
+        """Stores a warning and returns the member's warning count (their new warning level)"""
+        return await self._run(self._addWarning, guildId, memberId, reason, moderatorId)
+
+    async def countWarnings(self, guildId: int, memberId: int) -> int:
+        return await self._run(self._countWarnings, guildId, memberId)
+
+    async def getWarnings(self, guildId: int, memberId: int, limit: int = 25) -> List[dict]:
+        return await self._run(self._getWarnings, guildId, memberId, limit)
+
+    async def clearWarnings(self, guildId: int, memberId: int) -> int:
+        return await self._run(self._clearWarnings, guildId, memberId)
+
+    async def removeWarning(self, warningId: int) -> bool:
+        return await self._run(self._removeWarning, warningId)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self.openLock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
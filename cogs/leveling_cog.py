@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from discord import app_commands
+
+from cogs.ext.utils.utils import *
+import cogs.ext.messages as messages
+
+
+async def setup(bot: commands.Bot):
+    # guilds=[discord.Object(id=....)]
+    await bot.add_cog(LevelingCommands(bot))
+
+
+class LevelingCommands(commands.Cog, name="Leveling"):
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    def getLevelPlaceholders(self, member: discord.Member, memberXP) -> dict:
+        return {configManager.getUsernamePlaceholder(): member.name,
+                configManager.getLevelPlaceholder(): memberXP.level,
+                configManager.getXPPlaceholder(): memberXP.xp}
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        # the Moderator cog runs automod and gives the XP itself, without it automod still runs from here
+        if message.author.id != self.bot.user.id and self.bot.get_cog("Moderator") is None and \
+                not await handleAutomodOnMessage(self.bot, message):
+            await handleUserLevelingOnMessage(self.bot, message)
+
+    @app_commands.command(description=configManager.getCommandArgDescription("xp", "description"))
+    @app_commands.describe(member=configManager.getCommandArgDescription("xp", configManager.getMentionMemberKey()))
+    async def xp(self, interaction: discord.Interaction, member: str = ""):
+        if await messages.isCommandRestricted(self.bot, "xp", "xp", interaction=interaction):
+            return
+
+        member = interaction.user if member == "" else getMemberGuild(interaction.guild,
+                                                                      getMemberIdFromMention(member))
+        if member is None:
+            await messages.handleInvalidMember(self.bot, "xp", "xp", "No such member", interaction=interaction)
+            return
+
+        try:
+            memberXP = await configManager.leveling.getMember(interaction.guild.id, member.id)
+            await messages.handleMessage(self.bot, "xp", "xp", placeholders=self.getLevelPlaceholders(member, memberXP),
+                                         interaction=interaction)
+        except Exception as e:
+            await messages.handleError(self.bot, "xp", "xp", e, interaction=interaction)
+
+    @app_commands.command(description=configManager.getCommandArgDescription("editxp", "description"))
+    @app_commands.describe(member=configManager.getCommandArgDescription("editxp", configManager.getMentionMemberKey()),
+                           number=configManager.getCommandArgDescription("editxp", configManager.getNumberKey()))
+    async def editxp(self, interaction: discord.Interaction, member: str, number: int):
+        if await messages.isCommandRestricted(self.bot, "editxp", "editxp", interaction=interaction):
+            return
+
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
+        if member is None:
+            await messages.handleInvalidMember(self.bot, "editxp", "editxp", "No such member", interaction=interaction)
+            return
+
+        try:
+            memberXP = await configManager.leveling.setXP(interaction.guild.id, member.id, number)
+            await messages.handleMessage(self.bot, "editxp", "editxp",
+                                         placeholders=self.getLevelPlaceholders(member, memberXP),
+                                         interaction=interaction)
+        except Exception as e:
+            await messages.handleError(self.bot, "editxp", "editxp", e, interaction=interaction)
+
+    @app_commands.command(description=configManager.getCommandArgDescription("editlevel", "description"))
+    @app_commands.describe(
+        member=configManager.getCommandArgDescription("editlevel", configManager.getMentionMemberKey()),
+        number=configManager.getCommandArgDescription("editlevel", configManager.getNumberKey()))
+    async def editlevel(self, interaction: discord.Interaction, member: str, number: int):
+        if await messages.isCommandRestricted(self.bot, "editlevel", "editlevel", interaction=interaction):
+            return
+
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
+        if member is None:
+            await messages.handleInvalidMember(self.bot, "editlevel", "editlevel", "No such member",
+                                               interaction=interaction)
+            return
+
+        try:
+            memberXP = await configManager.leveling.setLevel(interaction.guild.id, member.id, number)
+            await messages.handleMessage(self.bot, "editlevel", "editlevel",
+                                         placeholders=self.getLevelPlaceholders(member, memberXP),
+                                         interaction=interaction)
+        except Exception as e:
+            await messages.handleError(self.bot, "editlevel", "editlevel", e, interaction=interaction)
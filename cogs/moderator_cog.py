@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import datetime
-
 import discord.errors
+from discord import app_commands
+
 from cogs.ext.utils.utils import *
+import cogs.ext.messages as messages
+from cogs.ext.purge import purgeEngine, PurgeFilter, PurgeProgress
 
 
 async def setup(bot: commands.Bot):
@@ -19,48 +21,49 @@ class ModeratorCog(commands.Cog, name="Moderator"):
     @app_commands.command(description=configManager.getCommandArgDescription("avatar", "description"))
     @app_commands.describe(member=configManager.getCommandArgDescription("avatar", configManager.getMentionMemberKey()))
     async def avatar(self, interaction: discord.Interaction, member: str = ""):
-        if await handleRestricted(self.bot, interaction, "avatar"):
+        if await messages.isCommandRestricted(self.bot, "avatar", "avatar", interaction=interaction):
             return
 
-        if member == "":
-            member: discord.Member = interaction.user
-        else:
-            member: discord.Member = getMember(interaction, getMemberIdFromMention(member))
-
+        member = interaction.user if member == "" else getMemberGuild(interaction.guild,
+                                                                      getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(interaction, "avatar")
+            await messages.handleInvalidMember(self.bot, "avatar", "avatar", "No such member", interaction=interaction)
             return
 
-        await handleMessage(self.bot, interaction, "avatar",
-                            placeholders={configManager.getUsernamePlaceholder(): member.name,
-                                          configManager.getAvatarUrlPlaceholder(): member.avatar.url})
+        await messages.handleMessage(self.bot, "avatar", "avatar",
+                                     placeholders={configManager.getUsernamePlaceholder(): member.name,
+                                                   configManager.getAvatarUrlPlaceholder():
+                                                       placeholders_utils.LazyPlaceholder(
+                                                           lambda: member.display_avatar.url)},
+                                     interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("invite", "description"))
     @app_commands.describe(bot_id=configManager.getCommandArgDescription("invite", configManager.getMemberIDKey()),
                            permissions=configManager.getCommandArgDescription("invite", configManager.getNumberKey()))
     async def invite(self, interaction: discord.Interaction, bot_id: str, permissions: str):
-        if await handleRestricted(self.bot, interaction, "invite"):
+        if await messages.isCommandRestricted(self.bot, "invite", "invite", interaction=interaction):
             return
 
         if not bot_id.isdigit() or not permissions.isdigit():
-            await handleMessage(self.bot, interaction, "invite", error_name=configManager.getInvalidArgsKey(),
-                                placeholders={
-                                    configManager.getErrorPlaceholder():
-                                        configManager.getCommandMessages("invite", configManager.getNumberKey())})
+            await messages.handleInvalidArg(self.bot, "invite", "invite", "The bot id and permissions must be numbers",
+                                            interaction=interaction)
             return
         # https://discord.com/oauth2/authorize?client_id=1223731465309917204&scope=applications.commands%20bot&permissions=8
-        await handleMessage(self.bot, interaction, "invite", placeholders={
+        await messages.handleMessage(self.bot, "invite", "invite", placeholders={
             configManager.getInvitePlaceholder(): "https://discord.com/oauth2/authorize?client_id=" +
                                                   bot_id + "&scope=applications.commands%20bot&permissions=" +
-                                                  permissions})
+                                                  permissions}, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("ping", "description"))
     async def ping(self, interaction: discord.Interaction):
-        if await handleRestricted(self.bot, interaction, "ping"):
+        if await messages.isCommandRestricted(self.bot, "ping", "ping", interaction=interaction):
             return
 
-        await handleMessage(self.bot, interaction, "ping",
-                            placeholders={configManager.getBotLatencyPlaceholder(): str(round(self.bot.latency, 1))})
+        await messages.handleMessage(self.bot, "ping", "ping",
+                                     placeholders={configManager.getBotLatencyPlaceholder():
+                                                       placeholders_utils.LazyPlaceholder(
+                                                           lambda: str(round(self.bot.latency, 1)))},
+                                     interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("addrole", "description"))
     @app_commands.describe(
@@ -68,27 +71,28 @@ class ModeratorCog(commands.Cog, name="Moderator"):
         role=configManager.getCommandArgDescription("addrole", configManager.getMentionRoleKey()),
         reason=configManager.getCommandArgDescription("addrole", configManager.getReasonKey()))
     async def addrole(self, interaction: discord.Interaction, member: str, role: str, reason: str = ""):
-        if await handleRestricted(self.bot, interaction, "addrole"):
+        if await messages.isCommandRestricted(self.bot, "addrole", "addrole", interaction=interaction):
             return
 
-        member_obj: discord.Member = getMember(interaction, getMemberIdFromMention(member))
+        member_obj = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member_obj is None:
-            await handleInvalidMember(self.bot, interaction, "addrole")
+            await messages.handleInvalidMember(self.bot, "addrole", "addrole", "No such member",
+                                               interaction=interaction)
             return
 
-        role_obj = getRole(interaction, getRoleIdFromMention(role))
+        role_obj = interaction.guild.get_role(getRoleIdFromMention(role))
         if role_obj is None:
-            await handleInvalidRole(self.bot, interaction, "addrole")
+            await messages.handleInvalidRole(self.bot, "addrole", "addrole", "No such role", interaction=interaction)
             return
 
         try:
-            await member_obj.add_roles(role_obj, reason=reason)
-
-            await handleMessage(self.bot, interaction, "addrole",
-                                placeholders={configManager.getRoleNamePlaceholder(): role_obj.name,
-                                              configManager.getReasonPlaceholder(): reason})
+            await giveRoleToUser(member_obj, role_obj, reason=reason)
+            await messages.handleMessage(self.bot, "addrole", "addrole",
+                                         placeholders={configManager.getRoleNamePlaceholder(): role_obj.name,
+                                                       configManager.getReasonPlaceholder(): reason},
+                                         interaction=interaction)
         except Exception as e:
-            await handleErrors(self.bot, interaction, "addrole", e)
+            await messages.handleError(self.bot, "addrole", "addrole", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("removerole", "description"))
     @app_commands.describe(
@@ -96,27 +100,29 @@ class ModeratorCog(commands.Cog, name="Moderator"):
         role=configManager.getCommandArgDescription("removerole", configManager.getMentionRoleKey()),
         reason=configManager.getCommandArgDescription("removerole", configManager.getReasonKey()))
     async def removerole(self, interaction: discord.Interaction, member: str, role: str, reason: str = ""):
-        if await handleRestricted(self.bot, interaction, "removerole"):
+        if await messages.isCommandRestricted(self.bot, "removerole", "removerole", interaction=interaction):
             return
 
-        member_obj: discord.Member = getMember(interaction, getMemberIdFromMention(member))
+        member_obj = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member_obj is None:
-            await handleInvalidMember(self.bot, interaction, "removerole")
+            await messages.handleInvalidMember(self.bot, "removerole", "removerole", "No such member",
+                                               interaction=interaction)
             return
 
-        role_obj = getRole(interaction, getRoleIdFromMention(role))
+        role_obj = interaction.guild.get_role(getRoleIdFromMention(role))
         if role_obj is None:
-            await handleInvalidRole(self.bot, interaction, "removerole")
+            await messages.handleInvalidRole(self.bot, "removerole", "removerole", "No such role",
+                                             interaction=interaction)
             return
 
         try:
-            await member_obj.remove_roles(role_obj, reason=reason)
-
-            await handleMessage(self.bot, interaction, "removerole",
-                                placeholders={configManager.getRoleNamePlaceholder(): role_obj.name,
-                                              configManager.getReasonPlaceholder(): reason})
+            await removeRoleToUser(member_obj, role_obj, reason=reason)
+            await messages.handleMessage(self.bot, "removerole", "removerole",
+                                         placeholders={configManager.getRoleNamePlaceholder(): role_obj.name,
+                                                       configManager.getReasonPlaceholder(): reason},
+                                         interaction=interaction)
         except Exception as e:
-            await handleErrors(self.bot, interaction, "removerole", e)
+            await messages.handleError(self.bot, "removerole", "removerole", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("ban", "description"))
     @app_commands.describe(member=configManager.getCommandArgDescription("ban", configManager.getMentionMemberKey()),
@@ -125,162 +131,159 @@ class ModeratorCog(commands.Cog, name="Moderator"):
                            unban_reason=configManager.getCommandArgDescription("ban", configManager.getReasonKey()))
     async def ban(self, interaction: discord.Interaction, member: str, reason: str = "", duration: int = -1,
                   unban_reason: str = ""):
-        if await handleRestricted(self.bot, interaction, "ban"):
+        if await messages.isCommandRestricted(self.bot, "ban", "ban", interaction=interaction):
             return
 
-        member = getMember(interaction, getMemberIdFromMention(member))
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "ban")
+            await messages.handleInvalidMember(self.bot, "ban", "ban", "No such member", interaction=interaction)
             return
 
         try:
-            await member.ban(reason=reason)
-
-            await handleMessage(self.bot, interaction, "ban",
-                                placeholders={configManager.getUsernamePlaceholder(): member.name,
-                                              configManager.getReasonPlaceholder(): reason})
+            await banUser(member, reason=reason)
+            await messages.handleMessage(self.bot, "ban", "ban",
+                                         placeholders={configManager.getUsernamePlaceholder(): member.name,
+                                                       configManager.getReasonPlaceholder(): reason},
+                                         interaction=interaction)
             if duration > 0:
-                await asyncio.sleep(duration)
-                await member.unban(reason=unban_reason)
+                async def onUnbanError(e: Exception):
+                    await messages.handleError(self.bot, "ban", "ban", e, interaction=interaction)
+
+                await actions.scheduleReversal(duration, "unban", interaction.guild, [member], unban_reason,
+                                               description="from ban", onError=onUnbanError)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "ban", e)
+            await messages.handleError(self.bot, "ban", "ban", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("unban", "description"))
     @app_commands.describe(member=configManager.getCommandArgDescription("unban", configManager.getMentionMemberKey()),
                            reason=configManager.getCommandArgDescription("unban", configManager.getReasonKey()))
-    async def unban(self, interaction: discord.Interaction, member: str, reason: str):
-        if await handleRestricted(self.bot, interaction, "unban"):
+    async def unban(self, interaction: discord.Interaction, member: str, reason: str = ""):
+        if await messages.isCommandRestricted(self.bot, "unban", "unban", interaction=interaction):
             return
 
-        member: discord.Member | None = getMember(interaction, getMemberIdFromMention(member))
-        if member is None:
-            await handleInvalidMember(self.bot, interaction, "unban")
+        # banned users are not members anymore, only their id is known
+        userId = getMemberIdFromMention(member)
+        if userId == 0:
+            await messages.handleInvalidMember(self.bot, "unban", "unban", "No such user", interaction=interaction)
             return
 
         try:
-            await member.unban(reason=reason)
+            await unbanUser(discord.Object(id=userId), reason=reason, guild=interaction.guild)
+            await messages.handleMessage(self.bot, "unban", "unban",
+                                         placeholders={configManager.getUsernamePlaceholder(): str(userId),
+                                                       configManager.getReasonPlaceholder(): reason},
+                                         interaction=interaction)
         except Exception as e:
-            await handleErrors(self.bot, interaction, "unban", e)
-
+            await messages.handleError(self.bot, "unban", "unban", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("blacklist", "description"))
     @app_commands.describe(
         words=configManager.getCommandArgDescription("blacklist", configManager.getBlacklistWordsKey()))
     async def blacklist(self, interaction: discord.Interaction, words: str):
-        if await handleRestricted(self.bot, interaction, "blacklist"):
+        if await messages.isCommandRestricted(self.bot, "blacklist", "blacklist", interaction=interaction):
             return
 
         try:
-            words_list: list = words.split(",")
-            for i in range(len(words_list)):
-                if len(words_list[i].replace(" ", "")) == 0:
-                    words_list.pop(i)
-
+            words_list = [word for word in words.split(",") if len(word.replace(" ", "")) > 0]
             addWordsToBlacklist(words_list)
-            await handleMessage(self.bot, interaction, "blacklist",
-                                placeholders={configManager.getBlacklistWordsPlaceholder(): words_list})
+            await messages.handleMessage(self.bot, "blacklist", "blacklist",
+                                         placeholders={configManager.getBlacklistWordsPlaceholder(): words_list},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "blacklist", e)
+            await messages.handleError(self.bot, "blacklist", "blacklist", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("removeblacklist", "description"))
     @app_commands.describe(
         words=configManager.getCommandArgDescription("removeblacklist", configManager.getBlacklistWordsKey()))
     async def removeblacklist(self, interaction: discord.Interaction, words: str):
-        if await handleRestricted(self.bot, interaction, "removeblacklist"):
+        if await messages.isCommandRestricted(self.bot, "removeblacklist", "removeblacklist", interaction=interaction):
             return
 
         try:
-            words_list: list = words.split(",")
-            for i in range(len(words_list)):
-                if len(words_list[i].replace(" ", "")) == 0:
-                    words_list.pop(i)
-
+            words_list = [word for word in words.split(",") if len(word.replace(" ", "")) > 0]
             removeWordsFromBlacklist(words_list)
-            await handleMessage(self.bot, interaction, "removeblacklist",
-                                placeholders={configManager.getBlacklistWordsPlaceholder(): words_list})
+            await messages.handleMessage(self.bot, "removeblacklist", "removeblacklist",
+                                         placeholders={configManager.getBlacklistWordsPlaceholder(): words_list},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "removeblacklist", e)
+            await messages.handleError(self.bot, "removeblacklist", "removeblacklist", e, interaction=interaction)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.message.Message):
-        if message.author.id != self.bot.user.id:
-            for word in configManager.getBlacklistedWords():
-                if word in message.content:
-                    await message.delete()
-                    return
-
-            handleUserLevelingOnMessage(message.author)
-
-    @commands.Cog.listener()
-    async def on_app_command_error(self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
-        return
+        # a deleted message gives no XP
+        if message.author.id != self.bot.user.id and not await handleAutomodOnMessage(self.bot, message):
+            await handleUserLevelingOnMessage(self.bot, message)
 
     @app_commands.command(description=configManager.getCommandArgDescription("deafen", "description"))
     @app_commands.describe(member=configManager.getCommandArgDescription("deafen", configManager.getMentionMemberKey()),
                            reason=configManager.getCommandArgDescription("deafen", configManager.getReasonKey()))
     async def deafen(self, interaction: discord.Interaction, member: str, reason: str = ""):
-        if await handleRestricted(self.bot, interaction, "deafen"):
+        if await messages.isCommandRestricted(self.bot, "deafen", "deafen", interaction=interaction):
             return
 
-        member: discord.Member = getMember(interaction, getMemberIdFromMention(member))
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "deafen")
+            await messages.handleInvalidMember(self.bot, "deafen", "deafen", "No such member", interaction=interaction)
             return
 
         try:
-            await member.edit(deafen=True, reason=reason)
-            await handleMessage(self.bot, interaction, "deafen",
-                                placeholders={configManager.getUsernamePlaceholder(): member.name,
-                                              configManager.getReasonPlaceholder(): reason})
+            await userDeafen(member, True, reason=reason)
+            await messages.handleMessage(self.bot, "deafen", "deafen",
+                                         placeholders={configManager.getUsernamePlaceholder(): member.name,
+                                                       configManager.getReasonPlaceholder(): reason},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "deafen", e)
+            await messages.handleError(self.bot, "deafen", "deafen", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("undeafen", "description"))
     @app_commands.describe(
         member=configManager.getCommandArgDescription("undeafen", configManager.getMentionMemberKey()),
         reason=configManager.getCommandArgDescription("undeafen", configManager.getReasonKey()))
     async def undeafen(self, interaction: discord.Interaction, member: str, reason: str = ""):
-        if await handleRestricted(self.bot, interaction, "undeafen"):
+        if await messages.isCommandRestricted(self.bot, "undeafen", "undeafen", interaction=interaction):
             return
 
-        member: discord.Member = getMember(interaction, getMemberIdFromMention(member))
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "undeafen")
+            await messages.handleInvalidMember(self.bot, "undeafen", "undeafen", "No such member",
+                                               interaction=interaction)
             return
 
         try:
-            await member.edit(deafen=False, reason=reason)
-            await handleMessage(self.bot, interaction, "undeafen",
-                                placeholders={configManager.getUsernamePlaceholder(): member.name,
-                                              configManager.getReasonPlaceholder(): reason})
+            await userDeafen(member, False, reason=reason)
+            await messages.handleMessage(self.bot, "undeafen", "undeafen",
+                                         placeholders={configManager.getUsernamePlaceholder(): member.name,
+                                                       configManager.getReasonPlaceholder(): reason},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "undeafen", e)
+            await messages.handleError(self.bot, "undeafen", "undeafen", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("kick", "description"))
     @app_commands.describe(member=configManager.getCommandArgDescription("kick", configManager.getMentionMemberKey()),
                            reason=configManager.getCommandArgDescription("kick", configManager.getReasonKey()))
     async def kick(self, interaction: discord.Interaction, member: str, reason: str = ""):
-        if await handleRestricted(self.bot, interaction, "kick"):
+        if await messages.isCommandRestricted(self.bot, "kick", "kick", interaction=interaction):
             return
 
-        member = getMember(interaction, getMemberIdFromMention(member))
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "kick")
+            await messages.handleInvalidMember(self.bot, "kick", "kick", "No such member", interaction=interaction)
             return
 
         try:
-            await member.kick(reason=reason)
-            await handleMessage(self.bot, interaction, "kick",
-                                placeholders={configManager.getUsernamePlaceholder(): member.name,
-                                              configManager.getReasonPlaceholder(): reason})
+            await kickUser(member, reason=reason)
+            await messages.handleMessage(self.bot, "kick", "kick",
+                                         placeholders={configManager.getUsernamePlaceholder(): member.name,
+                                                       configManager.getReasonPlaceholder(): reason},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "kick", e)
+            await messages.handleError(self.bot, "kick", "kick", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("move", "description"))
     @app_commands.describe(
@@ -289,55 +292,107 @@ class ModeratorCog(commands.Cog, name="Moderator"):
                                                                configManager.getMentionVoiceChannelKey()),
         reason=configManager.getCommandArgDescription("move", configManager.getReasonKey()))
     async def move(self, interaction: discord.Interaction, member_mention: str, channel_mention: str, reason: str = ""):
-        if await handleRestricted(self.bot, interaction, "move"):
+        if await messages.isCommandRestricted(self.bot, "move", "move", interaction=interaction):
             return
 
-        channel = getVoiceChannel(interaction, getChannelIdFromMention(channel_mention))
+        channel = getVoiceChannelGuild(interaction.guild, getChannelIdFromMention(channel_mention))
         if channel is None:
-            await handleInvalidChannels(self.bot, interaction, "move")
+            await messages.handleInvalidChannels(self.bot, "move", "move", "No such voice channel",
+                                                 interaction=interaction)
             return
 
-        member = getMember(interaction, getMemberIdFromMention(member_mention))
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member_mention))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "move")
+            await messages.handleInvalidMember(self.bot, "move", "move", "No such member", interaction=interaction)
             return
 
         try:
             await member.move_to(channel, reason=reason)
-            await handleMessage(self.bot, interaction, "move",
-                                placeholders={configManager.getUsernamePlaceholder(): member.name,
-                                              configManager.getChannelNamePlaceholder(): channel.name,
-                                              configManager.getReasonPlaceholder(): reason})
+            await messages.handleMessage(self.bot, "move", "move",
+                                         placeholders={configManager.getUsernamePlaceholder(): member.name,
+                                                       configManager.getChannelNamePlaceholder(): channel.name,
+                                                       configManager.getReasonPlaceholder(): reason},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "move", e)
+            await messages.handleError(self.bot, "move", "move", e, interaction=interaction)
+
 
     @app_commands.command(description=configManager.getCommandArgDescription("clear", "description"))
-    @app_commands.describe(number=configManager.getCommandArgDescription("clear", configManager.getNumberKey()))
-    async def clear(self, interaction: discord.Interaction, number: str):
-        if await handleRestricted(self.bot, interaction, "clear"):
+    @app_commands.describe(number=configManager.getCommandArgDescription("clear", configManager.getNumberKey()),
+                           member=configManager.getCommandArgDescription("clear",
+                                                                         configManager.getMentionMemberKey()),
+                           contains=configManager.getCommandArgDescription("clear", configManager.getContainsKey()),
+                           attachments=configManager.getCommandArgDescription("clear",
+                                                                              configManager.getAttachmentsKey()),
+                           minutes=configManager.getCommandArgDescription("clear", configManager.getMinutesKey()))
+    async def clear(self, interaction: discord.Interaction, number: str, member: str = "", contains: str = "",
+                    attachments: bool = False, minutes: int = 0):
+        if await messages.isCommandRestricted(self.bot, "clear", "clear", interaction=interaction):
+            return
+
+        authorIds = None
+        if member != "":
+            found = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
+            if found is None:
+                await messages.handleInvalidMember(self.bot, "clear", "clear", "No such member",
+                                                   interaction=interaction)
+                return
+            authorIds = [found.id]
+
+        # claimed before the first await, two clears checking at the same time would both start otherwise
+        channel = interaction.channel
+        if not purgeEngine.tryAcquire(channel.id):
+            await messages.handleInvalidArg(self.bot, "clear", "clear", "A clear is already running in this channel",
+                                            interaction=interaction)
             return
 
         try:
-            await interaction.channel.purge(limit=int(number))
-            await handleMessage(self.bot, interaction, "clear",
-                                placeholders={configManager.getRemoveMessagesKey(): number})
+            # the purge outlives the 3 seconds an interaction has to respond, progress goes to the deferred reply
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            purgeEngine.configure(configManager.getPurgeSingleDeleteDelay(), configManager.getPurgeProgressInterval())
+            after = discord.utils.utcnow() - timedelta(minutes=minutes) if minutes > 0 else None
+            purgeFilter = PurgeFilter(authorIds=authorIds, contains=contains, attachments=attachments, after=after)
+            progressMessage = configManager.getPurgeProgressMessage()
+
+            async def onProgress(progress: PurgeProgress):
+                if not interaction.is_expired():
+                    await interaction.edit_original_response(content=progress.format(progressMessage))
+
+            progress = await purgeEngine.run(channel, int(number), purgeFilter, onProgress)
+            # the interaction token lasts 15 minutes, a longer purge reports in the channel instead
+            if interaction.is_expired():
+                await channel.send(progress.format(progressMessage))
+            else:
+                await messages.handleMessage(self.bot, "clear", "clear",
+                                             placeholders={configManager.getNumberPlaceholder(): progress.deleted},
+                                             interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "clear", e)
+            if interaction.is_expired():
+                try:
+                    await channel.send(f"Clear stopped: {e}")
+                except Exception as ex:
+                    print("original error:", e, "follow up error:", ex)
+            else:
+                await messages.handleError(self.bot, "clear", "clear", e, interaction=interaction)
+        finally:
+            purgeEngine.release(channel.id)
+
 
     @app_commands.command(description=configManager.getCommandArgDescription("say", "description"))
     @app_commands.describe(message=configManager.getCommandArgDescription("clear", configManager.getEnterMessageKey()))
     async def say(self, interaction: discord.Interaction, message: str):
-        if await handleRestricted(self.bot, interaction, "say"):
+        if await messages.isCommandRestricted(self.bot, "say", "say", interaction=interaction):
             return
 
         try:
-            await handleMessage(self.bot, interaction, "say",
-                                placeholders={configManager.getMessagePlaceholder(): message})
+            await messages.handleMessage(self.bot, "say", "say",
+                                         placeholders={configManager.getMessagePlaceholder(): message},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "say", e)
+            await messages.handleError(self.bot, "say", "say", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("timeout", "description"))
     @app_commands.describe(
@@ -345,146 +400,154 @@ class ModeratorCog(commands.Cog, name="Moderator"):
         until=configManager.getCommandArgDescription("timeout", configManager.getDatetimeKey()),
         reason=configManager.getCommandArgDescription("timeout", configManager.getReasonKey()))
     async def timeout(self, interaction: discord.Interaction, member: str, until: str, reason: str = ""):
-        if await handleRestricted(self.bot, interaction, "timeout"):
+        if await messages.isCommandRestricted(self.bot, "timeout", "timeout", interaction=interaction):
             return
 
-        member = getMember(interaction, getMemberIdFromMention(member))
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "timeout")
+            await messages.handleInvalidMember(self.bot, "timeout", "timeout", "No such member",
+                                               interaction=interaction)
             return
 
         try:
-            await member.timeout(datetime.datetime.strptime(until, "YYYY-MM-DDTHH:MM:SS"), reason=reason)
-            await handleMessage(self.bot, interaction, "timeout",
-                                placeholders={configManager.getUsernamePlaceholder(): member.name,
-                                              configManager.getReasonPlaceholder(): reason,
-                                              configManager.getDatetimePlaceholder(): until})
+            # YYYY-MM-DDTHH:MM:SS
+            await timeoutUser(member, datetime.fromisoformat(until), reason=reason)
+            await messages.handleMessage(self.bot, "timeout", "timeout",
+                                         placeholders={configManager.getUsernamePlaceholder(): member.name,
+                                                       configManager.getReasonPlaceholder(): reason,
+                                                       configManager.getDatetimePlaceholder(): until},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "timeout", e)
+            await messages.handleError(self.bot, "timeout", "timeout", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("removetimeout", "description"))
     @app_commands.describe(
         member=configManager.getCommandArgDescription("removetimeout", configManager.getMentionMemberKey()))
     async def removetimeout(self, interaction: discord.Interaction, member: str):
-        if await handleRestricted(self.bot, interaction, "removetimeout"):
+        if await messages.isCommandRestricted(self.bot, "removetimeout", "removetimeout", interaction=interaction):
             return
 
-        member = getMember(interaction, getMemberIdFromMention(member))
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "removetimeout")
+            await messages.handleInvalidMember(self.bot, "removetimeout", "removetimeout", "No such member",
+                                               interaction=interaction)
             return
 
         try:
-            await member.edit(timed_out_until=None)
-            await handleMessage(self.bot, interaction, "removetimeout",
-                                placeholders={configManager.getUsernamePlaceholder(): member.name})
+            await removeUserTimeout(member)
+            await messages.handleMessage(self.bot, "removetimeout", "removetimeout",
+                                         placeholders={configManager.getUsernamePlaceholder(): member.name},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "removetimeout", e)
+            await messages.handleError(self.bot, "removetimeout", "removetimeout", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("slowmode", "description"))
     @app_commands.describe(seconds=configManager.getCommandArgDescription("slowmode", configManager.getNumberKey()))
     async def slowmode(self, interaction: discord.Interaction, seconds: str):
-        # ctx.channel.edit(slowmode_delay=seconds)
-
-        if await handleRestricted(self.bot, interaction, "slowmode"):
+        if await messages.isCommandRestricted(self.bot, "slowmode", "slowmode", interaction=interaction):
             return
 
         if not seconds.isdigit():
-            await handleInvalidArg(self.bot, interaction, "slowmode")
+            await messages.handleInvalidArg(self.bot, "slowmode", "slowmode", "The seconds must be a number",
+                                            interaction=interaction)
             return
 
         try:
             await interaction.channel.edit(slowmode_delay=int(seconds))
-            await handleMessage(self.bot, interaction, "slowmode",
-                                placeholders={configManager.getChannelNamePlaceholder(): interaction.channel.name,
-                                              configManager.getNumberPlaceholder(): seconds})
+            await messages.handleMessage(self.bot, "slowmode", "slowmode",
+                                         placeholders={
+                                             configManager.getChannelNamePlaceholder(): interaction.channel.name,
+                                             configManager.getNumberPlaceholder(): seconds},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "slowmode", e)
+            await messages.handleError(self.bot, "slowmode", "slowmode", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("vmute", "description"))
     @app_commands.describe(member=configManager.getCommandArgDescription("vmute", configManager.getMentionMemberKey()))
     async def vmute(self, interaction: discord.Interaction, member: str):
-        if await handleRestricted(self.bot, interaction, "vmute"):
+        if await messages.isCommandRestricted(self.bot, "vmute", "vmute", interaction=interaction):
             return
 
-        member = getMember(interaction, getMemberIdFromMention(member))
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "vmute")
+            await messages.handleInvalidMember(self.bot, "vmute", "vmute", "No such member", interaction=interaction)
             return
 
         try:
-            await member.edit(mute=True)
-            await handleMessage(self.bot, interaction, "vmute",
-                                placeholders={configManager.getUsernamePlaceholder(): member.name})
+            await userMute(member, True)
+            await messages.handleMessage(self.bot, "vmute", "vmute",
+                                         placeholders={configManager.getUsernamePlaceholder(): member.name},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "vmute", e)
+            await messages.handleError(self.bot, "vmute", "vmute", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("vunmute", "description"))
     @app_commands.describe(
         member=configManager.getCommandArgDescription("vunmute", configManager.getMentionMemberKey()))
     async def vunmute(self, interaction: discord.Interaction, member: str):
-        if await handleRestricted(self.bot, interaction, "vunmute"):
+        if await messages.isCommandRestricted(self.bot, "vunmute", "vunmute", interaction=interaction):
             return
 
-        member = getMember(interaction, getMemberIdFromMention(member))
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "vunmute")
+            await messages.handleInvalidMember(self.bot, "vunmute", "vunmute", "No such member",
+                                               interaction=interaction)
             return
 
         try:
-            await member.edit(mute=False)
-            await handleMessage(self.bot, interaction, "vunmute",
-                                placeholders={configManager.getUsernamePlaceholder(): member.name})
+            await userMute(member, False)
+            await messages.handleMessage(self.bot, "vunmute", "vunmute",
+                                         placeholders={configManager.getUsernamePlaceholder(): member.name},
+                                         interaction=interaction)
         except Exception as e:
-            await handleErrors(self.bot, interaction, "vunmute", e)
+            await messages.handleError(self.bot, "vunmute", "vunmute", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("vkick", "description"))
     @app_commands.describe(member=configManager.getCommandArgDescription("vkick", configManager.getMentionMemberKey()))
     async def vkick(self, interaction: discord.Interaction, member: str):
-        if await handleRestricted(self.bot, interaction, "vkick"):
+        if await messages.isCommandRestricted(self.bot, "vkick", "vkick", interaction=interaction):
             return
 
-        member = getMember(interaction, getMemberIdFromMention(member))
+        member = getMemberGuild(interaction.guild, getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "vkick")
+            await messages.handleInvalidMember(self.bot, "vkick", "vkick", "No such member", interaction=interaction)
             return
 
         try:
             await member.move_to(None)
-            await handleMessage(self.bot, interaction, "vkick",
-                                placeholders={configManager.getUsernamePlaceholder(): member.name})
+            await messages.handleMessage(self.bot, "vkick", "vkick",
+                                         placeholders={configManager.getUsernamePlaceholder(): member.name},
+                                         interaction=interaction)
 
         except Exception as e:
-            await handleErrors(self.bot, interaction, "vkick", e)
+            await messages.handleError(self.bot, "vkick", "vkick", e, interaction=interaction)
 
     @app_commands.command(description=configManager.getCommandArgDescription("dm", "description"))
     @app_commands.describe(member=configManager.getCommandArgDescription("dm", configManager.getMentionMemberKey()),
                            message=configManager.getCommandArgDescription("dm", configManager.getEnterMessageKey()))
     async def dm(self, interaction: discord.Interaction, message: str, member: str = ""):
-        if await handleRestricted(self.bot, interaction, "dm"):
+        if await messages.isCommandRestricted(self.bot, "dm", "dm", interaction=interaction):
             return
 
         if len(message.replace(" ", "")) == 0:
-            await handleInvalidArg(self.bot, interaction, "dm")
+            await messages.handleInvalidArg(self.bot, "dm", "dm", "The message is empty", interaction=interaction)
             return
 
-        if member == "":
-            member: discord.Member = interaction.user
-        else:
-            member: discord.Member = getMember(interaction, getMemberIdFromMention(member))
-
+        member = interaction.user if member == "" else getMemberGuild(interaction.guild,
+                                                                      getMemberIdFromMention(member))
         if member is None:
-            await handleInvalidMember(self.bot, interaction, "dm")
+            await messages.handleInvalidMember(self.bot, "dm", "dm", "No such member", interaction=interaction)
             return
 
-        await handleMessage(self.bot, interaction, "dm",
-                            placeholders={configManager.getUsernamePlaceholder(): interaction.user.name,
-                                          configManager.getMessagePlaceholder(): message}, dm_user=member)
+        await messages.handleMessage(self.bot, "dm", "dm",
+                                     placeholders={configManager.getUsernamePlaceholder(): interaction.user.name,
+                                                   configManager.getMessagePlaceholder(): message},
+                                     DMUser=member, interaction=interaction)
 
     @commands.Cog.listener()
     async def on_app_command_error(self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
-        return
\ No newline at end of file
+        return
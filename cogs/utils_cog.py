@@ -4,6 +4,7 @@ import discord.errors
 from discord import app_commands
 from cogs.ext.utils.utils import *
 import cogs.ext.messages as messages
+from cogs.ext.command_registry import COG_ACTIVE, COG_INACTIVE, COG_NOT_FOUND
 
 async def setup(bot: commands.Bot):
     # guilds=[discord.Object(id=....)]
@@ -48,7 +49,7 @@ class UtilsCog(commands.Cog, name="Utils"):
             await messages.handleInvalidArg(self.bot, interaction, "enablecog")
             return
 
-        given_cog_file_name: str | None = configManager.getCogData.get(cog, None)
+        given_cog_file_name: str | None = configManager.getCogData().get(cog, None)
         if given_cog_file_name is None:
             await messages.handleInvalidArg(self.bot, interaction, "enablecog")
             return
@@ -65,27 +66,13 @@ class UtilsCog(commands.Cog, name="Utils"):
         if await messages.handleRestricted(self.bot, interaction, "listcog"):
             return
 
-        for name, file_name in configManager.getCogData().items():
-            try:
-                await self.bot.load_extension(f"cogs.{file_name}")
-
-            except commands.ExtensionAlreadyLoaded:
-                #await ctx.send("Cog is loaded")
-                await messages.handleMessage(self.bot, interaction, "listcog",
-                                             placeholders={configManager.getUsernamePlaceholder(): name,
-                                                  configManager.getMessagePlaceholder(): configManager.getCogActiveStatus()})
-
-            except commands.ExtensionNotFound:
-                #await ctx.send("Cog not found")
-                await messages.handleMessage(self.bot, interaction, "listcog",
-                                             placeholders={configManager.getUsernamePlaceholder(): name,
-                                                  configManager.getMessagePlaceholder(): configManager.getCogNotFoundStatus()})
-            else:
-                #await ctx.send("Cog is unloaded")
-                await self.bot.unload_extension(f"cogs.{file_name}")
-                await messages.handleMessage(self.bot, interaction, "listcog",
-                                             placeholders={configManager.getUsernamePlaceholder(): name,
-                                                  configManager.getMessagePlaceholder(): configManager.getCogDeactiveStatus()})
+        statuses = {COG_ACTIVE: configManager.getCogActiveStatus(), COG_INACTIVE: configManager.getCogDeactiveStatus(),
+                    COG_NOT_FOUND: configManager.getCogNotFoundStatus()}
+        for name in configManager.getCogData().keys():
+            status = configManager.commandRegistry.getCogStatus(self.bot, name)
+            await messages.handleMessage(self.bot, interaction, "listcog",
+                                         placeholders={configManager.getUsernamePlaceholder(): name,
+                                                       configManager.getMessagePlaceholder(): statuses[status]})
 
     @commands.Cog.listener()
     async def on_app_command_error(self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
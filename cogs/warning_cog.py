@@ -11,6 +11,18 @@ async def setup(bot: commands.Bot):
     await bot.add_cog(WarningsCommands(bot))
 
 
+def getWarningRolesFromLevel(interaction: discord.Interaction, level: int) -> List[discord.Role]:
+    roles = []
+    roles_id = configManager.getWarningDataForLevel(level).get("roles_id", [])
+    if not isinstance(roles_id, list):
+        return roles
+    for r_id in roles_id:
+        r = interaction.guild.get_role(r_id)
+        if r is not None:
+            roles.append(r)
+    return roles
+
+
 class WarningsCommands(commands.Cog, name="Warnings"):
 
     def __init__(self, bot: commands.Bot):
@@ -28,11 +40,12 @@ class WarningsCommands(commands.Cog, name="Warnings"):
             await messages.handleInvalidMember(self.bot, interaction, "warn")
             return
 
-        nextLevel = getUserWarningLevel(member) + 1
-        roles = getWarningRolesFromLevel(interaction, nextLevel)
-        warningData = configManager.getWarningDataForLevel(nextLevel)
-
         try:
+            nextLevel = await configManager.warnings.addWarning(interaction.guild.id, member.id, reason=reason,
+                                                                moderatorId=interaction.user.id)
+            roles = getWarningRolesFromLevel(interaction, nextLevel)
+            warningData = configManager.getWarningDataForLevel(nextLevel)
+
             for r in roles:
                 await giveRoleToUser(member, r, reason=reason)
                 await member.add_roles(r, reason=reason)
@@ -63,16 +76,23 @@ class WarningsCommands(commands.Cog, name="Warnings"):
             await messages.handleInvalidMember(self.bot, interaction, "warnings")
             return
 
-        roles = getRoleIdFromRoles(getWarningRolesFromLevel(interaction, getUserWarningLevel(member)))
+        try:
+            level = await configManager.warnings.countWarnings(interaction.guild.id, member.id)
+            memberWarnings = await configManager.warnings.getWarnings(interaction.guild.id, member.id)
+        except Exception as e:
+            await messages.handleErrors(self.bot, interaction, "warnings", e)
+            return
+
+        roles = getRoleIdFromRoles(getWarningRolesFromLevel(interaction, level))
+        reasons = ", ".join(warning["reason"] for warning in memberWarnings if len(warning["reason"]) > 0)
         for role in member.roles:
             if role.id in roles:
                 try:
                     await messages.handleMessage(self.bot, interaction, "warnings",
                                                  placeholders={configManager.getRoleNamePlaceholder(): role.name,
                                                                configManager.getUsernamePlaceholder(): member.name,
-                                                               configManager.getReasonPlaceholder():
-                                                                   configManager.warning_data[
-                                                                       str(member.id)]})
+                                                               configManager.getLevelPlaceholder(): level,
+                                                               configManager.getReasonPlaceholder(): reasons})
                     return
 
                 except Exception as e:
@@ -105,6 +125,7 @@ class WarningsCommands(commands.Cog, name="Warnings"):
                         allRoles.append(r)
 
         try:
+            await configManager.warnings.clearWarnings(interaction.guild.id, member.id)
             for role in allRoles:
                 await removeRoleToUser(member, role, reason=reason)
 
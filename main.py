@@ -2,6 +2,11 @@ import os, sys
 
 import cogs.ext.utils.utils as utils
 import cogs.ext.messages as messages
+import cogs.ext.buttons as buttons
+import cogs.ext.actions as actions
+from cogs.ext.guild_index import guildIndexes
+from cogs.ext.ban_cache import banCache
+from cogs.ext.asset_registry import emojiRegistry, stickerRegistry
 
 """
 - ``0x<hex>``
@@ -86,8 +91,21 @@ def FindAll(directory: str, extension: str = ".py", exclusions: list = ["__init_
 
 @bot.event
 async def on_ready():
-    for loc in FindAll("cogs", exclusions=["__init__.py", "cogs\\ext", "cogs\\ext\\utils", "moderator_cog.py"]):
+    # os.walk roots use the platform's separator, helper modules in cogs/ext aren't extensions
+    for loc in FindAll("cogs", exclusions=["__init__.py", os.path.join("cogs", "ext"),
+                                           os.path.join("cogs", "ext", "utils")]):
         await bot.load_extension(name=loc)
+    buttons.viewRegistry.start(bot)
+    guildIndexes.start(bot)
+    banCache.start(bot)
+    emojiRegistry.start(bot)
+    stickerRegistry.start(bot)
+    utils.configManager.restrictions.start(bot)
+    utils.configManager.nativeAutomod.start(bot)
+    await actions.startScheduler(bot)
+    utils.configManager.leveling.start()
+    if utils.configManager.isWatchingConfigFiles():
+        print('Watching config files:', utils.configManager.startWatcher())
     print('Bot:', bot.user.name)
     res = await messages.handleMessage(bot, "on_ready", "on_ready",
                                        placeholders={utils.configManager.getUsernamePlaceholder(): bot.user.name,
@@ -112,9 +130,49 @@ async def reload(ctx: discord.ext.commands.context.Context):
                                           ctx=ctx):
         return
 
-    utils.configManager.reloadConfig()
+    report = await utils.configManager.reloadConfig()
     res = await messages.handleMessage(bot, "reload", "reload",
-                                       placeholders={},
+                                       placeholders={utils.configManager.getNumberPlaceholder(): report["latency_ms"],
+                                                     utils.configManager.getMessagePlaceholder():
+                                                         utils.configManager.formatReloadReport(report)},
+                                       interaction=None, DMUser=None, ctx=ctx)
+
+
+def formatJob(job) -> str:
+    status = ""
+    if job.isFailed():
+        status = f" (failed, cancel it to remove it: {job.lastError})"
+    elif job.attempts > 0:
+        status = f" (retry {job.attempts}: {job.lastError})"
+    return f"#{job.id} <t:{int(job.runAt)}:R> {job.description}{status}"
+
+
+@bot.command()
+async def jobs(ctx: discord.ext.commands.context.Context):
+    if await messages.isCommandRestricted(bot, "jobs", "jobs", interaction=None, ctx=ctx):
+        return
+
+    pending = utils.configManager.scheduler.getJobs(ctx.guild.id if ctx.guild is not None else None)
+    res = await messages.handleMessage(bot, "jobs", "jobs",
+                                       placeholders={utils.configManager.getNumberPlaceholder(): str(len(pending)),
+                                                     utils.configManager.getMessagePlaceholder():
+                                                         "\n".join(formatJob(job) for job in pending[:25])},
+                                       interaction=None, DMUser=None, ctx=ctx)
+
+
+@bot.command()
+async def canceljob(ctx: discord.ext.commands.context.Context, jobId: int):
+    if await messages.isCommandRestricted(bot, "canceljob", "canceljob", interaction=None, ctx=ctx):
+        return
+
+    job = next((job for job in utils.configManager.scheduler.getJobs() if job.id == jobId), None)
+    if job is not None and ctx.guild is not None and job.guildId not in (None, ctx.guild.id):
+        job = None
+    cancelled = job is not None and await utils.configManager.scheduler.cancel(jobId)
+    res = await messages.handleMessage(bot, "canceljob", "canceljob",
+                                       placeholders={utils.configManager.getNumberPlaceholder(): str(jobId),
+                                                     utils.configManager.getMessagePlaceholder():
+                                                         job.description if cancelled else "no such pending job"},
                                        interaction=None, DMUser=None, ctx=ctx)
 
 
@@ -125,6 +183,7 @@ if __name__ == "__main__":
         exit()
 
     bot.run(token)
+    utils.configManager.flush()
 
 # TODO LIST
 # + add documentation at the end of the project